@@ -0,0 +1,222 @@
+from functools import partial
+from PyQt5 import QtWidgets, QtCore, QtGui
+import time
+
+
+class TaskArchive:
+    """
+    Класс для переноса выполненных задач в архив и работы с ним
+    """
+    DONE_LAYOUT_ID = 3  # id списка "Done"
+
+    def __init__(self, db_connection):
+        self.db_connection = db_connection
+        self.db_cursor = self.db_connection.cursor()
+        self.create_archive()
+
+    def create_archive(self):
+        """
+        метод для создания таблицы архива, если её не существует
+        """
+        self.db_cursor.executescript("""
+            CREATE TABLE IF NOT EXISTS archived_tasks(
+                archive_id INTEGER PRIMARY KEY,
+                id INTEGER,
+                comment TEXT,
+                color TEXT,
+                attachments TEXT,
+                table_id INTEGER,
+                layout_id INTEGER,
+                done_at REAL,
+                archived_at REAL,
+                checklist_done INTEGER DEFAULT 0,
+                checklist_total INTEGER DEFAULT 0,
+                deadline_date TEXT);
+            CREATE INDEX IF NOT EXISTS archived_tasks_table_done
+                ON archived_tasks(table_id, done_at)""")
+        self.db_connection.commit()
+
+    def archive_done_tasks(self, days: int, excluded_ids=()):
+        """
+        метод для переноса в архив задач, выполненных больше заданного
+        количества дней назад, возвращает список id перенесенных задач
+        args(
+            days: int - сколько дней задача должна пролежать в списке "Done",
+            excluded_ids: tuple - id задач, которые не нужно архивировать
+        )
+        """
+        now = time.time()
+        placeholders = ", ".join("?" * len(excluded_ids))
+        condition = f"""layout_id = ? AND done_at < ?
+            AND id NOT IN ({placeholders})"""
+        params = (self.DONE_LAYOUT_ID, now - days * 86400, *excluded_ids)
+        archived_ids = [row[0] for row in self.db_cursor.execute(
+            f"SELECT id FROM tasks WHERE {condition}", params)]
+        self.db_cursor.execute(f"""INSERT INTO archived_tasks
+            (id, comment, color, attachments, table_id, layout_id,
+            done_at, archived_at, checklist_done, checklist_total, deadline_date)
+            SELECT id, comment, color, attachments, table_id, layout_id,
+            done_at, ?, checklist_done, checklist_total, deadline_date
+            FROM tasks WHERE {condition}""", (now, *params))
+        self.db_cursor.execute(f"DELETE FROM tasks WHERE {condition}", params)
+        self.db_connection.commit()
+        return archived_ids
+
+    def count_tasks(self, table_id=None):
+        """
+        метод для получения количества задач в архиве
+        """
+        if table_id is None:
+            return self.db_cursor.execute(
+                "SELECT COUNT(*) FROM archived_tasks").fetchone()[0]
+        return self.db_cursor.execute(
+            "SELECT COUNT(*) FROM archived_tasks WHERE table_id = ?",
+            (table_id,)).fetchone()[0]
+
+    def get_page(self, page: int, page_size: int, table_id=None):
+        """
+        метод для получения страницы архива, начиная с недавно выполненных задач
+        """
+        condition = "" if table_id is None else "WHERE table_id = ?"
+        params = () if table_id is None else (table_id,)
+        return self.db_cursor.execute(f"""SELECT archive_id, comment,
+            checklist_done, checklist_total, table_id, done_at
+            FROM archived_tasks {condition}
+            ORDER BY done_at DESC, archive_id DESC
+            LIMIT ? OFFSET ?""", (*params, page_size, page * page_size)).fetchall()
+
+    def restore_task(self, archive_id: int):
+        """
+        метод для возвращения задачи из архива в список "Done" её таблицы,
+        возвращает новый id задачи или None, если её таблица удалена
+        """
+        task_data = self.db_cursor.execute("""SELECT comment, color,
+            attachments, table_id, checklist_done, checklist_total,
+            deadline_date, NULLIF(json_extract(attachments, '$.file'), '')
+            FROM archived_tasks
+            WHERE archive_id = ?""", (archive_id,)).fetchone()
+        if task_data is None or self.db_cursor.execute(
+                "SELECT id FROM tables WHERE id = ?",
+                (task_data[3],)).fetchone() is None:
+            return None
+        self.db_cursor.execute("""INSERT INTO tasks
+            (id, comment, color, attachments, table_id, checklist_done,
+            checklist_total, deadline_date, file_path, layout_id, done_at)
+            VALUES ((SELECT COALESCE(MAX(id), -1) + 1 FROM tasks),
+            ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                               (*task_data, self.DONE_LAYOUT_ID, time.time()))
+        new_id = self.db_cursor.execute(
+            "SELECT id FROM tasks WHERE rowid = ?",
+            (self.db_cursor.lastrowid,)).fetchone()[0]
+        self.db_cursor.execute(
+            "DELETE FROM archived_tasks WHERE archive_id = ?", (archive_id,))
+        self.db_connection.commit()
+        return new_id
+
+
+class ArchiveWindow(QtWidgets.QWidget):
+    """
+    Класс окна для постраничного просмотра архива задач
+    """
+    task_restored = QtCore.pyqtSignal(int)  # сигнал с id восстановленной задачи
+    PAGE_SIZE = 100  # количество задач на одной странице
+
+    def __init__(self, archive: TaskArchive, logo_filename):
+        super().__init__()
+        self.archive = archive
+        self.logo_filename = logo_filename
+        self.table_id = None  # id таблицы, задачи которой показываются
+        self.page = 0
+        self.pages_count = 1
+        self.setup_ui()
+
+    def setup_ui(self):
+        """
+        главный метод для создания графического интерфейса окна
+        """
+        self.main_layout = QtWidgets.QVBoxLayout(self)
+        self.current_table_checkbox = QtWidgets.QCheckBox(
+            "Only current table", self)
+        self.current_table_checkbox.setChecked(True)
+        self.current_table_checkbox.stateChanged.connect(self.reload)
+        self.tasks_table = QtWidgets.QTableWidget(self)
+        self.tasks_table.setColumnCount(4)
+        self.tasks_table.setHorizontalHeaderLabels(
+            ("Task", "Check list", "Table id", "Done at"))
+        self.tasks_table.setEditTriggers(
+            QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.tasks_table.setSelectionBehavior(
+            QtWidgets.QAbstractItemView.SelectRows)
+        self.tasks_table.horizontalHeader().setStretchLastSection(True)
+        self.controls_layout = QtWidgets.QHBoxLayout()
+        self.previous_button = QtWidgets.QPushButton("<", self)
+        self.next_button = QtWidgets.QPushButton(">", self)
+        self.page_label = QtWidgets.QLabel(self)
+        self.restore_button = QtWidgets.QPushButton("Restore task", self)
+        self.previous_button.clicked.connect(partial(self.change_page, -1))
+        self.next_button.clicked.connect(partial(self.change_page, 1))
+        self.restore_button.clicked.connect(self.restore_selected_task)
+        for widget in (self.previous_button, self.page_label,
+                       self.next_button, self.restore_button):
+            self.controls_layout.addWidget(widget)
+        self.main_layout.addWidget(self.current_table_checkbox)
+        self.main_layout.addWidget(self.tasks_table)
+        self.main_layout.addLayout(self.controls_layout)
+        self.setWindowTitle("Archive")
+        self.setWindowIcon(QtGui.QIcon(self.logo_filename))
+        self.resize(600, 400)
+
+    def show_table(self, table_id: int):
+        """
+        метод для показа окна с архивом заданной таблицы
+        """
+        self.table_id = table_id
+        self.page = 0
+        self.reload()
+        self.show()
+
+    def reload(self):
+        """
+        метод для загрузки текущей страницы архива
+        """
+        table_id = self.table_id if self.current_table_checkbox.isChecked() else None
+        tasks_count = self.archive.count_tasks(table_id)
+        self.pages_count = max(1, -(-tasks_count // self.PAGE_SIZE))
+        self.page = min(self.page, self.pages_count - 1)
+        rows = self.archive.get_page(self.page, self.PAGE_SIZE, table_id)
+        self.tasks_table.setRowCount(len(rows))
+        for row_index, (archive_id, text, done, total, table, done_at) in enumerate(rows):
+            checklist_text = f"{done}/{total}" if total else ""
+            done_text = "" if done_at is None else time.strftime(
+                "%d.%m.%Y %H:%M", time.localtime(done_at))
+            for column, value in enumerate((text, checklist_text, table, done_text)):
+                item = QtWidgets.QTableWidgetItem(str(value))
+                item.setData(QtCore.Qt.UserRole, archive_id)
+                self.tasks_table.setItem(row_index, column, item)
+        self.page_label.setText(f"{self.page + 1}/{self.pages_count}")
+        self.previous_button.setEnabled(self.page > 0)
+        self.next_button.setEnabled(self.page < self.pages_count - 1)
+
+    def change_page(self, step: int):
+        """
+        метод для перехода на соседнюю страницу архива
+        """
+        self.page = max(0, min(self.pages_count - 1, self.page + step))
+        self.reload()
+
+    def restore_selected_task(self):
+        """
+        метод для возвращения выбранной задачи из архива
+        """
+        item = self.tasks_table.currentItem()
+        if item is None:
+            return
+        new_id = self.archive.restore_task(item.data(QtCore.Qt.UserRole))
+        if new_id is None:
+            QtWidgets.QMessageBox.warning(
+                self, "Unable to restore",
+                "Table of this task was deleted.",
+                QtWidgets.QMessageBox.Ok)
+            return
+        self.reload()
+        self.task_restored.emit(new_id)
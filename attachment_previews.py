@@ -0,0 +1,340 @@
+import codecs
+from collections import OrderedDict
+import hashlib
+import json
+import os
+from PyQt5 import QtCore, QtGui
+import re
+
+
+PDF_DICTIONARY = re.compile(rb"<<((?:(?!<<|>>).)*)>>", re.DOTALL)  # словарь без вложенных
+PDF_PAGES_TYPE = re.compile(rb"/Type\s*/Pages(?![^\s/<>\[\]()])")  # узел дерева страниц
+PDF_PAGES_COUNT = re.compile(rb"/Count\s+(\d+)")  # количество страниц узла
+PREVIEW_FORMAT = 2  # версия описаний файлов, описания другой версии создаются заново
+
+
+def get_pdf_pages(data: bytes):
+    """
+    функция для получения количества страниц pdf по корневому узлу дерева
+    страниц, возвращает None, если узел не найден: он может быть сжат
+    в потоке объектов или находиться в середине файла
+    args(
+        data: bytes - начало и конец файла
+    )
+    """
+    pages = None
+    for match in PDF_DICTIONARY.finditer(data):
+        dictionary = match.group(1)
+        # у промежуточных узлов есть /Parent, а /Count есть и у оглавления,
+        # при дописанных изменениях действует последний корневой узел
+        if PDF_PAGES_TYPE.search(dictionary) and b"/Parent" not in dictionary:
+            count = PDF_PAGES_COUNT.search(dictionary)
+            if count is not None:
+                pages = int(count.group(1))
+    return pages
+
+
+class PreviewCache:
+    """
+    Класс дискового кэша миниатюр и описаний файлов с ключом по хэшу
+    содержимого файла и ограничением суммарного размера
+    """
+
+    def __init__(self, directory: str, max_bytes=50 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get_paths(self, key: str):
+        """
+        метод для получения путей к миниатюре и описанию файла в кэше
+        """
+        base = os.path.join(self.directory, key)
+        return f"{base}.png", f"{base}.json"
+
+    def get(self, key: str):
+        """
+        метод для получения миниатюры и описания из кэша, возвращает None,
+        если их нет
+        """
+        image_path, metadata_path = self.get_paths(key)
+        try:
+            with open(metadata_path, "r", encoding="u8") as f:
+                metadata = json.load(f)
+            # обновление времени изменения для вытеснения давно неиспользуемых
+            os.utime(metadata_path)
+        except (OSError, ValueError):
+            return None
+        image = QtGui.QImage()
+        if os.path.exists(image_path):
+            image.load(image_path)
+        return image, metadata
+
+    def put(self, key: str, image: QtGui.QImage, metadata: dict):
+        """
+        метод для сохранения миниатюры и описания в кэш
+        """
+        image_path, metadata_path = self.get_paths(key)
+        if not image.isNull():
+            image.save(f"{image_path}.tmp", "PNG")
+            os.replace(f"{image_path}.tmp", image_path)
+        # описание записывается последним, так как по нему проверяется наличие
+        with open(f"{metadata_path}.tmp", "w", encoding="u8") as f:
+            json.dump(metadata, f)
+        os.replace(f"{metadata_path}.tmp", metadata_path)
+        self.evict()
+
+    def evict(self):
+        """
+        метод для удаления давно неиспользуемых записей при превышении
+        размера кэша
+        """
+        entries = {}
+        total_size = 0
+        for entry in os.scandir(self.directory):
+            key, _ = os.path.splitext(entry.name)
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            size, last_used = entries.get(key, (0, 0))
+            entries[key] = (size + stat.st_size, max(last_used, stat.st_mtime))
+            total_size += stat.st_size
+        for key, (size, _) in sorted(entries.items(), key=lambda el: el[1][1]):
+            if total_size <= self.max_bytes:
+                break
+            for path in self.get_paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total_size -= size
+
+
+class PreviewSignals(QtCore.QObject):
+    """
+    Класс сигналов для передачи готовых миниатюр из рабочих потоков
+    """
+    finished = QtCore.pyqtSignal(str, object, object)  # путь, QImage, описание
+
+
+class PreviewJob(QtCore.QRunnable):
+    """
+    Класс задачи рабочего потока для создания миниатюры и описания файла
+    """
+    THUMBNAIL_SIZE = 128  # максимальный размер стороны миниатюры
+    TEXT_PREVIEW_LINES = 8  # количество строк в миниатюре текстового файла
+    BLOCK_SIZE = 1024 * 1024  # размер блока, которыми читается файл
+    PREVIEW_BYTES = 64 * 1024  # байт начала и конца файла для описания
+
+    def __init__(self, file_path: str, cache: PreviewCache, signals: PreviewSignals):
+        super().__init__()
+        self.file_path = file_path
+        self.cache = cache
+        self.signals = signals
+
+    def run(self):
+        """
+        метод для создания миниатюры в рабочем потоке
+        """
+        try:
+            key, size, head, tail, lines = self.read_file()
+            cached = self.cache.get(key)
+            if cached is None:
+                image, metadata = self.create_preview(size, head, tail, lines)
+                try:
+                    self.cache.put(key, image, metadata)
+                except OSError:
+                    pass
+            else:
+                image, metadata = cached
+        except (OSError, MemoryError) as err:
+            image, metadata = QtGui.QImage(), {"error": str(err) or "not enough memory"}
+        self.signals.finished.emit(self.file_path, image, metadata)
+
+    def read_file(self):
+        """
+        метод для чтения файла блоками фиксированного размера, возвращает
+        хэш содержимого, размер файла, начало и конец файла и количество
+        строк, поэтому память не зависит от размера файла
+        """
+        # описания, созданные другой версией программы, не используются
+        digest = hashlib.sha256(f"preview-{PREVIEW_FORMAT}:".encode())
+        size = 0
+        newlines = 0
+        head = b""
+        tail = b""
+        with open(self.file_path, "rb") as f:
+            while True:
+                block = f.read(self.BLOCK_SIZE)
+                if not block:
+                    break
+                digest.update(block)
+                size += len(block)
+                newlines += block.count(b"\n")
+                if len(head) < self.PREVIEW_BYTES:
+                    head += block[:self.PREVIEW_BYTES - len(head)]
+                tail = (tail + block)[-self.PREVIEW_BYTES:]
+        # последняя строка без перевода строки тоже считается
+        lines = newlines + (not tail.endswith(b"\n") if size else 0)
+        return digest.hexdigest(), size, head, tail, lines
+
+    def create_preview(self, size: int, head: bytes, tail: bytes, lines: int):
+        """
+        метод для создания миниатюры и описания файла, изображение
+        декодируется сразу в размере миниатюры, для остальных файлов
+        используются только начало и конец файла
+        args(
+            size: int - размер файла в байтах,
+            head: bytes - начало файла,
+            tail: bytes - конец файла,
+            lines: int - количество строк файла
+        )
+        """
+        metadata = {"size": size, "kind": "file"}
+        extension = os.path.splitext(self.file_path)[1].lower()
+        reader = QtGui.QImageReader(self.file_path)
+        image_size = reader.size() if reader.canRead() else QtCore.QSize()
+        if image_size.isValid():
+            # изображения меньше миниатюры не увеличиваются
+            reader.setScaledSize(image_size.scaled(
+                min(image_size.width(), self.THUMBNAIL_SIZE),
+                min(image_size.height(), self.THUMBNAIL_SIZE),
+                QtCore.Qt.KeepAspectRatio))
+            image = reader.read()
+            if not image.isNull():
+                metadata["kind"] = "image"
+                metadata["width"] = image_size.width()
+                metadata["height"] = image_size.height()
+                return image, metadata
+        if extension == ".pdf" or head.startswith(b"%PDF"):
+            metadata["kind"] = "pdf"
+            metadata["pages"] = get_pdf_pages(head + tail)
+            image = self.render_text("PDF" if metadata["pages"] is None
+                                     else f"PDF\n{metadata['pages']} pages")
+            return image, metadata
+        if b"\0" in head:
+            return QtGui.QImage(), metadata
+        try:
+            # многобайтовый символ может быть разрезан на границе начала файла
+            text = codecs.getincrementaldecoder("u8")().decode(head, final=size <= len(head))
+        except UnicodeDecodeError:
+            return QtGui.QImage(), metadata
+        metadata["kind"] = "text"
+        metadata["lines"] = lines
+        image = self.render_text(
+            "\n".join(text.splitlines()[:self.TEXT_PREVIEW_LINES]))
+        return image, metadata
+
+    def render_text(self, text: str):
+        """
+        метод для отрисовки текста на миниатюре
+        """
+        image = QtGui.QImage(self.THUMBNAIL_SIZE, self.THUMBNAIL_SIZE,
+                             QtGui.QImage.Format_ARGB32)
+        image.fill(QtGui.QColor("white"))
+        painter = QtGui.QPainter(image)
+        font = painter.font()
+        font.setPixelSize(10)
+        painter.setFont(font)
+        painter.drawText(image.rect().adjusted(4, 4, -4, -4),
+                         QtCore.Qt.AlignLeft | QtCore.Qt.AlignTop, text)
+        painter.end()
+        return image
+
+
+class AttachmentPreviews(QtCore.QObject):
+    """
+    Класс для фонового создания миниатюр прикрепленных файлов
+    """
+    # сигнал с путем к файлу, миниатюрой QImage и словарем с описанием файла
+    preview_ready = QtCore.pyqtSignal(str, object, object)
+    MEMORY_CACHE_SIZE = 256  # количество миниатюр, хранящихся в памяти
+
+    def __init__(self, cache_directory=None, parent=None):
+        super().__init__(parent)
+        if cache_directory is None:
+            cache_directory = os.path.join(QtCore.QStandardPaths.writableLocation(
+                QtCore.QStandardPaths.CacheLocation), "previews")
+        self.cache = PreviewCache(cache_directory)
+        self.thread_pool = QtCore.QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(2)
+        self.signals = PreviewSignals(self)
+        self.signals.finished.connect(self.handle_preview)
+        # путь к файлу: (время изменения, миниатюра, описание) в порядке
+        # последнего использования
+        self.previews = OrderedDict()
+        self.pending = set()  # пути файлов, для которых создается миниатюра
+
+    def request(self, file_path: str):
+        """
+        метод для запроса миниатюры файла, готовая миниатюра из памяти
+        возвращается сразу, иначе она создается в рабочем потоке и передается
+        сигналом preview_ready
+        """
+        try:
+            modified = os.path.getmtime(file_path)
+        except OSError:
+            return None
+        preview = self.previews.get(file_path)
+        if preview is not None and preview[0] == modified:
+            self.previews.move_to_end(file_path)
+            return preview[1:]
+        if file_path not in self.pending:
+            self.pending.add(file_path)
+            self.thread_pool.start(PreviewJob(file_path, self.cache, self.signals))
+        return None
+
+    def handle_preview(self, file_path: str, image, metadata):
+        """
+        метод для сохранения готовой миниатюры в памяти и её передачи
+        """
+        self.pending.discard(file_path)
+        try:
+            modified = os.path.getmtime(file_path)
+        except OSError:
+            modified = None
+        self.previews.pop(file_path, None)
+        if len(self.previews) >= self.MEMORY_CACHE_SIZE:
+            # вытесняется давно не использованная миниатюра
+            self.previews.popitem(last=False)
+        self.previews[file_path] = (modified, image, metadata)
+        self.preview_ready.emit(file_path, image, metadata)
+
+    def stop(self):
+        """
+        метод для отмены ожидающих задач и завершения рабочих потоков
+        """
+        self.thread_pool.clear()
+        self.thread_pool.waitForDone()
+
+
+def describe_preview(metadata: dict):
+    """
+    функция для получения текстового описания файла по словарю с описанием
+    """
+    if "error" in metadata:
+        return metadata["error"]
+    size = metadata["size"]
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            break
+        size /= 1024
+    else:
+        unit = "GB"
+    description = f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+    if metadata["kind"] == "image":
+        description += f", {metadata['width']}x{metadata['height']}"
+    elif metadata["kind"] == "pdf" and metadata["pages"] is not None:
+        description += f", {metadata['pages']} pages"
+    elif metadata["kind"] == "text":
+        description += f", {metadata['lines']} lines"
+    return description
+
+
+def open_file(file_path: str):
+    """
+    функция для открытия файла в программе по умолчанию на любой платформе,
+    возвращает False, если файл не удалось открыть
+    """
+    return QtGui.QDesktopServices.openUrl(QtCore.QUrl.fromLocalFile(file_path))
@@ -0,0 +1,131 @@
+from PyQt5 import QtWidgets, QtCore
+
+
+class BoardView(QtWidgets.QScrollArea):
+    """
+    Класс горизонтально прокручиваемой доски, которая размещает колонки по
+    порядку и сообщает, какие из них видны, колонки растягиваются на всю
+    ширину окна, пока помещаются в него
+    """
+    visible_columns_changed = QtCore.pyqtSignal()  # сигнал изменения видимых колонок
+    MIN_COLUMN_WIDTH = 200  # минимальная ширина колонки
+    OVERSCAN = 1  # количество колонок, создаваемых за каждым краем окна
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.columns_ids = []  # id лэйаутов колонок в порядке отображения
+        self.positions = {}  # id лэйаута: порядковый номер колонки
+        self.column_widgets = {}  # id лэйаута: размещенный виджет колонки
+        self.visible_ids = []  # id лэйаутов колонок, которые нужно создать
+        self.inner = QtWidgets.QWidget()
+        self.inner.installEventFilter(self)
+        self.setWidget(self.inner)
+        self.setWidgetResizable(True)
+        self.setFrameShape(QtWidgets.QFrame.NoFrame)
+        self.setVerticalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
+        self.horizontalScrollBar().valueChanged.connect(
+            self.update_visible_columns)
+
+    def set_columns(self, columns_ids: list):
+        """
+        метод для задания порядка колонок, видимые колонки пересчитываются
+        без сигнала, так как их создает вызывающий код
+        """
+        # изменение ширины доски сразу вызывает событие изменения размера
+        blocked = self.blockSignals(True)
+        self.columns_ids = list(columns_ids)
+        self.positions = {layout_id: index
+                          for index, layout_id in enumerate(self.columns_ids)}
+        self.inner.setMinimumWidth(
+            len(self.columns_ids) * self.MIN_COLUMN_WIDTH)
+        self.relayout()
+        self.visible_ids = self.get_visible_ids()
+        self.blockSignals(blocked)
+
+    def get_column_width(self):
+        """
+        метод для получения ширины одной колонки
+        """
+        return max(self.MIN_COLUMN_WIDTH,
+                   self.inner.width() // max(1, len(self.columns_ids)))
+
+    def get_visible_ids(self):
+        """
+        метод для получения id лэйаутов колонок, попадающих в окно,
+        с запасом в несколько колонок с каждой стороны
+        """
+        width = self.get_column_width()
+        offset = self.horizontalScrollBar().value()
+        first = max(0, offset // width - self.OVERSCAN)
+        last = (offset + self.viewport().width()) // width + self.OVERSCAN
+        return self.columns_ids[first:last + 1]
+
+    def update_visible_columns(self):
+        """
+        метод для отправки сигнала, если набор видимых колонок изменился
+        """
+        visible_ids = self.get_visible_ids()
+        if visible_ids != self.visible_ids:
+            self.visible_ids = visible_ids
+            self.visible_columns_changed.emit()
+
+    def place_column(self, layout_id: int, widget: QtWidgets.QWidget):
+        """
+        метод для размещения виджета колонки на её месте доски
+        """
+        widget.setParent(self.inner)
+        self.column_widgets[layout_id] = widget
+        self.move_column(layout_id)
+        widget.show()
+
+    def take_column(self, layout_id: int):
+        """
+        метод для извлечения виджета колонки с доски
+        """
+        return self.column_widgets.pop(layout_id)
+
+    def move_column(self, layout_id: int):
+        """
+        метод для установки положения и размера виджета колонки
+        """
+        width = self.get_column_width()
+        self.column_widgets[layout_id].setGeometry(
+            self.positions[layout_id] * width, 0, width, self.inner.height())
+
+    def relayout(self):
+        """
+        метод для перестановки всех размещенных колонок
+        """
+        for layout_id in self.column_widgets:
+            if layout_id in self.positions:
+                self.move_column(layout_id)
+
+    def ensure_column_visible(self, layout_id: int):
+        """
+        метод для прокрутки доски к заданной колонке
+        """
+        if layout_id not in self.positions:
+            return
+        width = self.get_column_width()
+        left = self.positions[layout_id] * width
+        scroll_bar = self.horizontalScrollBar()
+        if left < scroll_bar.value():
+            scroll_bar.setValue(left)
+        elif left + width > scroll_bar.value() + self.viewport().width():
+            scroll_bar.setValue(left + width - self.viewport().width())
+
+    def eventFilter(self, obj, event):
+        """
+        метод для перестановки колонок при изменении размера доски
+        """
+        if obj is self.inner and event.type() == QtCore.QEvent.Resize:
+            self.relayout()
+            self.update_visible_columns()
+        return False
+
+    def resizeEvent(self, event):
+        """
+        метод для пересчета видимых колонок при изменении размера окна
+        """
+        super().resizeEvent(event)
+        self.update_visible_columns()
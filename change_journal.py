@@ -0,0 +1,315 @@
+import json
+import time
+
+# текущее время в секундах с дробной частью для запросов и триггеров
+NOW = "((julianday('now') - 2440587.5) * 86400.0)"
+# столбцы, которые триггеры записывают в журнал для каждой таблицы
+TASK_FIELDS = ("id", "comment", "color", "attachments", "table_id", "layout_id",
+               "done_at", "checklist_done", "checklist_total", "deadline_date",
+               "file_path", "created_at")
+TABLE_FIELDS = ("id", "title")
+COLUMN_FIELDS = ("table_id", "layout_id", "title")
+# таблица: (сущность, id сущности, id лэйаута, столбцы строки)
+JOURNALED_TABLES = {
+    "tasks": ("task", "{row}.id", "NULL", TASK_FIELDS),
+    "tables": ("table", "{row}.id", "NULL", TABLE_FIELDS),
+    "columns": ("column", "{row}.table_id", "{row}.layout_id", COLUMN_FIELDS),
+}
+# триггеры журнала изменений предыдущих версий программы
+LEGACY_TRIGGERS = ("log_task_insert", "log_task_update", "log_task_delete",
+                   "log_table_insert", "log_table_update", "log_table_delete",
+                   "log_column_insert", "log_column_update", "log_column_delete")
+
+
+def get_row_json(fields: tuple, row: str):
+    """
+    функция для получения выражения json со всеми столбцами строки триггера
+    """
+    return "json_object({})".format(", ".join(
+        f"'{field}', {row}.{field}" for field in fields))
+
+
+def get_changed_fields(fields: tuple):
+    """
+    функция для получения выражения со списком столбцов через запятую,
+    которые изменились при обновлении строки
+    """
+    return "rtrim({}, ',')".format(" || ".join(
+        f"CASE WHEN OLD.{field} IS NOT NEW.{field} THEN '{field},' ELSE '' END"
+        for field in fields))
+
+
+def rows_to_dicts(cursor, rows):
+    """
+    функция для преобразования строк результата запроса в словари
+    """
+    names = [column[0] for column in cursor.description]
+    return [dict(zip(names, row)) for row in rows]
+
+
+class ChangeJournal:
+    """
+    Класс журнала изменений задач, таблиц и колонок: триггеры дописывают
+    в журнал новую версию строки в той же транзакции, что и само изменение,
+    поэтому изменения после версии N читаются одним запросом по диапазону
+    первичного ключа. Сжатие оставляет только последнюю запись каждой строки,
+    так что начало журнала становится снимком данных, а поверх него идут
+    недавние изменения. Для обновления записывается список изменившихся
+    столбцов, а записи, внесенные синхронизацией, помечаются источником
+    """
+    KEEP_VERSIONS = 10000  # количество последних записей, которые не сжимаются
+    TOMBSTONE_DAYS = 30  # сколько дней хранятся записи об удалении
+    COMPACT_BATCH = 5000  # количество записей, сжимаемых за один шаг
+
+    def __init__(self, db_connection, create=True):
+        """
+        args(
+            db_connection: sqlite3.Connection - подключение к базе данных,
+            create: bool - нужно ли создать журнал и пересоздать его триггеры,
+                           подключения, открытые рядом с главным окном,
+                           используют уже созданный им журнал
+        )
+        """
+        self.db_connection = db_connection
+        self.db_cursor = self.db_connection.cursor()
+        self.compact_position = None  # последняя сжатая версия или None
+        self.compact_cutoff = None  # версия, до которой идет текущее сжатие
+        if create:
+            self.create_journal()
+
+    def create_journal(self):
+        """
+        метод для создания журнала и его триггеров, журнал предыдущих версий
+        программы содержал только id задач и удаляется
+        """
+        for trigger in LEGACY_TRIGGERS:
+            self.db_cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        self.db_cursor.execute("DROP TABLE IF EXISTS tasks_changes")
+        self.db_cursor.executescript("""
+            CREATE TABLE IF NOT EXISTS journal(
+                version INTEGER PRIMARY KEY AUTOINCREMENT,
+                entity TEXT,
+                entity_id INTEGER,
+                layout_id INTEGER,
+                operation TEXT,
+                data TEXT,
+                fields TEXT,
+                changed_at REAL,
+                origin TEXT);
+            CREATE INDEX IF NOT EXISTS journal_entity
+                ON journal(entity, entity_id, layout_id, version);
+            CREATE TABLE IF NOT EXISTS journal_state(
+                key TEXT PRIMARY KEY,
+                value INTEGER);""")
+        # журнал, созданный предыдущей версией программы
+        existing_columns = {row[1] for row in self.db_cursor.execute(
+            "PRAGMA table_info(journal)")}
+        for column in ("fields", "origin"):
+            if column not in existing_columns:
+                self.db_cursor.execute(f"ALTER TABLE journal ADD COLUMN {column} TEXT")
+        # триггеры создаются заново, чтобы их текст соответствовал версии программы
+        for table, (entity, entity_id, layout_id, fields) in JOURNALED_TABLES.items():
+            for operation, row in (("insert", "NEW"), ("update", "NEW"),
+                                   ("delete", "OLD")):
+                changed_fields = (get_changed_fields(fields)
+                                  if operation == "update" else "NULL")
+                self.db_cursor.execute(
+                    f"DROP TRIGGER IF EXISTS journal_{entity}_{operation}")
+                self.db_cursor.execute(f"""CREATE TRIGGER
+                    journal_{entity}_{operation} AFTER {operation.upper()} ON {table}
+                    BEGIN
+                        INSERT INTO journal(entity, entity_id, layout_id,
+                            operation, data, fields, changed_at)
+                        VALUES ('{entity}', {entity_id.format(row=row)},
+                            {layout_id.format(row=row)}, '{operation}',
+                            {get_row_json(fields, row)}, {changed_fields}, {NOW});
+                    END""")
+        # задача с новым id для читателей журнала удаляется под старым id
+        self.db_cursor.execute("DROP TRIGGER IF EXISTS journal_task_rekey")
+        self.db_cursor.execute(f"""CREATE TRIGGER journal_task_rekey
+            AFTER UPDATE OF id ON tasks WHEN OLD.id IS NOT NEW.id
+            BEGIN
+                INSERT INTO journal(entity, entity_id, operation, data, changed_at)
+                VALUES ('task', OLD.id, 'delete',
+                    {get_row_json(TASK_FIELDS, "OLD")}, {NOW});
+            END""")
+        self.db_connection.commit()
+
+    @staticmethod
+    def get_last_version(cursor):
+        """
+        метод для получения номера последней записи журнала
+        """
+        return cursor.execute(
+            "SELECT COALESCE(MAX(version), 0) FROM journal").fetchone()[0]
+
+    @staticmethod
+    def get_floor(cursor):
+        """
+        метод для получения версии, начиная с которой журнал полон: клиент
+        с меньшей версией мог пропустить удаления и должен получить снимок
+        """
+        row = cursor.execute(
+            "SELECT value FROM journal_state WHERE key = 'floor'").fetchone()
+        return 0 if row is None else row[0]
+
+    @classmethod
+    def get_changes_since(cls, cursor, version: int, limit=1000):
+        """
+        метод для получения изменений после заданной версии, возвращает
+        None, если клиенту нужен снимок данных
+        args(
+            cursor: sqlite3.Cursor - курсор любого подключения к базе данных,
+            version: int - последняя версия, известная клиенту,
+            limit: int - максимальное количество записей за один запрос
+        )
+        """
+        if version < cls.get_floor(cursor):
+            return None
+        return cls.read_changes(cursor, "version > ?", (version,), limit)
+
+    @staticmethod
+    def read_changes(cursor, condition: str, params: tuple, limit: int):
+        """
+        метод для чтения записей журнала по условию в порядке версий
+        с разбором данных строк и списков изменившихся столбцов
+        """
+        cursor.execute(f"""SELECT version, entity, entity_id, layout_id,
+            operation, data, fields, changed_at, origin FROM journal
+            WHERE {condition} ORDER BY version LIMIT ?""", (*params, limit))
+        changes = rows_to_dicts(cursor, cursor.fetchall())
+        for change in changes:
+            if change["data"] is not None:
+                change["data"] = json.loads(change["data"])
+            # None означает, что изменились все столбцы строки
+            if change["fields"] is not None:
+                change["fields"] = [field for field in change["fields"].split(",")
+                                    if field]
+        return changes
+
+    @classmethod
+    def get_snapshot(cls, cursor):
+        """
+        метод для получения всех таблиц, колонок и задач вместе с версией
+        журнала, которой они соответствуют, данные читаются в одной транзакции
+        args(
+            cursor: sqlite3.Cursor - курсор подключения без открытой транзакции
+        )
+        """
+        cursor.execute("BEGIN")
+        try:
+            snapshot = {"version": cls.get_last_version(cursor)}
+            for table in JOURNALED_TABLES:
+                cursor.execute(f"SELECT * FROM {table}")
+                snapshot[table] = rows_to_dicts(cursor, cursor.fetchall())
+        finally:
+            cursor.execute("ROLLBACK")
+        return snapshot
+
+    def compact_slice(self):
+        """
+        метод для сжатия небольшой части журнала: удаляются записи, после
+        которых в журнале есть более новая запись той же строки, в конце
+        удаляются старые записи об удалении, возвращает True, если сжатие
+        завершено
+        """
+        if self.compact_position is None:
+            self.compact_position = 0
+            self.compact_cutoff = (self.get_last_version(self.db_cursor)
+                                   - self.KEEP_VERSIONS)
+        if self.compact_position < self.compact_cutoff:
+            end = min(self.compact_position + self.COMPACT_BATCH,
+                      self.compact_cutoff)
+            # последняя запись строки заменяет удаленные, поэтому считается
+            # изменением всех столбцов, даже если она вне сжимаемой части
+            self.db_cursor.execute("""UPDATE journal SET fields = NULL
+                WHERE fields IS NOT NULL AND EXISTS (
+                    SELECT 1 FROM journal AS earlier
+                    WHERE earlier.entity = journal.entity
+                    AND earlier.entity_id = journal.entity_id
+                    AND earlier.layout_id IS journal.layout_id
+                    AND earlier.version > ? AND earlier.version <= ?)
+                AND NOT EXISTS (
+                    SELECT 1 FROM journal AS later
+                    WHERE later.entity = journal.entity
+                    AND later.entity_id = journal.entity_id
+                    AND later.layout_id IS journal.layout_id
+                    AND later.version > journal.version)""",
+                                   (self.compact_position, end))
+            self.db_cursor.execute("""DELETE FROM journal
+                WHERE version > ? AND version <= ? AND EXISTS (
+                    SELECT 1 FROM journal AS later
+                    WHERE later.entity = journal.entity
+                    AND later.entity_id = journal.entity_id
+                    AND later.layout_id IS journal.layout_id
+                    AND later.version > journal.version)""",
+                                   (self.compact_position, end))
+            self.db_connection.commit()
+            self.compact_position = end
+            return False
+        self.drop_tombstones(self.compact_cutoff)
+        self.compact_position = None
+        return True
+
+    def drop_tombstones(self, cutoff: int):
+        """
+        метод для удаления старых записей об удалении, клиенты с версией
+        меньше последней удаленной записи получат снимок данных
+        """
+        condition = """version <= ? AND operation = 'delete'
+            AND changed_at < ?"""
+        params = (cutoff, time.time() - self.TOMBSTONE_DAYS * 86400)
+        floor = self.db_cursor.execute(
+            f"SELECT MAX(version) FROM journal WHERE {condition}", params).fetchone()[0]
+        if floor is None:
+            return
+        self.db_cursor.execute(f"DELETE FROM journal WHERE {condition}", params)
+        self.set_floor(floor)
+        self.db_connection.commit()
+
+    def set_floor(self, version: int):
+        """
+        метод для сдвига версии, начиная с которой журнал полон
+        """
+        self.db_cursor.execute("""INSERT INTO journal_state(key, value)
+            VALUES ('floor', ?) ON CONFLICT(key)
+            DO UPDATE SET value = MAX(value, excluded.value)""", (version,))
+
+    def record_restore(self, last_version, tasks_ids):
+        """
+        метод для записи в журнал восстановления базы данных из снимка:
+        номера записей продолжаются с номера до восстановления, все строки
+        записываются заново, а клиенты с более старой версией получат снимок
+        args(
+            last_version: int - номер последней записи до восстановления или None,
+            tasks_ids: set - id задач до и после восстановления
+        )
+        """
+        # иначе экземпляры приложения пропустят изменения с меньшими номерами
+        if last_version is not None:
+            self.db_cursor.execute("""UPDATE sqlite_sequence SET seq = MAX(seq, ?)
+                WHERE name = 'journal'""", (last_version,))
+            if not self.db_cursor.rowcount:
+                self.db_cursor.execute("""INSERT INTO sqlite_sequence(name, seq)
+                    VALUES ('journal', ?)""", (last_version,))
+        self.rejournal_rows()
+        existing_ids = {row[0] for row in self.db_cursor.execute("SELECT id FROM tasks")}
+        self.db_cursor.executemany("""INSERT INTO journal(entity, entity_id,
+            operation, changed_at) VALUES ('task', ?, 'delete', ?)""",
+                                   [(task_id, time.time())
+                                    for task_id in sorted(tasks_ids - existing_ids)])
+        self.set_floor(self.get_last_version(self.db_cursor))
+        self.db_connection.commit()
+
+    def rejournal_rows(self):
+        """
+        метод для записи в журнал текущего состояния всех строк, записи
+        считаются изменением всех столбцов
+        """
+        start = self.get_last_version(self.db_cursor)
+        # пустые изменения срабатывают триггерами журнала для каждой строки
+        for table in JOURNALED_TABLES:
+            column = "layout_id" if table == "columns" else "id"
+            self.db_cursor.execute(f"UPDATE {table} SET {column} = {column}")
+        self.db_cursor.execute(
+            "UPDATE journal SET fields = NULL WHERE version > ?", (start,))
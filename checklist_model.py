@@ -0,0 +1,105 @@
+from PyQt5 import QtCore
+
+
+class ChecklistModel(QtCore.QAbstractListModel):
+    """
+    Класс модели чеклиста, пункты которого редактируются прямо в списке
+    """
+
+    def __init__(self, checklist=None, parent=None):
+        """
+        args(
+            checklist: list - список вида [(str, bool), (str, bool)] или None,
+            parent: QtCore.QObject - родитель модели
+        )
+        """
+        super().__init__(parent)
+        self.set_checklist(checklist)
+
+    def set_checklist(self, checklist):
+        """
+        метод для загрузки чеклиста задачи в модель
+        """
+        self.beginResetModel()
+        self.original_checklist = checklist
+        self.items = [[text, bool(checked)] for text, checked in checklist or ()]
+        self.changed = False  # был ли изменен чеклист после загрузки
+        self.endResetModel()
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        """
+        метод для получения количества пунктов чеклиста
+        """
+        return 0 if parent.isValid() else len(self.items)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        """
+        метод для получения текста и состояния пункта чеклиста
+        """
+        if not index.isValid():
+            return None
+        text, checked = self.items[index.row()]
+        if role in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole):
+            return text
+        if role == QtCore.Qt.CheckStateRole:
+            return QtCore.Qt.Checked if checked else QtCore.Qt.Unchecked
+        return None
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        """
+        метод для изменения текста или состояния пункта чеклиста
+        """
+        if not index.isValid():
+            return False
+        item = self.items[index.row()]
+        if role == QtCore.Qt.EditRole and value and value != item[0]:
+            item[0] = value
+        elif role == QtCore.Qt.CheckStateRole:
+            item[1] = value == QtCore.Qt.Checked
+        else:
+            return False
+        self.changed = True
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def flags(self, index):
+        """
+        метод для получения флагов пункта чеклиста
+        """
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        return (QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+                | QtCore.Qt.ItemIsEditable | QtCore.Qt.ItemIsUserCheckable)
+
+    def add_items(self, lines):
+        """
+        метод для добавления нескольких пунктов чеклиста одной вставкой
+        """
+        lines = [line.strip() for line in lines if line.strip()]
+        if not lines:
+            return
+        start = len(self.items)
+        self.beginInsertRows(QtCore.QModelIndex(), start, start + len(lines) - 1)
+        self.items.extend([line, False] for line in lines)
+        self.endInsertRows()
+        self.changed = True
+
+    def remove_rows(self, rows):
+        """
+        метод для удаления пунктов чеклиста с заданными номерами
+        """
+        # удаление с конца, чтобы номера оставшихся строк не сдвигались
+        for row in sorted(set(rows), reverse=True):
+            self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+            del self.items[row]
+            self.endRemoveRows()
+            self.changed = True
+
+    def get_checklist(self):
+        """
+        метод для получения чеклиста, неизмененный чеклист возвращается без
+        повторной сборки
+        """
+        if not self.changed and self.original_checklist is not None:
+            return self.original_checklist
+        return [(text, checked) for text, checked in self.items]
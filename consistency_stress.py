@@ -0,0 +1,295 @@
+import argparse
+import json
+import os
+from PyQt5 import QtWidgets, QtCore, sip
+import random
+import sys
+import tempfile
+import time
+from unittest import mock
+from task_widget import TaskWidget
+
+OPERATIONS = ("add", "drag", "move_selected", "pin", "unpin", "delete",
+              "delete_pinned", "load_table", "scroll")  # операции нагрузочной проверки
+
+
+def get_pinned_widgets():
+    """
+    функция для получения открытых окон закрепленных задач
+    """
+    return [widget for widget in QtWidgets.QApplication.topLevelWidgets()
+            if isinstance(widget, TaskWidget) and not sip.isdeleted(widget)
+            and widget.isVisible()]
+
+
+def check_consistency(window):
+    """
+    функция для сверки виджетов колонок, списка закрепленных задач и строк
+    таблицы tasks, возвращает список найденных расхождений
+    """
+    problems = []
+    rows = {task_id: (table_id, layout_id) for task_id, table_id, layout_id
+            in window.db_cursor.execute("SELECT id, table_id, layout_id FROM tasks")}
+    pinned_ids = window.pinned_tasks_ids
+    if len(set(pinned_ids)) != len(pinned_ids):
+        problems.append(f"duplicate pinned ids: {pinned_ids}")
+    shown_ids = set()
+    for layout_id, layout in window.scroll_layouts.items():
+        widgets_ids = set()
+        for index in range(layout.count()):
+            widget = layout.itemAt(index).widget()
+            task_id = widget.get_id()
+            if task_id in shown_ids or task_id in widgets_ids:
+                problems.append(f"task {task_id} is shown twice")
+            widgets_ids.add(task_id)
+            if widget.layout_id != layout_id:
+                problems.append(f"task {task_id} is in column {layout_id}, "
+                                f"but its record says {widget.layout_id}")
+            if rows.get(task_id) != (window.current_table_id, layout_id):
+                problems.append(f"task {task_id} is in column {layout_id}, "
+                                f"but its row is {rows.get(task_id)}")
+        expected_ids = {task_id for task_id, row in rows.items()
+                        if row == (window.current_table_id, layout_id)}
+        expected_ids.difference_update(pinned_ids)
+        for task_id in sorted(expected_ids - widgets_ids):
+            problems.append(f"task {task_id} of column {layout_id} has no widget")
+        shown_ids.update(widgets_ids)
+    pinned_windows_ids = [widget.get_id() for widget in get_pinned_widgets()]
+    if sorted(pinned_windows_ids) != sorted(pinned_ids):
+        problems.append(f"pinned ids {sorted(pinned_ids)} do not match "
+                        f"pinned windows {sorted(pinned_windows_ids)}")
+    for task_id in pinned_ids:
+        if task_id in shown_ids:
+            problems.append(f"pinned task {task_id} is also shown in a column")
+        if task_id not in rows:
+            problems.append(f"pinned task {task_id} has no row")
+    return problems
+
+
+class StressOperations:
+    """
+    Класс операций, которые выполняются теми же методами главного окна,
+    что и действия пользователя, операция возвращает False, если её
+    нельзя выполнить в текущем состоянии доски
+    """
+
+    def __init__(self, window, tables_ids: list, rng: random.Random):
+        self.window = window
+        self.tables_ids = tables_ids
+        self.rng = rng
+
+    def get_random_widget(self):
+        """
+        метод для выбора случайного виджета задачи в созданных колонках
+        """
+        layouts = [layout for layout in self.window.scroll_layouts.values()
+                   if layout.count()]
+        if not layouts:
+            return None
+        layout = self.rng.choice(layouts)
+        return layout.itemAt(self.rng.randrange(layout.count())).widget()
+
+    def get_random_column(self, exclude=None):
+        """
+        метод для выбора случайной созданной колонки
+        """
+        layouts_ids = [layout_id for layout_id in self.window.scroll_layouts
+                       if layout_id != exclude]
+        return self.rng.choice(layouts_ids) if layouts_ids else None
+
+    def add(self):
+        # колонка может быть за пределами окна, тогда задача только сохраняется
+        layout_id = self.rng.choice(self.window.columns)[0]
+        self.window.add_task(f"stress task {self.rng.random():.6f}",
+                             target_layout_id=layout_id,
+                             parent=self.window.centralwidget)
+        return True
+
+    def drag(self):
+        widget = self.get_random_widget()
+        if widget is None:
+            return False
+        target_id = self.get_random_column(exclude=widget.layout_id)
+        if target_id is None:
+            return False
+        # то же, что делает dropEvent колонки с данными перетаскиваемой задачи
+        groupbox = self.window.groupboxes[target_id]
+        groupbox.task_data = json.loads(widget.main_text_label.get_data())
+        groupbox.item_added.emit()
+        return True
+
+    def move_selected(self):
+        widget = self.get_random_widget()
+        if widget is None:
+            return False
+        layout = self.window.scroll_layouts[widget.layout_id]
+        self.window.task_selection.clear()
+        for index in self.rng.sample(range(layout.count()),
+                                     min(layout.count(), self.rng.randint(2, 20))):
+            self.window.task_selection.select(layout.itemAt(index).widget())
+        target_id = self.get_random_column()
+        if target_id is None:
+            return False
+        self.window.move_selected_tasks(target_id)
+        self.window.task_selection.clear()
+        return True
+
+    def pin(self):
+        widget = self.get_random_widget()
+        if widget is None:
+            return False
+        self.window.configure_task(widget)
+        self.window.pin_active_task(widget.get_id())
+        return True
+
+    def unpin(self):
+        widgets = get_pinned_widgets()
+        if not widgets:
+            return False
+        self.rng.choice(widgets).close()
+        return True
+
+    def delete(self):
+        return self.delete_widget(self.get_random_widget())
+
+    def delete_pinned(self):
+        widgets = get_pinned_widgets()
+        return self.delete_widget(self.rng.choice(widgets) if widgets else None)
+
+    def delete_widget(self, widget):
+        """
+        метод для удаления задачи через диалог задачи с подтверждением
+        """
+        if widget is None:
+            return False
+        self.window.configure_task(widget)
+        with mock.patch.object(QtWidgets.QMessageBox, "warning",
+                               return_value=QtWidgets.QMessageBox.Ok):
+            self.window.delete_task(widget.get_id())
+        return True
+
+    def load_table(self):
+        self.window.load_table(self.rng.choice(self.tables_ids))
+        return True
+
+    def scroll(self):
+        scroll_bar = self.window.board_view.horizontalScrollBar()
+        scroll_bar.setValue(self.rng.randint(0, scroll_bar.maximum()))
+        return True
+
+
+def fill_database(window, tables_count: int, columns_count: int,
+                  tasks_per_table: int):
+    """
+    функция для создания таблиц с заданным количеством колонок и задач,
+    возвращает список id таблиц
+    """
+    cursor = window.db_cursor
+    cursor.executemany("INSERT INTO tables(title) VALUES (?)",
+                       [(f"stress {index}",) for index in range(1, tables_count)])
+    tables_ids = [row[0] for row in cursor.execute("SELECT id FROM tables ORDER BY id")]
+    default_count = len(window.DEFAULT_COLUMNS)
+    # стандартные колонки создаются триггером вместе с таблицей
+    cursor.executemany("INSERT INTO columns(table_id, layout_id, title) VALUES (?, ?, ?)",
+                       [(table_id, layout_id, f"Column {layout_id}")
+                        for table_id in tables_ids
+                        for layout_id in range(default_count, columns_count)])
+    cursor.executemany("""INSERT INTO tasks (id, comment, color, table_id, layout_id)
+        VALUES (?, ?, ?, ?, ?)""",
+                       [(index, f"task {index}", "#8cff7a",
+                         tables_ids[index % tables_count],
+                         index // tables_count % max(columns_count, default_count))
+                        for index in range(tables_count * tasks_per_table)])
+    window.db_connection.commit()
+    TaskWidget.set_start_id(tables_count * tasks_per_table)
+    return tables_ids
+
+
+def run_consistency_stress(steps=5000, tables_count=3, columns_count=8,
+                           tasks_per_table=1000, seed=0, check_every=1):
+    """
+    функция для выполнения случайной последовательности перетаскиваний,
+    закреплений, удалений и переключений таблиц на большой доске со сверкой
+    доски и базы данных после каждого шага, возвращает True, если
+    расхождений не найдено
+    """
+    from manager import MainWindow
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as directory:
+        window = MainWindow(os.path.join(directory, "stress.db"), "logo.png")
+        # колонки создаются только в видимой части доски
+        window.resize(1000, 600)
+        window.show()
+        tables_ids = fill_database(window, tables_count, columns_count,
+                                   tasks_per_table)
+        window.load_table(tables_ids[0], cache_current=False)
+        operations = StressOperations(window, tables_ids, rng)
+        timings = {name: [] for name in OPERATIONS}
+        state = {"step": 0, "problems": []}
+
+        # операции выполняются из цикла событий, как при работе пользователя,
+        # чтобы отложенное удаление виджетов шло обычным путем
+        def run_step():
+            state["step"] += 1
+            name = rng.choice(OPERATIONS)
+            started = time.perf_counter()
+            done = getattr(operations, name)()
+            if done:
+                timings[name].append(time.perf_counter() - started)
+            if done and state["step"] % check_every == 0 or state["step"] == steps:
+                problems = check_consistency(window)
+                if problems:
+                    state["problems"] = [f"step {state['step']} ({name}): {problem}"
+                                         for problem in problems]
+            if state["step"] == steps or state["problems"]:
+                timer.stop()
+                app.quit()
+
+        timer = QtCore.QTimer()
+        timer.timeout.connect(run_step)
+        started = time.perf_counter()
+        timer.start(0)
+        app.exec()
+        print(f"{state['step']} steps in {time.perf_counter() - started:.1f} s")
+        print(get_timings_report(timings))
+        for problem in state["problems"][:20]:
+            print(problem)
+        for widget in get_pinned_widgets():
+            widget.close()
+        window.close()
+    return not state["problems"]
+
+
+def get_timings_report(timings: dict):
+    """
+    функция для получения отчета о времени операций: количество, среднее,
+    95-й процентиль и максимум в миллисекундах
+    """
+    lines = [f"{'operation':<14}{'count':>7}{'mean':>9}{'p95':>9}{'max':>9}"]
+    for name, values in timings.items():
+        if not values:
+            lines.append(f"{name:<14}{0:>7}")
+            continue
+        values = sorted(values)
+        p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+        lines.append(f"{name:<14}{len(values):>7}"
+                     f"{sum(values) / len(values) * 1000:>9.2f}"
+                     f"{p95 * 1000:>9.2f}{values[-1] * 1000:>9.2f}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Randomized check that board widgets, pinned tasks "
+                    "and database rows stay consistent")
+    parser.add_argument("--steps", type=int, default=5000)
+    parser.add_argument("--tables", type=int, default=3)
+    parser.add_argument("--columns", type=int, default=8)
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--check-every", type=int, default=1)
+    args = parser.parse_args()
+    sys.exit(0 if run_consistency_stress(args.steps, args.tables, args.columns,
+                                         args.tasks, args.seed,
+                                         args.check_every) else 1)
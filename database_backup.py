@@ -0,0 +1,194 @@
+import datetime
+import os
+from PyQt5 import QtCore
+import sqlite3
+
+
+class BackupSignals(QtCore.QObject):
+    """
+    Класс сигналов для передачи результата резервного копирования из
+    рабочего потока
+    """
+    finished = QtCore.pyqtSignal(str)  # путь к созданному снимку
+    failed = QtCore.pyqtSignal(str)  # текст ошибки
+
+
+class BackupJob(QtCore.QRunnable):
+    """
+    Класс задачи рабочего потока для копирования работающей базы данных
+    """
+    PAGES_PER_STEP = 64  # количество страниц, копируемых за один шаг
+    STEP_PAUSE = 0.01  # пауза между шагами в секундах
+
+    def __init__(self, db_name: str, snapshot_path: str, signals: BackupSignals):
+        super().__init__()
+        self.db_name = db_name
+        self.snapshot_path = snapshot_path
+        self.signals = signals
+
+    def run(self):
+        """
+        метод для копирования базы данных в снимок небольшими порциями страниц,
+        в режиме WAL чтение копии не блокирует запись в базу данных
+        """
+        temp_path = f"{self.snapshot_path}.tmp"
+        try:
+            source = sqlite3.connect(self.db_name)
+            target = sqlite3.connect(temp_path)
+            try:
+                source.backup(target, pages=self.PAGES_PER_STEP,
+                              sleep=self.STEP_PAUSE)
+            finally:
+                target.close()
+                source.close()
+            # недописанный снимок никогда не попадает в список снимков
+            os.replace(temp_path, self.snapshot_path)
+        except (sqlite3.Error, OSError) as err:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            self.signals.failed.emit(str(err))
+        else:
+            self.signals.finished.emit(self.snapshot_path)
+
+
+class DatabaseBackup(QtCore.QObject):
+    """
+    Класс для создания снимков базы данных в фоне, их ротации
+    и восстановления базы данных из снимка
+    """
+    backup_finished = QtCore.pyqtSignal(str)  # путь к созданному снимку
+    backup_failed = QtCore.pyqtSignal(str)  # текст ошибки
+    TIME_FORMAT = "%Y%m%d-%H%M%S"  # формат времени в названии снимка
+
+    def __init__(self, db_name: str, directory=None, parent=None):
+        """
+        args(
+            db_name: str - путь к базе данных,
+            directory: str - папка для снимков, по умолчанию backups рядом
+                             с базой данных,
+            parent: QtCore.QObject - родитель объекта
+        )
+        """
+        super().__init__(parent)
+        self.db_name = db_name
+        if directory is None:
+            directory = os.path.join(
+                os.path.dirname(os.path.abspath(db_name)), "backups")
+        self.directory = directory
+        self.prefix = os.path.splitext(os.path.basename(db_name))[0]
+        # правила хранения снимков: последние, по одному за день и за неделю
+        self.keep_last = 5
+        self.keep_daily = 7
+        self.keep_weekly = 4
+        self.running = False
+        self.thread_pool = QtCore.QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(1)
+        self.signals = BackupSignals(self)
+        self.signals.finished.connect(self.handle_finished)
+        self.signals.failed.connect(self.handle_failed)
+
+    def start_backup(self):
+        """
+        метод для запуска создания снимка в рабочем потоке, возвращает False,
+        если снимок уже создается
+        """
+        if self.running:
+            return False
+        os.makedirs(self.directory, exist_ok=True)
+        snapshot_path = os.path.join(
+            self.directory,
+            f"{self.prefix}-{datetime.datetime.now().strftime(self.TIME_FORMAT)}.db")
+        self.running = True
+        self.thread_pool.start(BackupJob(self.db_name, snapshot_path, self.signals))
+        return True
+
+    def handle_finished(self, snapshot_path: str):
+        """
+        метод для удаления лишних снимков после создания нового
+        """
+        self.running = False
+        self.rotate()
+        self.backup_finished.emit(snapshot_path)
+
+    def handle_failed(self, error: str):
+        """
+        метод для передачи ошибки резервного копирования
+        """
+        self.running = False
+        self.backup_failed.emit(error)
+
+    def get_snapshots(self):
+        """
+        метод для получения списка снимков вида [(datetime, путь), ...],
+        начиная с самого нового
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        snapshots = []
+        for name in os.listdir(self.directory):
+            base, extension = os.path.splitext(name)
+            if extension != ".db" or not base.startswith(f"{self.prefix}-"):
+                continue
+            try:
+                created = datetime.datetime.strptime(
+                    base[len(self.prefix) + 1:], self.TIME_FORMAT)
+            except ValueError:
+                continue
+            snapshots.append((created, os.path.join(self.directory, name)))
+        return sorted(snapshots, reverse=True)
+
+    @staticmethod
+    def select_snapshots_to_keep(snapshots, keep_last: int, keep_daily: int,
+                                 keep_weekly: int):
+        """
+        метод для выбора сохраняемых снимков: несколько последних, самый новый
+        снимок каждого из последних дней и каждой из последних недель
+        args(
+            snapshots: list - список вида [(datetime, путь), ...] от новых к старым,
+            keep_last: int - количество последних снимков,
+            keep_daily: int - количество дней,
+            keep_weekly: int - количество недель
+        )
+        """
+        keep = {path for _, path in snapshots[:keep_last]}
+        days = {}
+        weeks = {}
+        for created, path in snapshots:
+            days.setdefault(created.date(), path)
+            weeks.setdefault(created.isocalendar()[:2], path)
+        keep.update(path for _, path in sorted(days.items(), reverse=True)[:keep_daily])
+        keep.update(path for _, path in sorted(weeks.items(), reverse=True)[:keep_weekly])
+        return keep
+
+    def rotate(self):
+        """
+        метод для удаления снимков, не попадающих под правила хранения
+        """
+        snapshots = self.get_snapshots()
+        keep = self.select_snapshots_to_keep(snapshots, self.keep_last,
+                                             self.keep_daily, self.keep_weekly)
+        for _, path in snapshots:
+            if path not in keep:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    @staticmethod
+    def restore(snapshot_path: str, db_connection: sqlite3.Connection):
+        """
+        метод для замены содержимого работающей базы данных содержимым снимка
+        одной операцией, другие подключения видят изменения сразу после неё
+        """
+        db_connection.commit()
+        source = sqlite3.connect(snapshot_path)
+        try:
+            source.backup(db_connection)
+        finally:
+            source.close()
+
+    def stop(self):
+        """
+        метод для ожидания завершения создания снимка
+        """
+        self.thread_pool.waitForDone()
@@ -0,0 +1,295 @@
+from contextlib import contextmanager
+from functools import wraps
+import os
+from PyQt5 import QtCore
+import queue
+import sqlite3
+import threading
+import time
+from urllib.request import pathname2url
+
+# глубина вложенности фоновых запросов потока, которые не учитываются в счетчиках
+untracked_state = threading.local()
+
+
+@contextmanager
+def untracked_queries():
+    """
+    функция для выполнения запросов потока без учета в счетчиках запросов,
+    так выполняются периодические проверки по таймеру, не связанные
+    с действиями пользователя
+    """
+    depth = getattr(untracked_state, "depth", 0)
+    untracked_state.depth = depth + 1
+    try:
+        yield
+    finally:
+        untracked_state.depth = depth
+
+
+def is_tracked():
+    """
+    функция для проверки, учитываются ли запросы текущего потока в счетчиках
+    """
+    return not getattr(untracked_state, "depth", 0)
+
+
+def untracked(function):
+    """
+    функция для получения обертки функции, запросы которой не учитываются
+    в счетчиках, например для подключения к сигналу таймера
+    """
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        with untracked_queries():
+            return function(*args, **kwargs)
+    return wrapper
+
+
+class QueryStats:
+    """
+    Класс счетчиков количества и времени выполнения запросов всех
+    подключений, запросы могут выполняться из разных потоков, фоновые
+    запросы внутри untracked_queries не учитываются
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queries = 0
+        self.seconds = 0.0
+
+    def add(self, seconds: float):
+        """
+        метод для учета одного выполненного запроса
+        """
+        if not is_tracked():
+            return
+        with self.lock:
+            self.queries += 1
+            self.seconds += seconds
+
+    def add_time(self, seconds: float):
+        """
+        метод для учета времени получения строк уже выполненного запроса
+        """
+        if not is_tracked():
+            return
+        with self.lock:
+            self.seconds += seconds
+
+    def reset(self):
+        """
+        метод для обнуления счетчиков
+        """
+        with self.lock:
+            self.queries = 0
+            self.seconds = 0.0
+
+
+class TimedCursor(sqlite3.Cursor):
+    """
+    Класс курсора, который учитывает количество запросов и время их
+    выполнения и получения строк, время перебора курсора в цикле не учитывается
+    """
+
+    def execute(self, *args):
+        started = time.perf_counter()
+        try:
+            return super().execute(*args)
+        finally:
+            self.connection.query_stats.add(time.perf_counter() - started)
+
+    def executemany(self, *args):
+        started = time.perf_counter()
+        try:
+            return super().executemany(*args)
+        finally:
+            self.connection.query_stats.add(time.perf_counter() - started)
+
+    def executescript(self, *args):
+        started = time.perf_counter()
+        try:
+            return super().executescript(*args)
+        finally:
+            self.connection.query_stats.add(time.perf_counter() - started)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            self.connection.query_stats.add_time(time.perf_counter() - started)
+
+    def fetchall(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            self.connection.query_stats.add_time(time.perf_counter() - started)
+
+
+class TimedConnection(sqlite3.Connection):
+    """
+    Класс подключения, курсоры которого учитывают запросы в общих счетчиках
+    """
+    query_stats = QueryStats()  # счетчики по умолчанию, заменяются менеджером
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, *args):
+        return self.cursor().execute(*args)
+
+
+class ReadSignals(QtCore.QObject):
+    """
+    Класс сигналов для передачи результата чтения из рабочего потока
+    """
+    finished = QtCore.pyqtSignal(object)  # результат функции чтения
+    failed = QtCore.pyqtSignal(str)  # текст ошибки
+
+
+class ReadJob(QtCore.QRunnable):
+    """
+    Класс задачи рабочего потока для чтения базы данных через подключение
+    из пула только для чтения
+    """
+
+    def __init__(self, connections, query, signals: ReadSignals, tracked=True):
+        super().__init__()
+        self.connections = connections
+        self.query = query
+        self.signals = signals
+        # задача, запущенная фоновой проверкой, тоже не учитывается в счетчиках
+        self.tracked = tracked
+
+    def run(self):
+        """
+        метод для выполнения функции чтения в рабочем потоке, любое
+        исключение передается сигналом, так как исключение, вышедшее
+        из QRunnable, завершает программу
+        """
+        try:
+            with self.connections.reader() as cursor:
+                if self.tracked:
+                    result = self.query(cursor)
+                else:
+                    with untracked_queries():
+                        result = self.query(cursor)
+        except sqlite3.Error as err:
+            self.signals.failed.emit(str(err))
+        except Exception as err:
+            self.signals.failed.emit(f"{type(err).__name__}: {err}")
+        else:
+            self.signals.finished.emit(result)
+
+
+class ConnectionManager(QtCore.QObject):
+    """
+    Класс для управления подключениями к базе данных: все изменения идут
+    через одно подключение для записи, а чтение может выполняться через пул
+    подключений только для чтения, в режиме WAL такие подключения читают
+    последние сохраненные данные, не блокируя запись и друг друга
+    """
+
+    def __init__(self, db_name: str, pool_size=4, parent=None):
+        """
+        args(
+            db_name: str - путь к базе данных,
+            pool_size: int - максимальное количество подключений для чтения,
+                             не меньше двух,
+            parent: QtCore.QObject - родитель объекта
+        )
+        """
+        super().__init__(parent)
+        self.db_name = db_name
+        self.pool_size = max(pool_size, 2)
+        # количество и время запросов подключения для записи и пула
+        self.query_stats = QueryStats()
+        self.writer = sqlite3.connect(db_name, factory=TimedConnection)
+        self.writer.query_stats = self.query_stats
+        self.readers = queue.Queue()  # свободные подключения для чтения
+        self.readers_count = 0  # количество открытых подключений для чтения
+        self.readers_lock = threading.Lock()
+        self.thread_pool = QtCore.QThreadPool(self)
+        # одно подключение всегда остается свободным для основного потока,
+        # поэтому чтение в основном потоке не ждет завершения задач чтения
+        self.thread_pool.setMaxThreadCount(self.pool_size - 1)
+        self.jobs_signals = set()  # сигналы выполняющихся задач чтения
+
+    def open_reader(self):
+        """
+        метод для открытия нового подключения только для чтения, подключение
+        может передаваться между потоками, но используется только одним из них
+        """
+        uri = f"file:{pathname2url(os.path.abspath(self.db_name))}?mode=ro"
+        connection = sqlite3.connect(uri, uri=True, check_same_thread=False,
+                                     factory=TimedConnection)
+        connection.query_stats = self.query_stats
+        connection.execute("PRAGMA query_only=ON")
+        return connection
+
+    @contextmanager
+    def reader(self):
+        """
+        метод для получения курсора подключения из пула только для чтения,
+        если все подключения заняты, ожидается освобождение одного из них,
+        задачи чтения занимают не больше pool_size - 1 подключений
+        """
+        connection = None
+        with self.readers_lock:
+            if self.readers.empty() and self.readers_count < self.pool_size:
+                self.readers_count += 1
+                try:
+                    connection = self.open_reader()
+                except Exception:
+                    self.readers_count -= 1
+                    raise
+        if connection is None:
+            connection = self.readers.get()
+        cursor = connection.cursor()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+            # незавершенное чтение не должно удерживать старый снимок базы данных
+            if connection.in_transaction:
+                connection.rollback()
+            self.readers.put(connection)
+
+    def run_read(self, query, callback, error_callback=None):
+        """
+        метод для выполнения функции чтения в рабочем потоке, результат
+        передается в функцию обратного вызова в основном потоке
+        args(
+            query: func - функция, принимающая курсор и возвращающая результат,
+            callback: func - функция, принимающая результат,
+            error_callback: func - функция, принимающая текст ошибки
+        )
+        """
+        signals = ReadSignals(self)
+        self.jobs_signals.add(signals)
+        signals.finished.connect(callback)
+        if error_callback is not None:
+            signals.failed.connect(error_callback)
+        for signal in (signals.finished, signals.failed):
+            signal.connect(lambda *_: self.release_signals(signals))
+        self.thread_pool.start(ReadJob(self, query, signals, is_tracked()))
+
+    def release_signals(self, signals: ReadSignals):
+        """
+        метод для удаления сигналов завершенной задачи чтения
+        """
+        self.jobs_signals.discard(signals)
+        signals.deleteLater()
+
+    def close(self):
+        """
+        метод для ожидания задач чтения и закрытия всех подключений
+        """
+        self.thread_pool.clear()
+        self.thread_pool.waitForDone()
+        while not self.readers.empty():
+            self.readers.get().close()
+        self.readers_count = 0
+        self.writer.close()
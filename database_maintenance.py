@@ -0,0 +1,355 @@
+from database_connections import untracked
+import datetime
+import os
+from PyQt5 import QtWidgets, QtCore, QtGui
+import sqlite3
+import time
+
+
+class CheckSignals(QtCore.QObject):
+    """
+    Класс сигналов для передачи результата проверки целостности и полной
+    очистки из рабочего потока
+    """
+    finished = QtCore.pyqtSignal(str)  # результат quick_check
+    vacuum_finished = QtCore.pyqtSignal(str)  # текст ошибки или пустая строка
+
+
+class QuickCheckJob(QtCore.QRunnable):
+    """
+    Класс задачи рабочего потока для проверки целостности базы данных
+    через отдельное подключение, в режиме WAL проверка не блокирует запись
+    """
+
+    def __init__(self, db_name: str, signals: CheckSignals):
+        super().__init__()
+        self.db_name = db_name
+        self.signals = signals
+
+    def run(self):
+        """
+        метод для проверки целостности базы данных в рабочем потоке
+        """
+        try:
+            connection = sqlite3.connect(self.db_name)
+            try:
+                rows = connection.execute("PRAGMA quick_check").fetchall()
+            finally:
+                connection.close()
+            result = "\n".join(row[0] for row in rows)
+        except sqlite3.Error as err:
+            result = str(err)
+        self.signals.finished.emit(result)
+
+
+class VacuumJob(QtCore.QRunnable):
+    """
+    Класс задачи рабочего потока для включения режима incremental vacuum
+    в старой базе данных одной полной очисткой через отдельное подключение
+    """
+
+    def __init__(self, db_name: str, signals: CheckSignals):
+        super().__init__()
+        self.db_name = db_name
+        self.signals = signals
+
+    def run(self):
+        """
+        метод для полной очистки базы данных в рабочем потоке
+        """
+        error = ""
+        try:
+            connection = sqlite3.connect(self.db_name)
+            try:
+                connection.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                connection.execute("VACUUM")
+            finally:
+                connection.close()
+        except sqlite3.Error as err:
+            error = str(err)
+        self.signals.vacuum_finished.emit(error)
+
+
+class DatabaseMaintenance(QtCore.QObject):
+    """
+    Класс для обслуживания базы данных небольшими шагами, пока пользователь
+    не работает с программой: обновление статистики планировщика запросов,
+    сжатие журнала изменений, возврат свободных страниц файлу и проверка
+    целостности
+    """
+    maintenance_finished = QtCore.pyqtSignal()
+    # шаги обслуживания
+    STEPS = ("optimize", "compact", "vacuum", "check", "record")
+    IDLE_SECONDS = 10  # время без действий пользователя до начала обслуживания
+    PAGES_PER_SLICE = 64  # количество страниц, освобождаемых за один шаг
+    RUN_INTERVAL = 6 * 3600  # минимальный интервал между обслуживаниями
+
+    def __init__(self, db_connection, db_name: str, change_journal=None,
+                 interval=2000, parent=None):
+        """
+        args(
+            db_connection: sqlite3.Connection - подключение к базе данных,
+            db_name: str - путь к базе данных для проверки в рабочем потоке,
+            change_journal: ChangeJournal - журнал изменений для сжатия,
+            interval: int - интервал между шагами в миллисекундах,
+            parent: QtCore.QObject - родитель объекта
+        )
+        """
+        super().__init__(parent)
+        self.db_connection = db_connection
+        self.db_cursor = self.db_connection.cursor()
+        self.db_name = db_name
+        self.change_journal = change_journal
+        self.create_stats_table()
+        self.step = None  # текущий шаг обслуживания или None
+        self.check_result = None  # результат последней проверки целостности
+        self.freelist_before = None  # свободные страницы перед полной очисткой
+        self.pages_freed = 0  # страницы, возвращенные файлу очисткой
+        self.check_running = False
+        self.vacuum_running = False
+        self.forced = False  # запущено ли обслуживание из меню
+        self.last_cursor_pos = None
+        self.last_activity = time.monotonic()
+        self.thread_pool = QtCore.QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(1)
+        self.signals = CheckSignals(self)
+        self.signals.finished.connect(self.handle_check_finished)
+        self.signals.vacuum_finished.connect(self.handle_vacuum_finished)
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(interval)
+        # шаги по таймеру не относятся к действиям пользователя
+        self.timer.timeout.connect(untracked(self.run_slice))
+
+    def create_stats_table(self):
+        """
+        метод для создания таблицы с историей размера файла базы данных,
+        freelist_count - количество страниц, возвращенных файлу очисткой
+        """
+        self.db_cursor.execute("""CREATE TABLE IF NOT EXISTS maintenance_stats(
+            checked_at REAL,
+            file_size INTEGER,
+            page_count INTEGER,
+            freelist_count INTEGER,
+            quick_check TEXT)""")
+        self.db_connection.commit()
+
+    def start(self):
+        """
+        метод для запуска проверки необходимости обслуживания
+        """
+        self.timer.start()
+
+    def stop(self):
+        """
+        метод для остановки обслуживания и ожидания проверки целостности,
+        статистика планировщика запросов обновляется перед закрытием
+        """
+        self.timer.stop()
+        self.thread_pool.waitForDone()
+        try:
+            self.db_cursor.execute("PRAGMA optimize")
+        except sqlite3.Error:
+            pass
+
+    def is_due(self):
+        """
+        метод для проверки, прошло ли достаточно времени с прошлого обслуживания
+        """
+        last_run = self.db_cursor.execute(
+            "SELECT MAX(checked_at) FROM maintenance_stats").fetchone()[0]
+        return last_run is None or time.time() - last_run >= self.RUN_INTERVAL
+
+    def is_idle(self):
+        """
+        метод для проверки, что пользователь не двигал мышь, не нажимал кнопки
+        и не открывал диалоги заданное время
+        """
+        cursor_pos = QtGui.QCursor.pos()
+        if (cursor_pos != self.last_cursor_pos
+                or QtWidgets.QApplication.mouseButtons() != QtCore.Qt.NoButton
+                or QtWidgets.QApplication.keyboardModifiers() != QtCore.Qt.NoModifier
+                or QtWidgets.QApplication.activeModalWidget() is not None
+                or QtWidgets.QApplication.activePopupWidget() is not None):
+            self.last_cursor_pos = cursor_pos
+            self.last_activity = time.monotonic()
+            return False
+        return time.monotonic() - self.last_activity >= self.IDLE_SECONDS
+
+    def run_now(self):
+        """
+        метод для запуска обслуживания без ожидания простоя, шаги по-прежнему
+        выполняются по одному за интервал таймера, старая база данных
+        переводится в режим incremental vacuum только при таком запуске
+        """
+        self.forced = True
+        if self.step is None:
+            self.step = self.STEPS[0]
+
+    def run_slice(self):
+        """
+        метод для выполнения одного небольшого шага обслуживания во время простоя
+        """
+        if self.step is None:
+            if not self.is_idle():
+                return
+            try:
+                if not self.is_due():
+                    return
+            except sqlite3.Error:
+                self.postpone()
+                return
+            self.step = self.STEPS[0]
+        elif not self.forced and not self.is_idle():
+            return
+        self.run_step()
+
+    def run_step(self):
+        """
+        метод для выполнения текущего шага обслуживания, если база данных
+        заблокирована другим подключением, шаг повторяется в следующий простой
+        """
+        try:
+            self.execute_step()
+        except sqlite3.Error:
+            self.db_connection.rollback()
+            self.postpone()
+
+    def postpone(self):
+        """
+        метод для переноса обслуживания на следующий период простоя
+        """
+        self.last_activity = time.monotonic()
+
+    def execute_step(self):
+        """
+        метод для выполнения текущего шага обслуживания
+        """
+        if self.step == "optimize":
+            self.freelist_before = None
+            self.pages_freed = 0
+            # сбор статистики только для таблиц, где она устарела
+            self.db_cursor.execute("PRAGMA optimize")
+            self.next_step()
+        elif self.step == "compact":
+            # сжатие идет до очистки, чтобы освобожденные им страницы
+            # вернулись файлу в том же обслуживании
+            if self.change_journal is None or self.change_journal.compact_slice():
+                self.next_step()
+        elif self.step == "vacuum":
+            if self.vacuum_slice():
+                self.next_step()
+        elif self.step == "check":
+            if not self.check_running:
+                self.check_running = True
+                self.thread_pool.start(QuickCheckJob(self.db_name, self.signals))
+        elif self.step == "record":
+            self.record_stats()
+            self.step = None
+            self.forced = False
+            self.maintenance_finished.emit()
+
+    def next_step(self):
+        """
+        метод для перехода к следующему шагу обслуживания
+        """
+        self.step = self.STEPS[self.STEPS.index(self.step) + 1]
+
+    def vacuum_slice(self):
+        """
+        метод для возврата файлу небольшого количества свободных страниц,
+        возвращает True, если свободных страниц не осталось или очистка
+        пропущена, количество возвращенных страниц сохраняется
+        """
+        if self.vacuum_running:
+            return False
+        self.db_connection.commit()
+        freelist_count = self.db_cursor.execute("PRAGMA freelist_count").fetchone()[0]
+        if self.db_cursor.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            # режим incremental vacuum для старой базы данных включается
+            # одной полной очисткой, она блокирует запись на всё время
+            # выполнения, поэтому запускается только из меню в рабочем потоке
+            if self.forced:
+                self.freelist_before = freelist_count
+                self.vacuum_running = True
+                self.thread_pool.start(VacuumJob(self.db_name, self.signals))
+                return False
+            return True
+        if not freelist_count:
+            return True
+        # execute освобождает только одну страницу за вызов, executescript
+        # выполняет прагму до конца
+        self.db_cursor.executescript(
+            f"PRAGMA incremental_vacuum({self.PAGES_PER_SLICE})")
+        self.pages_freed += max(freelist_count - self.db_cursor.execute(
+            "PRAGMA freelist_count").fetchone()[0], 0)
+        return False
+
+    def handle_vacuum_finished(self, error: str):
+        """
+        метод для продолжения обслуживания после полной очистки, при ошибке
+        очистка повторяется при следующем запуске из меню
+        """
+        self.vacuum_running = False
+        if not error and self.freelist_before is not None:
+            try:
+                freelist_count = self.db_cursor.execute(
+                    "PRAGMA freelist_count").fetchone()[0]
+            except sqlite3.Error:
+                freelist_count = self.freelist_before
+            self.pages_freed = max(self.freelist_before - freelist_count, 0)
+        if self.step == "vacuum":
+            self.next_step()
+
+    def handle_check_finished(self, result: str):
+        """
+        метод для сохранения результата проверки целостности
+        """
+        self.check_running = False
+        self.check_result = result
+        if self.step == "check":
+            self.next_step()
+            # запись истории не зависит от простоя
+            self.run_step()
+
+    def record_stats(self):
+        """
+        метод для сохранения размера файла после очистки и количества
+        возвращенных ей страниц, 0, если очистка не выполнялась
+        """
+        # освобожденные страницы попадают в файл только после переноса
+        # журнала WAL в базу данных
+        self.db_cursor.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall()
+        page_count = self.db_cursor.execute("PRAGMA page_count").fetchone()[0]
+        try:
+            file_size = os.path.getsize(self.db_name)
+        except OSError:
+            file_size = 0
+        self.db_cursor.execute("""INSERT INTO maintenance_stats(checked_at,
+            file_size, page_count, freelist_count, quick_check)
+            VALUES (?, ?, ?, ?, ?)""", (time.time(), file_size, page_count,
+                                        self.pages_freed, self.check_result))
+        self.db_connection.commit()
+
+    def get_report(self, records=30):
+        """
+        метод для получения отчета о размере файла и свободных страницах
+        за последние обслуживания
+        """
+        rows = self.db_cursor.execute("""SELECT checked_at, file_size,
+            page_count, freelist_count, quick_check FROM maintenance_stats
+            ORDER BY checked_at DESC LIMIT ?""", (records,)).fetchall()[::-1]
+        if not rows:
+            return "Maintenance has not run yet."
+        lines = []
+        for checked_at, file_size, page_count, freelist_count, check in rows:
+            date = datetime.datetime.fromtimestamp(checked_at).strftime(
+                "%d.%m.%Y %H:%M")
+            lines.append(f"{date}: {file_size / 2 ** 20:.2f} MB, "
+                         f"{page_count} pages, {freelist_count} pages freed, "
+                         f"check: {check}")
+        if len(rows) > 1:
+            first, last = rows[0], rows[-1]
+            lines.append(f"Trend: file size {(last[1] - first[1]) / 2 ** 20:+.2f} MB, "
+                         f"pages {last[2] - first[2]:+d}, "
+                         f"{sum(row[3] for row in rows)} pages freed in total")
+        return "\n".join(lines)
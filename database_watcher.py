@@ -0,0 +1,66 @@
+from change_journal import ChangeJournal
+from database_connections import untracked
+from PyQt5 import QtCore
+
+
+class DatabaseWatcher(QtCore.QObject):
+    """
+    Класс для отслеживания изменений базы данных, сделанных другими
+    экземплярами приложения
+    """
+    # сигнал с id измененных задач и флагом изменения списка таблиц
+    changes_detected = QtCore.pyqtSignal(list, bool)
+
+    def __init__(self, db_connection, interval=500, parent=None):
+        super().__init__(parent)
+        self.db_connection = db_connection
+        self.db_cursor = self.db_connection.cursor()
+        self.data_version = self.get_data_version()
+        self.last_version = ChangeJournal.get_last_version(self.db_cursor)
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(interval)
+        # опрос по таймеру не относится к действиям пользователя
+        self.timer.timeout.connect(untracked(self.check_changes))
+
+    def start(self):
+        """
+        метод для запуска отслеживания изменений
+        """
+        self.timer.start()
+
+    def stop(self):
+        """
+        метод для остановки отслеживания изменений
+        """
+        self.timer.stop()
+
+    def get_data_version(self):
+        """
+        метод для получения версии данных, которая меняется только при
+        коммитах других подключений к базе данных
+        """
+        return self.db_cursor.execute("PRAGMA data_version").fetchone()[0]
+
+    def check_changes(self, force=False):
+        """
+        метод для проверки наличия изменений и активации сигнала с их списком
+        args(
+            force: bool - нужно ли читать журнал, даже если базу данных
+                          изменяло только это подключение
+        )
+        """
+        data_version = self.get_data_version()
+        if data_version == self.data_version and not force:
+            return
+        self.data_version = data_version
+        changes = self.db_cursor.execute("""SELECT version, entity, entity_id
+            FROM journal WHERE version > ?
+            ORDER BY version""", (self.last_version,)).fetchall()
+        if not changes:
+            return
+        self.last_version = changes[-1][0]
+        # id задач без повторений с сохранением порядка изменений
+        tasks_ids = list(dict.fromkeys(
+            entity_id for _, entity, entity_id in changes if entity == "task"))
+        tables_changed = any(entity != "task" for _, entity, _ in changes)
+        self.changes_detected.emit(tasks_ids, tables_changed)
@@ -0,0 +1,367 @@
+import datetime
+import numpy as np
+from PyQt5 import QtWidgets, QtCore, QtGui
+import pyqtgraph as pg
+
+
+class DeadlineIndex:
+    """
+    Класс индекса сроков задач: сроки каждой таблицы хранятся отсортированными
+    массивами, поэтому задачи видимого интервала находятся двоичным поиском,
+    а количество задач в интервалах считается без перебора задач
+    """
+
+    def __init__(self, rows=(), tables=()):
+        """
+        args(
+            rows: list - строки вида (id, table_id, comment, color, deadline_date),
+                         отсортированные по таблице и сроку,
+            tables: list - строки вида (id таблицы, название)
+        )
+        """
+        rows = list(rows)
+        # срок хранится как местное время, поэтому секунды считаются от эпохи
+        # без часового пояса, ось времени выводит их так же
+        self.times = parse_deadlines([row[4] for row in rows])
+        # задачи с нераспознанным сроком не показываются
+        valid = ~np.isnan(self.times)
+        if not valid.all():
+            rows = [row for row, is_valid in zip(rows, valid) if is_valid]
+            self.times = self.times[valid]
+        self.tables_ids = [table_id for table_id, _ in tables]
+        self.titles = dict(tables)
+        # у задач удаленной таблицы может остаться строка
+        known_ids = set(self.tables_ids)
+        self.tables_ids.extend(sorted({row[1] for row in rows} - known_ids))
+        lanes = {table_id: lane for lane, table_id in enumerate(self.tables_ids)}
+        self.ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.lanes = np.array([lanes[row[1]] for row in rows], dtype=np.int64)
+        self.comments = [row[2] for row in rows]
+        self.colors = [row[3] for row in rows]
+        # строки читаются отсортированными по таблице и строке срока, порядок
+        # восстанавливается на случай сроков, записанных в формате ДД.ММ.ГГГГ
+        order = np.lexsort((self.times, self.lanes))
+        if len(order) and np.any(order != np.arange(len(order))):
+            self.ids = self.ids[order]
+            self.lanes = self.lanes[order]
+            self.times = self.times[order]
+            self.comments = [self.comments[index] for index in order]
+            self.colors = [self.colors[index] for index in order]
+        # границы задач каждой таблицы в общих массивах
+        self.lane_starts = np.searchsorted(self.lanes, np.arange(len(self.tables_ids) + 1))
+        if len(self.times):
+            self.bounds = float(self.times.min()), float(self.times.max())
+        else:
+            now = get_local_now()
+            self.bounds = now - 7 * 86400, now + 7 * 86400
+
+    def __len__(self):
+        return len(self.ids)
+
+    def lane_times(self, lane: int):
+        """
+        метод для получения отсортированных сроков задач таблицы
+        """
+        return self.times[self.lane_starts[lane]:self.lane_starts[lane + 1]]
+
+    def find_range(self, lane: int, start: float, end: float):
+        """
+        метод для получения границ задач таблицы со сроком в заданном интервале
+        в общих массивах
+        """
+        offset = self.lane_starts[lane]
+        first, last = np.searchsorted(self.lane_times(lane), (start, end))
+        return offset + first, offset + last
+
+    def count_bins(self, lane: int, edges):
+        """
+        метод для подсчета задач таблицы между соседними границами интервалов
+        """
+        return np.diff(np.searchsorted(self.lane_times(lane), edges))
+
+    def find_nearest(self, lane: int, moment: float, tolerance: float):
+        """
+        метод для поиска задачи таблицы с ближайшим сроком, возвращает
+        индекс в общих массивах или None, если ближе заданного расстояния
+        задач нет
+        """
+        if not 0 <= lane < len(self.tables_ids):
+            return None
+        first, last = self.find_range(lane, moment - tolerance, moment + tolerance)
+        if first == last:
+            return None
+        return first + int(np.argmin(np.abs(self.times[first:last] - moment)))
+
+    @staticmethod
+    def read_deadlines(cursor):
+        """
+        метод для чтения сроков задач всех таблиц, строки идут в порядке
+        индекса tasks_table_deadline без отдельной сортировки
+        """
+        rows = cursor.execute("""SELECT id, table_id, comment, color,
+            deadline_date FROM tasks WHERE deadline_date IS NOT NULL
+            ORDER BY table_id, deadline_date""").fetchall()
+        tables = cursor.execute("SELECT id, title FROM tables ORDER BY id").fetchall()
+        return DeadlineIndex(rows, tables)
+
+
+def parse_deadlines(values: list):
+    """
+    функция для перевода сроков вида ГГГГ-ММ-ДД ЧЧ:ММ или ДД.ММ.ГГГГ ЧЧ:ММ
+    в секунды от эпохи без часового пояса, нераспознанные сроки
+    возвращаются как NaN
+    """
+    try:
+        dates = np.array(values, dtype="datetime64[m]")
+    except ValueError:
+        # разбор по одному сроку нужен только при сроках в другом формате
+        times = np.full(len(values), np.nan)
+        for index, value in enumerate(values):
+            for date_format in ("%Y-%m-%d %H:%M", "%d.%m.%Y %H:%M"):
+                try:
+                    date = datetime.datetime.strptime(value, date_format)
+                except (TypeError, ValueError):
+                    continue
+                times[index] = (date - datetime.datetime(1970, 1, 1)).total_seconds()
+                break
+        return times
+    times = dates.astype("datetime64[s]").astype(np.float64)
+    times[np.isnat(dates)] = np.nan
+    return times
+
+
+def get_local_now():
+    """
+    функция для получения текущего местного времени в секундах от эпохи
+    без часового пояса, как хранятся сроки задач
+    """
+    return float(np.datetime64(datetime.datetime.now(), "s").astype(np.float64))
+
+
+class DeadlineItem(pg.GraphicsObject):
+    """
+    Класс графического элемента со сроками всех задач: рисуются только
+    задачи видимого интервала, а если они расположены слишком плотно,
+    вместо них рисуется количество задач в интервалах по несколько пикселей
+    """
+    task_clicked = QtCore.pyqtSignal(int)  # сигнал с id выбранной задачи
+    MIN_SPACING = 6  # минимальное среднее расстояние между задачами в пикселях
+    BIN_WIDTH = 4  # ширина интервала подсчета задач в пикселях
+    MARKER_WIDTH = 6  # ширина отметки задачи в пикселях
+    LABEL_SPACING = 8  # минимальное расстояние между подписями в пикселях
+    LANE_HEIGHT = 0.7  # высота отметок в долях высоты строки таблицы
+
+    def __init__(self, index: DeadlineIndex):
+        super().__init__()
+        self.index = index
+
+    def set_index(self, index: DeadlineIndex):
+        """
+        метод для замены индекса сроков после перечитывания базы данных
+        """
+        self.prepareGeometryChange()
+        self.index = index
+        self.update()
+
+    def boundingRect(self):
+        start, end = self.index.bounds
+        return QtCore.QRectF(start, -0.5, max(end - start, 1),
+                             max(len(self.index.tables_ids), 1))
+
+    def get_visible_area(self):
+        """
+        метод для получения видимого интервала времени, видимых строк таблиц
+        и количества секунд в одном пикселе
+        """
+        (start, end), (bottom, top) = self.getViewBox().viewRange()
+        first_lane = max(0, int(np.floor(bottom + 0.5)))
+        last_lane = min(len(self.index.tables_ids) - 1, int(np.ceil(top - 0.5)))
+        return start, end, range(first_lane, last_lane + 1), self.pixelWidth() or 1.0
+
+    def paint(self, painter, option, widget=None):
+        """
+        метод для отрисовки задач или количества задач видимых таблиц
+        """
+        if self.getViewBox() is None or not len(self.index):
+            return
+        start, end, lanes, pixel = self.get_visible_area()
+        view_width = max((end - start) / pixel, 1)
+        painter.setPen(pg.mkPen(None))
+        for lane in lanes:
+            first, last = self.index.find_range(lane, start, end)
+            if last - first > view_width / self.MIN_SPACING:
+                self.paint_bins(painter, lane, start, end, pixel)
+            else:
+                self.paint_tasks(painter, lane, first, last, pixel)
+
+    def paint_bins(self, painter, lane: int, start: float, end: float, pixel: float):
+        """
+        метод для отрисовки количества задач в интервалах по несколько
+        пикселей, высота столбца растет с количеством задач
+        """
+        bin_width = self.BIN_WIDTH * pixel
+        # границы привязаны к сетке, чтобы столбцы не дрожали при прокрутке
+        first_edge = np.floor(start / bin_width) * bin_width
+        edges = np.arange(first_edge, end + bin_width, bin_width)
+        counts = self.index.count_bins(lane, edges)
+        filled = np.flatnonzero(counts)
+        if not len(filled):
+            return
+        heights = self.LANE_HEIGHT * np.sqrt(counts[filled] / counts.max())
+        # ось строк перевернута, столбцы растут от нижнего края строки
+        bottom = lane + self.LANE_HEIGHT / 2
+        painter.setBrush(pg.mkBrush(80, 140, 255, 200))
+        painter.drawRects([QtCore.QRectF(edges[bin_index], bottom - height,
+                                         bin_width * 0.9, height)
+                           for bin_index, height in zip(filled.tolist(), heights.tolist())])
+
+    def paint_tasks(self, painter, lane: int, first: int, last: int, pixel: float):
+        """
+        метод для отрисовки отдельных задач цветом их карточек с подписями,
+        которые помещаются до следующей подписи
+        """
+        width = self.MARKER_WIDTH * pixel
+        bottom = lane - self.LANE_HEIGHT / 2
+        for position in range(first, last):
+            painter.setBrush(pg.mkBrush(self.index.colors[position] or "#8cff7a"))
+            painter.drawRect(QtCore.QRectF(self.index.times[position] - width / 2,
+                                           bottom, width, self.LANE_HEIGHT))
+        # подписи рисуются в пикселях, чтобы текст не растягивался при масштабе
+        transform = painter.transform()
+        painter.save()
+        painter.resetTransform()
+        painter.setPen(pg.mkPen("w"))
+        metrics = painter.fontMetrics()
+        free_from = -np.inf  # левая граница свободного места для подписи
+        for position in range(first, last):
+            point = transform.map(QtCore.QPointF(self.index.times[position] + width, lane))
+            if point.x() < free_from:
+                continue
+            text = self.index.comments[position].split("\n", 1)[0][:40]
+            painter.drawText(point + QtCore.QPointF(2, 4), text)
+            free_from = point.x() + metrics.horizontalAdvance(text) + self.LABEL_SPACING
+        painter.restore()
+
+    def mouseClickEvent(self, event):
+        """
+        метод для выбора задачи по щелчку, по столбцу с количеством задач
+        щелчок приближает интервал вокруг него
+        """
+        if event.button() != QtCore.Qt.LeftButton:
+            return
+        position = event.pos()
+        lane = int(round(position.y()))
+        start, end, _, pixel = self.get_visible_area()
+        found = self.index.find_nearest(lane, position.x(), self.MARKER_WIDTH * pixel)
+        if found is None:
+            return
+        event.accept()
+        first, last = self.index.find_range(lane, start, end)
+        if last - first > (end - start) / pixel / self.MIN_SPACING:
+            self.getViewBox().scaleBy(x=0.2, y=1, center=position)
+        else:
+            self.task_clicked.emit(int(self.index.ids[found]))
+
+
+class DeadlineTimelineWindow(QtWidgets.QWidget):
+    """
+    Класс окна со сроками задач всех таблиц на одной временной шкале,
+    каждая таблица занимает свою строку
+    """
+    task_selected = QtCore.pyqtSignal(int)  # сигнал с id выбранной задачи
+
+    def __init__(self, connections, logo_filename):
+        """
+        args(
+            connections: ConnectionManager - подключения к базе данных,
+            logo_filename: str - путь к иконке окна
+        )
+        """
+        super().__init__()
+        self.connections = connections
+        self.logo_filename = logo_filename
+        self.index = DeadlineIndex()
+        self.loading = False  # идет ли чтение сроков в рабочем потоке
+        self.setup_ui()
+
+    def setup_ui(self):
+        """
+        главный метод для создания графического интерфейса окна
+        """
+        self.main_layout = QtWidgets.QVBoxLayout(self)
+        self.plot_widget = pg.PlotWidget(
+            axisItems={"bottom": pg.DateAxisItem(orientation="bottom", utcOffset=0)})
+        self.plot_item = self.plot_widget.getPlotItem()
+        self.plot_item.showGrid(x=True)
+        self.plot_item.invertY(True)
+        self.plot_item.hideButtons()
+        # масштаб колесом меняет только время, строки всех таблиц видны всегда
+        self.plot_item.getViewBox().setMouseEnabled(x=True, y=False)
+        self.deadline_item = DeadlineItem(self.index)
+        self.deadline_item.task_clicked.connect(self.task_selected)
+        self.plot_item.addItem(self.deadline_item)
+        self.now_line = pg.InfiniteLine(angle=90, pen=pg.mkPen("r", width=1))
+        self.plot_item.addItem(self.now_line)
+        self.summary_label = QtWidgets.QLabel(self)
+        self.main_layout.addWidget(self.plot_widget)
+        self.main_layout.addWidget(self.summary_label)
+        self.setWindowTitle("Deadlines")
+        self.setWindowIcon(QtGui.QIcon(self.logo_filename))
+        self.resize(900, 400)
+
+    def show_timeline(self):
+        """
+        метод для показа окна со сроками около текущей даты
+        """
+        first_show = not self.isVisible()
+        self.show()
+        self.reload(reset_range=first_show)
+
+    def reload(self, reset_range=False):
+        """
+        метод для перечитывания сроков задач в рабочем потоке
+        """
+        if self.loading:
+            return
+        self.loading = True
+        self.connections.run_read(DeadlineIndex.read_deadlines,
+                                  lambda index: self.set_index(index, reset_range),
+                                  self.handle_read_failed)
+
+    def handle_read_failed(self, error: str):
+        """
+        метод для обработки ошибки чтения сроков
+        """
+        self.loading = False
+        self.summary_label.setText(f"Unable to read deadlines: {error}")
+
+    def set_index(self, index: DeadlineIndex, reset_range=False):
+        """
+        метод для отображения прочитанных сроков
+        """
+        self.loading = False
+        self.index = index
+        self.deadline_item.set_index(index)
+        lanes_count = max(len(index.tables_ids), 1)
+        self.plot_item.getAxis("left").setTicks([[
+            (lane, index.titles.get(table_id, f"Table {table_id}"))
+            for lane, table_id in enumerate(index.tables_ids)]])
+        view_box = self.plot_item.getViewBox()
+        now = get_local_now()
+        self.now_line.setValue(now)
+        if reset_range:
+            view_box.setXRange(now - 14 * 86400, now + 30 * 86400, padding=0)
+        view_box.setYRange(-0.5, lanes_count - 0.5, padding=0)
+        overdue = int(np.count_nonzero(index.times < now))
+        self.summary_label.setText(
+            f"{len(index)} tasks with deadlines, {overdue} overdue")
+
+    def changeEvent(self, event):
+        """
+        метод для перечитывания сроков при возвращении к окну, задачи могли
+        измениться на доске
+        """
+        super().changeEvent(event)
+        if (event.type() == QtCore.QEvent.ActivationChange
+                and self.isActiveWindow() and self.isVisible()):
+            self.reload()
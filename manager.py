@@ -1,12 +1,33 @@
+from archive import ArchiveWindow, TaskArchive
+from attachment_previews import AttachmentPreviews, describe_preview
+from board_view import BoardView
+from change_journal import ChangeJournal, NOW
+from contextlib import contextmanager
+from database_backup import DatabaseBackup
+from database_connections import ConnectionManager, untracked
+from database_maintenance import DatabaseMaintenance
+from database_watcher import DatabaseWatcher
+from deadline_timeline import DeadlineTimelineWindow
 from functools import partial
 import json
+import numpy as np
 from new_task_window import NewTaskWindow
-from PyQt5 import QtWidgets, QtCore, QtGui
+from performance_overlay import PerformanceOverlay
+from PyQt5 import QtWidgets, QtCore, QtGui, sip
 import pyqtgraph as pg
 import pyqtgraph.exporters
 import sqlite3
 import sys
+from table_cache import TableCache
+from task_model import Task, TaskStore
+from task_filter import FilterBar, TaskFilter
+from task_history import TaskHistory, get_flow_metrics, DAY
+from task_import import TaskImporter
+from task_selection import RubberBandSelector, TaskSelection
+from task_sync import TaskSync
 from task_widget import TaskWidget
+import time
+from widget_diagnostics import WidgetDiagnostics
 
 
 class GroupBox(QtWidgets.QGroupBox):
@@ -47,74 +68,358 @@ class GroupBox(QtWidgets.QGroupBox):
         return self.task_data
 
 
+class ColumnView(GroupBox):
+    """
+    Класс колонки доски с кнопкой добавления задачи и прокручиваемым
+    списком задач
+    """
+
+    def __init__(self, layout_id: int, title=""):
+        super().__init__(title)
+        self.layout_id = layout_id  # id лэйаута колонки в таблице
+        self.inner_layout = QtWidgets.QVBoxLayout(self)
+        self.add_task_button = QtWidgets.QPushButton("Add new", self)
+        self.scroll_area = QtWidgets.QScrollArea(self)
+        self.scroll_inner = QtWidgets.QWidget()
+        self.scroll_layout = QtWidgets.QVBoxLayout(self.scroll_inner)
+        self.scroll_layout.setContentsMargins(0, 0, 0, 0)
+        self.scroll_layout.setSpacing(0)
+        # задачи прижаты к верху, чтобы под ними оставалось место для рамки
+        self.scroll_layout.setAlignment(QtCore.Qt.AlignTop)
+        self.scroll_area.setWidgetResizable(True)
+        self.scroll_area.setWidget(self.scroll_inner)
+        self.inner_layout.addWidget(self.add_task_button)
+        self.inner_layout.addWidget(self.scroll_area)
+
+
 class MainWindow(QtWidgets.QMainWindow):
     """
     Основной класс приложения, обрабатывающий все взаимодействия с ним
     """
+    # названия колонок, которые создаются в каждой новой таблице
+    DEFAULT_COLUMNS = ("Resources", "To Do", "Doing", "Done")
+    FILTER_PAGES = 2  # высот доски ниже видимой части колонки, проверяемых фильтром заранее
+    performance_overlay = None  # панель замеров, создается вместе с интерфейсом
 
     def __init__(self, db_name, logo_filename):
         super().__init__()
         self.logo_filename = logo_filename
         self.db_name = db_name  # название базы данных
-        self.db_connection = sqlite3.connect(self.db_name)
+        # изменения записываются через одно подключение, а чтение уже
+        # сохраненных данных идет через пул подключений только для чтения
+        self.connections = ConnectionManager(self.db_name, parent=self)
+        self.db_connection = self.connections.writer
         self.db_cursor = self.db_connection.cursor()
         self.current_table_id = 1  # id текущей таблицы с заданиями
         # список действий из меню "Select table" для изменения их названий
         self.tables_actions = []
         self.create_database()
+        # журнал изменений строк для других экземпляров приложения и синхронизации
+        self.change_journal = ChangeJournal(self.db_connection)
+        self.task_history = TaskHistory(self.db_connection)
         self.set_start_task_id()
         self.update_tables_count()
-        # названия полей для задач
-        self.fields = ("Resources", "To Do", "Doing", "Done")
-        self.FIELDS_AMOUNT = len(self.fields)  # количество полей в программе
+        # колонки текущей таблицы вида [(id лэйаута, название), ...]
+        self.columns = []
+        self.column_titles = {}  # id лэйаута: название колонки
         # id лэйаута, в который нужно добавить новый созданный виджет
         self.active_layout = 0
-        self.pinned_tasks_ids = []
+        # id задач, окна которых открыты, закрепленные задачи хранятся в
+        # таблице pinned_tasks и не загружаются на доску
+        self.pinned_tasks_ids = set()
+        # окно без родителя удаляется вместе с python-объектом при сборке
+        # мусора, поэтому ссылки на окна закрепленных задач хранятся здесь
+        self.pinned_windows = {}  # id задачи: окно закрепленной задачи
+        # хранилище данных задач, которые отображают виджеты
+        self.task_store = TaskStore()
+        # кэш виджетов недавно просмотренных таблиц, записи задач вытесненных
+        # таблиц удаляются из хранилища
+        self.tables_cache = TableCache(on_delete=self.release_task_records)
         self.active_task = None
         self.pinned_task = None
+        # фильтр и сортировка карточек, по умолчанию показываются все задачи
+        self.task_filter = TaskFilter()
+        # карточки колонок, которые еще не проверены новым фильтром
+        # id лэйаута: (индекс следующей карточки, последняя проверенная
+        # карточка, высота проверенных карточек)
+        self.filter_queue = {}
         self.app_running = True
+        self.bulk_depth = 0  # глубина вложенности контекстов bulk_update
+        self.task_archive = TaskArchive(self.db_connection)
+        # миниатюры прикрепленных файлов создаются в рабочих потоках
+        self.attachment_previews = AttachmentPreviews(parent=self)
+        self.attachment_previews.preview_ready.connect(
+            self.show_attachment_preview)
+        # записи импортируемых файлов проверяются в фоне
+        self.task_importer = TaskImporter(self)
+        self.task_importer.progress_changed.connect(self.show_import_progress)
+        self.task_importer.import_finished.connect(self.insert_imported_tasks)
+        self.task_importer.import_failed.connect(self.handle_import_failed)
+        self.import_progress = None
+        # режим диагностики утечек виджетов, по умолчанию выключен
+        self.widget_diagnostics = WidgetDiagnostics(self, parent=self)
+        if self.get_setting("auto_archive") == "1":
+            self.task_archive.archive_done_tasks(
+                int(self.get_setting("archive_after_days", 30)))
         self.setup_ui()
         self.show_tasks_from_database()
+        self.setup_database_watcher()
+        self.setup_progress_rollup()
+        self.setup_backups()
+        self.setup_maintenance()
+        self.setup_sync()
+        # окна закрепленных задач открываются после показа главного окна
+        QtCore.QTimer.singleShot(0, self.restore_pinned_tasks)
 
     def setup_ui(self):
         """
         главный метод для создания графического интерфейса приложения
         """
         # создание диалогового окна для создания/изменения задачи
-        self.new_task_window = NewTaskWindow(self.logo_filename)
+        self.new_task_window = NewTaskWindow(self.logo_filename,
+                                             self.attachment_previews)
         self.new_task_window.main_tab.done_button.clicked.connect(
-            self.handle_task_button)  # подключение кнопки диалога
+            self.handle_task_button)  # подключение кнопок диалога
+        self.new_task_window.delete_requested.connect(self.delete_task)
+        self.new_task_window.pin_requested.connect(self.pin_active_task)
         self.centralwidget = QtWidgets.QWidget(self)
-        self.main_layout = QtWidgets.QHBoxLayout(self.centralwidget)
-        # создание внутренних лэйаутов для групбоксов
-        self.scroll_layouts = [QtWidgets.QVBoxLayout()
-                               for _ in range(self.FIELDS_AMOUNT)]
-        # создание лэйаутов, содержащих групбокс и кнопку добавления задачи
-        self.inner_layouts = [QtWidgets.QVBoxLayout()
-                              for _ in range(self.FIELDS_AMOUNT)]
-        self.add_task_buttons = [QtWidgets.QPushButton(
-            "Add new") for _ in range(self.FIELDS_AMOUNT)]
-        self.groupboxes = [GroupBox(field) for field in self.fields]
-        # подключение кнопок добавления задач и добавление их в лэйауты
-        for index, button in enumerate(self.add_task_buttons):
-            button.clicked.connect(partial(self.show_new_task_dialog, index))
-            self.inner_layouts[index].addWidget(button)
-        # настройка лэйаутов и добавление их в групбоксы
-        for index, layout in enumerate(self.inner_layouts):
-            self.scroll_layouts[index].setContentsMargins(0, 0, 0, 0)
-            self.scroll_layouts[index].setSpacing(0)
-            self.groupboxes[index].setLayout(layout)
-            self.groupboxes[index].item_added.connect(
-                partial(self.add_draged_widget, index))
-            self.main_layout.addWidget(self.groupboxes[index])
+        self.main_layout = QtWidgets.QVBoxLayout(self.centralwidget)
+        # панель фильтра скрыта, пока её не включат в меню Tasks
+        self.filter_bar = FilterBar(self.centralwidget)
+        self.filter_bar.filter_changed.connect(self.apply_task_filter)
+        self.filter_bar.hide()
+        self.main_layout.addWidget(self.filter_bar)
+        # на доске создаются только колонки, попадающие в окно, словари
+        # ниже содержат только созданные колонки с ключом по id лэйаута
+        self.board_view = BoardView(self.centralwidget)
+        self.board_view.visible_columns_changed.connect(self.update_column_views)
+        self.main_layout.addWidget(self.board_view)
+        # панель замеров рисуется поверх доски и по умолчанию скрыта
+        self.performance_overlay = PerformanceOverlay(
+            self, self.connections.query_stats, parent=self.centralwidget)
+        self.groupboxes = {}
+        self.scroll_areas = {}
+        self.scroll_inners = {}
+        self.scroll_layouts = {}
 
+        self.archive_window = ArchiveWindow(self.task_archive, self.logo_filename)
+        self.archive_window.task_restored.connect(self.apply_task_change)
+        self.deadline_window = DeadlineTimelineWindow(self.connections,
+                                                      self.logo_filename)
+        self.deadline_window.task_selected.connect(self.configure_task_by_id)
         self.setWindowIcon(QtGui.QIcon(self.logo_filename))
         self.setCentralWidget(self.centralwidget)
-        self.setup_scroll_areas()
+        self.setup_task_selection()
+        self.load_columns()
+        self.update_column_views(load_tasks=False)
         self.setup_help_messagbox()
         self.setup_menubar()
         self.setWindowTitle("Task Manager")
 
+    def setup_database_watcher(self):
+        """
+        метод для запуска отслеживания изменений из других экземпляров приложения
+        """
+        self.database_watcher = DatabaseWatcher(self.db_connection, parent=self)
+        self.database_watcher.changes_detected.connect(
+            self.apply_database_changes)
+        self.database_watcher.start()
+
+    def setup_backups(self):
+        """
+        метод для запуска создания снимков базы данных по расписанию
+        """
+        self.database_backup = DatabaseBackup(self.db_name, parent=self)
+        self.database_backup.keep_last = int(self.get_setting("backup_keep_last", 5))
+        self.database_backup.keep_daily = int(self.get_setting("backup_keep_daily", 7))
+        self.database_backup.keep_weekly = int(self.get_setting("backup_keep_weekly", 4))
+        self.database_backup.backup_finished.connect(self.handle_backup_finished)
+        self.database_backup.backup_failed.connect(self.handle_backup_failed)
+        self.manual_backup = False  # был ли текущий снимок запрошен из меню
+        # необходимость снимка проверяется периодически, а не только при запуске,
+        # так как приложение может работать несколько дней
+        self.backup_timer = QtCore.QTimer(self)
+        self.backup_timer.setInterval(10 * 60 * 1000)
+        # проверки по таймеру не учитываются в счетчиках запросов панели замеров
+        self.backup_timer.timeout.connect(untracked(self.backup_if_due))
+        self.backup_timer.start()
+        QtCore.QTimer.singleShot(30 * 1000, untracked(self.backup_if_due))
+
+    def backup_if_due(self):
+        """
+        метод для создания снимка, если с последнего прошло больше заданного
+        количества часов
+        """
+        if not self.app_running or self.get_setting("auto_backup", "1") != "1":
+            return
+        interval = float(self.get_setting("backup_interval_hours", 24)) * 3600
+        if time.time() - float(self.get_setting("last_backup_at", 0)) >= interval:
+            self.database_backup.start_backup()
+
+    def backup_now(self):
+        """
+        метод для создания снимка базы данных из меню
+        """
+        if self.database_backup.start_backup():
+            self.manual_backup = True
+
+    def handle_backup_finished(self, snapshot_path: str):
+        """
+        метод для сохранения времени последнего снимка
+        """
+        self.set_setting("last_backup_at", time.time())
+        if self.manual_backup:
+            self.manual_backup = False
+            QtWidgets.QMessageBox.information(
+                self, "Backup", f"Backup saved to\n{snapshot_path}")
+
+    def handle_backup_failed(self, error: str):
+        """
+        метод для показа ошибки снимка, запрошенного из меню, автоматический
+        снимок повторяется при следующей проверке
+        """
+        if self.manual_backup:
+            self.manual_backup = False
+            QtWidgets.QMessageBox.warning(
+                self, "Backup failed", f"Unable to back up the database.\n({error})")
+
+    def confirm_restore_backup(self, snapshot_path: str):
+        """
+        метод для подтверждения восстановления базы данных из снимка
+        """
+        responce = QtWidgets.QMessageBox.warning(
+            None, "Warning",
+            "All tables and tasks will be replaced with the backup.\nContinue?",
+            QtWidgets.QMessageBox.Ok, QtWidgets.QMessageBox.Cancel)
+        if responce == QtWidgets.QMessageBox.Ok:
+            self.restore_backup(snapshot_path)
+
+    def restore_backup(self, snapshot_path: str):
+        """
+        метод для восстановления базы данных из снимка, все экземпляры
+        приложения получают изменения через журнал изменений
+        """
+        tasks_ids = {row[0] for row in self.db_cursor.execute("SELECT id FROM tasks")}
+        last_version = self.change_journal.get_last_version(self.db_cursor)
+        DatabaseBackup.restore(snapshot_path, self.db_connection)
+        # снимок мог быть сделан старой версией программы
+        self.create_database()
+        self.change_journal.create_journal()
+        self.task_history.create_history()
+        # закрепленными остаются задачи с открытыми окнами
+        self.save_pinned_tasks(replace=True)
+        self.change_journal.record_restore(last_version, tasks_ids)
+        # собственные изменения не меняют data_version этого подключения
+        self.database_watcher.check_changes(force=True)
+
+    def setup_maintenance(self):
+        """
+        метод для запуска обслуживания базы данных во время простоя
+        """
+        self.database_maintenance = DatabaseMaintenance(
+            self.db_connection, self.db_name, self.change_journal, parent=self)
+        self.database_maintenance.start()
+
+    def run_maintenance(self):
+        """
+        метод для запуска обслуживания базы данных из меню
+        """
+        self.database_maintenance.run_now()
+
+    def show_maintenance_report(self):
+        """
+        метод для показа истории размера файла и свободных страниц базы данных
+        """
+        QtWidgets.QMessageBox.information(
+            self, "Maintenance report", self.database_maintenance.get_report())
+
+    def setup_sync(self):
+        """
+        метод для настройки синхронизации базы данных с сервером
+        """
+        self.task_sync = TaskSync(self.db_name, parent=self)
+        self.task_sync.sync_finished.connect(self.handle_sync_finished)
+        self.task_sync.sync_failed.connect(self.handle_sync_failed)
+
+    def sync_now(self):
+        """
+        метод для запуска синхронизации из меню, при первом запуске
+        запрашивается адрес сервера
+        """
+        url = self.get_setting("sync_url") or self.change_sync_server()
+        if not url:
+            return
+        policy = "fields" if self.get_setting("sync_per_field", "1") == "1" else "lww"
+        self.task_sync.start_sync(url, policy)
+
+    def change_sync_server(self):
+        """
+        метод для изменения адреса сервера синхронизации, возвращает
+        новый адрес или None
+        """
+        url, ok = QtWidgets.QInputDialog.getText(
+            self, "Sync server", "Server address:",
+            text=self.get_setting("sync_url", "http://127.0.0.1:8765"))
+        url = url.strip()
+        if not ok or not url:
+            return None
+        self.set_setting("sync_url", url)
+        return url
+
+    def handle_sync_finished(self, result: dict):
+        """
+        метод для применения полученных изменений и показа итогов синхронизации
+        """
+        # изменения записаны другим подключением и читаются из журнала
+        self.database_watcher.check_changes()
+        message = f"{result['pushed']} changes sent, {result['pulled']} received."
+        if result["remapped"]:
+            message += (f"\nTasks renumbered because their ids were taken "
+                        f"on the server: {result['remapped']}.")
+        QtWidgets.QMessageBox.information(self, "Sync", message)
+
+    def handle_sync_failed(self, error: str):
+        """
+        метод для показа ошибки синхронизации
+        """
+        QtWidgets.QMessageBox.warning(
+            self, "Sync failed", f"Unable to sync the database.\n({error})")
+
+    def setup_progress_rollup(self):
+        """
+        метод для запуска обновления сводки прогресса чеклистов в заголовках
+        списков после любых изменений базы данных
+        """
+        self.progress_state = None  # состояние базы данных при последнем подсчете
+        self.progress_timer = QtCore.QTimer(self)
+        self.progress_timer.setInterval(300)
+        self.progress_timer.timeout.connect(untracked(self.update_progress_rollup))
+        self.progress_timer.start()
+        self.update_progress_rollup()
+
+    def update_progress_rollup(self):
+        """
+        метод для отображения суммарного прогресса чеклистов каждого списка,
+        считается по сохраненным столбцам без разбора обвесов задач
+        """
+        state = (self.current_table_id, self.db_connection.total_changes,
+                 self.database_watcher.last_version)
+        if state == self.progress_state:
+            return
+        self.progress_state = state
+        self.update_filter_counts()
+        with self.connections.reader() as cursor:
+            progress = {layout_id: (done, total) for layout_id, done, total in
+                        cursor.execute("""SELECT layout_id,
+                            SUM(checklist_done), SUM(checklist_total) FROM tasks
+                            WHERE table_id = ? GROUP BY layout_id""",
+                                       (self.current_table_id,))}
+        for layout_id, groupbox in self.groupboxes.items():
+            field = self.column_titles.get(layout_id, "")
+            done, total = progress.get(layout_id, (0, 0))
+            title = f"{field} (✅ {done}/{total})" if total else field
+            groupbox.setTitle(title)
+
     def setup_menubar(self):
         """
         метод для создания и настройки строки меню
@@ -122,11 +427,128 @@ class MainWindow(QtWidgets.QMainWindow):
         self.menubar = self.menuBar()
         self.menu_tasks = self.menubar.addMenu("Tasks")
         self.menu_tables = self.menubar.addMenu("Tables")
+        self.menu_database = self.menubar.addMenu("Database")
+        self.menu_diagnostics = self.menubar.addMenu("Diagnostics")
         show_help_info_action = QtWidgets.QAction("Help", self)
         show_help_info_action.triggered.connect(self.help_messagebox.show)
         self.menubar.addAction(show_help_info_action)
         self.setup_tasks_menu()
         self.setup_tables_menu()
+        self.setup_database_menu()
+        self.setup_diagnostics_menu()
+
+    def setup_database_menu(self):
+        """
+        метод для настройки меню Database
+        """
+        backup_action = QtWidgets.QAction("Backup now", self)
+        backup_action.triggered.connect(self.backup_now)
+        auto_backup_action = QtWidgets.QAction("Automatic backups", self)
+        auto_backup_action.setCheckable(True)
+        auto_backup_action.setChecked(self.get_setting("auto_backup", "1") == "1")
+        auto_backup_action.toggled.connect(
+            partial(self.set_bool_setting, "auto_backup"))
+        # список снимков обновляется при каждом открытии подменю
+        self.restore_menu = QtWidgets.QMenu("Restore backup", self)
+        self.restore_menu.aboutToShow.connect(self.update_restore_menu)
+        self.menu_database.addAction(backup_action)
+        self.menu_database.addAction(auto_backup_action)
+        self.menu_database.addMenu(self.restore_menu)
+        self.menu_database.addSeparator()
+        for title, callback in (("Run maintenance", self.run_maintenance),
+                                ("Maintenance report", self.show_maintenance_report)):
+            action = QtWidgets.QAction(title, self)
+            action.triggered.connect(callback)
+            self.menu_database.addAction(action)
+        self.menu_database.addSeparator()
+        sync_action = QtWidgets.QAction("Sync now", self)
+        sync_action.setShortcut("Ctrl+Shift+S")
+        sync_action.triggered.connect(self.sync_now)
+        sync_server_action = QtWidgets.QAction("Sync server...", self)
+        sync_server_action.triggered.connect(self.change_sync_server)
+        per_field_action = QtWidgets.QAction("Merge changes per field", self)
+        per_field_action.setCheckable(True)
+        per_field_action.setChecked(self.get_setting("sync_per_field", "1") == "1")
+        per_field_action.toggled.connect(
+            partial(self.set_bool_setting, "sync_per_field"))
+        self.menu_database.addAction(sync_action)
+        self.menu_database.addAction(sync_server_action)
+        self.menu_database.addAction(per_field_action)
+
+    def update_restore_menu(self):
+        """
+        метод для заполнения подменю восстановления списком снимков
+        """
+        self.restore_menu.clear()
+        snapshots = self.database_backup.get_snapshots()
+        for created, path in snapshots:
+            action = QtWidgets.QAction(created.strftime("%d.%m.%Y %H:%M:%S"),
+                                       self.restore_menu)
+            action.triggered.connect(partial(self.confirm_restore_backup, path))
+            self.restore_menu.addAction(action)
+        if not snapshots:
+            action = QtWidgets.QAction("No backups", self.restore_menu)
+            action.setEnabled(False)
+            self.restore_menu.addAction(action)
+
+    def setup_diagnostics_menu(self):
+        """
+        метод для настройки меню Diagnostics
+        """
+        diagnostics_mode_action = QtWidgets.QAction("Diagnostics mode", self)
+        diagnostics_mode_action.setCheckable(True)
+        diagnostics_mode_action.setChecked(self.widget_diagnostics.is_running())
+        diagnostics_mode_action.toggled.connect(self.toggle_diagnostics_mode)
+        report_action = QtWidgets.QAction("Show widgets report", self)
+        report_action.triggered.connect(self.show_diagnostics_report)
+        overlay_action = QtWidgets.QAction("Performance overlay", self)
+        overlay_action.setShortcut("Ctrl+Shift+P")
+        overlay_action.setCheckable(True)
+        overlay_action.setChecked(self.performance_overlay.is_running())
+        overlay_action.toggled.connect(self.toggle_performance_overlay)
+        copy_numbers_action = QtWidgets.QAction("Copy performance numbers", self)
+        copy_numbers_action.triggered.connect(self.copy_performance_numbers)
+        self.menu_diagnostics.addAction(diagnostics_mode_action)
+        self.menu_diagnostics.addAction(report_action)
+        self.menu_diagnostics.addSeparator()
+        self.menu_diagnostics.addAction(overlay_action)
+        self.menu_diagnostics.addAction(copy_numbers_action)
+
+    def toggle_diagnostics_mode(self, enabled: bool):
+        """
+        метод для включения/выключения периодических замеров виджетов и памяти
+        """
+        if enabled:
+            self.widget_diagnostics.start()
+        else:
+            self.widget_diagnostics.stop()
+
+    def toggle_performance_overlay(self, enabled: bool):
+        """
+        метод для показа/скрытия панели с замерами производительности
+        """
+        if enabled:
+            self.performance_overlay.start()
+        else:
+            self.performance_overlay.stop()
+
+    def copy_performance_numbers(self):
+        """
+        метод для копирования текущих замеров производительности в буфер
+        обмена, чтобы их можно было приложить к сообщению об ошибке
+        """
+        QtWidgets.QApplication.clipboard().setText(
+            self.performance_overlay.get_report())
+
+    def show_diagnostics_report(self):
+        """
+        метод для показа отчета о живых виджетах задач и росте памяти
+        """
+        if not self.widget_diagnostics.is_running():
+            self.widget_diagnostics.samples.clear()
+        self.widget_diagnostics.sample()
+        QtWidgets.QMessageBox.information(
+            self, "Widgets report", self.widget_diagnostics.get_report())
 
     def setup_tasks_menu(self):
         """
@@ -134,14 +556,39 @@ class MainWindow(QtWidgets.QMainWindow):
         """
         add_task_action = QtWidgets.QAction("Add new", self)
         add_task_action.setShortcut("Ctrl+N")
-        add_task_action.triggered.connect(self.show_new_task_dialog)
+        # новая задача добавляется в первую колонку таблицы
+        add_task_action.triggered.connect(
+            partial(self.show_new_task_dialog, self.columns[0][0]))
         self.menu_tasks.addAction(add_task_action)
         # создание подменю
         for title, callback in zip(("Export task", "Import task", "Clear task list"),
                                    (self.export_task, self.import_task,
                                     self.confirm_clear_tasks_list)):
-            self.setup_submenu(self.menu_tasks, title,
-                               tuple(enumerate(self.fields)), callback)
+            self.setup_submenu(self.menu_tasks, title, self.columns, callback)
+        filter_bar_action = QtWidgets.QAction("Filter bar", self)
+        filter_bar_action.setShortcut("Ctrl+F")
+        filter_bar_action.setCheckable(True)
+        filter_bar_action.setChecked(not self.filter_bar.isHidden())
+        filter_bar_action.toggled.connect(self.toggle_filter_bar)
+        self.menu_tasks.addAction(filter_bar_action)
+        self.setup_selection_menu()
+
+    def setup_selection_menu(self):
+        """
+        метод для добавления в меню Tasks действий над выделенными задачами
+        """
+        self.menu_tasks.addSeparator()
+        self.setup_submenu(self.menu_tasks, "Move selected",
+                           self.columns, self.move_selected_tasks)
+        for title, shortcut, callback in (
+                ("Recolor selected", None, self.recolor_selected_tasks),
+                ("Delete selected", "Del", self.confirm_delete_selected_tasks),
+                ("Clear selection", "Esc", self.task_selection.clear)):
+            action = QtWidgets.QAction(title, self)
+            if shortcut is not None:
+                action.setShortcut(shortcut)
+            action.triggered.connect(callback)
+            self.menu_tasks.addAction(action)
 
     def setup_tables_menu(self):
         """
@@ -152,9 +599,14 @@ class MainWindow(QtWidgets.QMainWindow):
         add_new_table_action.setShortcut("Ctrl+Shift+N")
         plot_tables_action = QtWidgets.QAction("Save tables plot", self)
         plot_tables_action.triggered.connect(self.plot_tables_statistics)
+        plot_flow_action = QtWidgets.QAction("Save flow analytics", self)
+        plot_flow_action.triggered.connect(self.plot_flow_analytics)
+        deadlines_action = QtWidgets.QAction("Deadlines timeline", self)
+        deadlines_action.triggered.connect(self.deadline_window.show_timeline)
         self.menu_tables.addAction(add_new_table_action)
         # получение информации о всех существующих таблицах
-        tables = self.db_cursor.execute("SELECT * FROM tables").fetchall()
+        with self.connections.reader() as cursor:
+            tables = cursor.execute("SELECT * FROM tables").fetchall()
         # создание подменю
         for title, callback in zip(
             ("Select table", "Delete table", "Change table title"),
@@ -162,6 +614,39 @@ class MainWindow(QtWidgets.QMainWindow):
             self.setup_submenu(self.menu_tables, title,
                                tables, callback, save_action=title == "Select table")
         self.menu_tables.addAction(plot_tables_action)
+        self.menu_tables.addAction(plot_flow_action)
+        self.menu_tables.addAction(deadlines_action)
+        self.setup_columns_menu()
+        self.setup_archive_menu()
+
+    def setup_columns_menu(self):
+        """
+        метод для добавления в меню Tables действий с колонками текущей таблицы
+        """
+        self.menu_tables.addSeparator()
+        add_column_action = QtWidgets.QAction("Add column", self)
+        add_column_action.triggered.connect(self.add_column)
+        self.menu_tables.addAction(add_column_action)
+        for title, callback in zip(("Rename column", "Delete column"),
+                                   (self.rename_column, self.delete_column)):
+            self.setup_submenu(self.menu_tables, title, self.columns, callback)
+
+    def setup_archive_menu(self):
+        """
+        метод для добавления в меню Tables действий с архивом задач
+        """
+        self.menu_tables.addSeparator()
+        archive_action = QtWidgets.QAction("Archive done tasks", self)
+        archive_action.triggered.connect(self.confirm_archive_done_tasks)
+        auto_archive_action = QtWidgets.QAction("Auto archive on start", self)
+        auto_archive_action.setCheckable(True)
+        auto_archive_action.setChecked(self.get_setting("auto_archive") == "1")
+        auto_archive_action.toggled.connect(
+            partial(self.set_bool_setting, "auto_archive"))
+        browse_archive_action = QtWidgets.QAction("Browse archive", self)
+        browse_archive_action.triggered.connect(self.show_archive)
+        for action in (archive_action, auto_archive_action, browse_archive_action):
+            self.menu_tables.addAction(action)
 
     def setup_submenu(self, parent_menu: QtWidgets.QMenu, title: str,
                       tables: list, callback, save_action=False):
@@ -184,21 +669,89 @@ class MainWindow(QtWidgets.QMainWindow):
                 self.tables_actions.append(action)
         parent_menu.addMenu(submenu)
 
-    def setup_scroll_areas(self):
+    def load_columns(self):
+        """
+        метод для загрузки колонок текущей таблицы из базы данных,
+        возвращает True, если колонки изменились
+        """
+        with self.connections.reader() as cursor:
+            columns = cursor.execute("""SELECT layout_id, title FROM columns
+                WHERE table_id = ? ORDER BY layout_id""",
+                                     (self.current_table_id,)).fetchall()
+        changed = columns != self.columns
+        self.columns = columns
+        self.column_titles = dict(columns)
+        self.board_view.set_columns([layout_id for layout_id, _ in columns])
+        return changed
+
+    def update_column_views(self, load_tasks=True):
         """
-        метод для создания и настройки полей прокрутки
+        метод для создания колонок, попавших в окно, и удаления колонок,
+        ушедших за его пределы
+        args(
+            load_tasks: bool - нужно ли загрузить задачи новых колонок из базы данных
+        )
         """
-        self.scroll_areas = [QtWidgets.QScrollArea(
-            self.centralwidget) for _ in range(self.FIELDS_AMOUNT)]
-        self.scroll_inners = [QtWidgets.QWidget()
-                              for _ in range(self.FIELDS_AMOUNT)]
+        visible_ids = self.board_view.visible_ids
+        for layout_id in tuple(self.groupboxes):
+            if layout_id not in visible_ids:
+                self.remove_column_view(layout_id)
+        new_ids = [layout_id for layout_id in visible_ids
+                   if layout_id not in self.groupboxes]
+        for layout_id in new_ids:
+            self.add_column_view(layout_id)
+        # заголовки новых колонок заполняются при следующем подсчете прогресса
+        self.progress_state = None
+        if load_tasks and new_ids:
+            self.show_tasks_from_database(new_ids)
+
+    def add_column_view(self, layout_id: int):
+        """
+        метод для создания виджета колонки и размещения его на доске
+        """
+        column_view = ColumnView(layout_id, self.column_titles.get(layout_id, ""))
+        column_view.add_task_button.clicked.connect(
+            partial(self.show_new_task_dialog, layout_id))
+        column_view.item_added.connect(partial(self.add_draged_widget, layout_id))
+        column_view.scroll_inner.installEventFilter(self.rubber_band_selector)
+        # карточки ниже проверенных фильтром проверяются при прокрутке
+        scroll_bar = column_view.scroll_area.verticalScrollBar()
+        scroll_bar.valueChanged.connect(partial(self.continue_task_filter, layout_id))
+        scroll_bar.rangeChanged.connect(partial(self.continue_task_filter, layout_id))
+        self.groupboxes[layout_id] = column_view
+        self.scroll_areas[layout_id] = column_view.scroll_area
+        self.scroll_inners[layout_id] = column_view.scroll_inner
+        self.scroll_layouts[layout_id] = column_view.scroll_layout
+        # колонка, созданная во время массового изменения, пересчитывается
+        # вместе с остальными при выходе из контекста
+        if self.bulk_depth:
+            column_view.scroll_layout.setEnabled(False)
+        self.board_view.place_column(layout_id, column_view)
+
+    def remove_column_view(self, layout_id: int):
+        """
+        метод для удаления виджета колонки вместе с виджетами её задач,
+        в том числе кэшированными
+        """
+        self.clear_tasks_list(layout_id)
+        # кэшированные виджеты являются дочерними виджетами колонки
+        self.tables_cache.drop_column(layout_id)
+        self.filter_queue.pop(layout_id, None)
+        column_view = self.board_view.take_column(layout_id)
+        for views in (self.groupboxes, self.scroll_areas,
+                      self.scroll_inners, self.scroll_layouts):
+            views.pop(layout_id)
+        column_view.hide()
+        column_view.deleteLater()
 
-        for index, area in enumerate(self.scroll_areas):
-            self.scroll_inners[index].setLayout(self.scroll_layouts[index])
-            area.setWidgetResizable(True)
-            area.setMinimumWidth(175)
-            area.setWidget(self.scroll_inners[index])
-            self.inner_layouts[index].addWidget(area)
+    def setup_task_selection(self):
+        """
+        метод для настройки выделения задач нажатием и рамкой
+        """
+        self.task_selection = TaskSelection()
+        self.rubber_band_selector = RubberBandSelector(self.centralwidget, self)
+        self.rubber_band_selector.area_selected.connect(
+            self.select_tasks_in_area)
 
     def setup_help_messagbox(self):
         """
@@ -222,6 +775,7 @@ class MainWindow(QtWidgets.QMainWindow):
         """
         метод для показа дилога добавления/изменения задачи
         """
+        self.board_view.ensure_column_visible(layout)
         self.new_task_window.show()
         self.active_layout = layout
 
@@ -236,6 +790,9 @@ class MainWindow(QtWidgets.QMainWindow):
             kwargs: dict - дополнительные аргументы для создания виджета задачи
         )
         """
+        # виджет отображает запись задачи из хранилища
+        if kwargs.get("task") is not None:
+            kwargs["task"] = self.task_store.add(kwargs["task"])
         task = TaskWidget(text, layout_id=target_layout_id, **kwargs)
         if from_data is not None:
             task.config_from_data(from_data)
@@ -244,10 +801,369 @@ class MainWindow(QtWidgets.QMainWindow):
         # добавление заадчи в базу данных, если она только что создана
         # при перетаскивании передается аргумент id_: int - id задачи
         if kwargs.get("id_") is None:
-            self.add_task_to_database(task.get_data())
+            task.set_id(self.add_task_to_database(task.get_data()))
+            # id удаленной задачи используется повторно
+            self.task_store.discard(task.get_id())
+        layout = self.scroll_layouts.get(target_layout_id)
+        if layout is None:
+            # задача колонки за пределами окна только сохраняется в базе данных
+            self.dispose_task_widget(task)
+            return
+        self.task_store.add(task.task)
+        self.connect_task_widget(task)
+        self.request_task_preview(task)
+        self.place_task_widget(layout, task)
+
+    def place_task_widget(self, layout: QtWidgets.QVBoxLayout, task: TaskWidget):
+        """
+        метод для добавления виджета задачи в колонку: при сортировке место
+        находится двоичным поиском по уже отсортированной колонке, задачи,
+        не подходящие под фильтр, остаются скрытыми
+        """
+        index = layout.count()
+        if self.task_filter.sort is not None:
+            get_key = self.task_filter.get_sort_key
+            key = get_key(task.task)
+            low = 0
+            while low < index:
+                middle = (low + index) // 2
+                if key < get_key(layout.itemAt(middle).widget().task):
+                    index = middle
+                else:
+                    low = middle + 1
+        layout.insertWidget(index, task)
+        # без явного показа виджет показывается отложенно, уже после пересчета
+        # лэйаута в bulk_update, и каждый показ вызывает новый пересчет
+        task.setVisible(self.task_filter.matches(task.task))
+
+    def refresh_task_widget(self, task: TaskWidget):
+        """
+        метод для обновления места и видимости карточки после изменения
+        данных задачи
+        """
+        layout = self.scroll_layouts.get(task.layout_id)
+        # закрепленная задача не находится в колонке
+        if layout is None or layout.indexOf(task) < 0:
+            return
+        if self.task_filter.sort is not None:
+            layout.removeWidget(task)
+            self.place_task_widget(layout, task)
+        else:
+            task.setVisible(self.task_filter.matches(task.task))
+        if task.isHidden() and task.get_id() in self.task_selection:
+            self.task_selection.deselect(task)
+
+    def apply_task_filter(self, task_filter: TaskFilter):
+        """
+        метод для применения фильтра и сортировки к уже созданным карточкам
+        без их пересоздания: колонки прокручиваются в начало, и сразу
+        проверяются только карточки видимой части колонок с запасом,
+        остальные проверяются при прокрутке, поэтому время применения
+        не зависит от количества карточек в колонках
+        """
+        resort = task_filter.sort != self.task_filter.sort
+        self.task_filter = task_filter
+        # выделенные задачи могут находиться среди еще не проверенных карточек
+        for widget in self.task_selection.get_widgets():
+            if not task_filter.matches(widget.task):
+                self.task_selection.deselect(widget)
+        with self.bulk_update(pause_painting=False):
+            for layout_id, layout in self.scroll_layouts.items():
+                if resort:
+                    self.sort_task_widgets(layout)
+                self.filter_queue[layout_id] = (0, None, 0)
+                self.scroll_areas[layout_id].verticalScrollBar().setValue(0)
+                self.continue_task_filter(layout_id)
+        self.update_filter_counts()
+
+    def continue_task_filter(self, layout_id: int, *_):
+        """
+        метод для проверки фильтром карточек колонки от последней проверенной
+        до видимой части колонки с запасом в FILTER_PAGES высот доски,
+        изменяется видимость только тех карточек, которые перестали или
+        начали подходить под фильтр, высота проверенных карточек
+        оценивается по их sizeHint, так как лэйаут колонки отключен
+        args(
+            layout_id: int - id лэйаута колонки
+        )
+        """
+        queued = self.filter_queue.get(layout_id)
+        if queued is None:
+            return
+        start, last_widget, height = queued
+        layout = self.scroll_layouts[layout_id]
+        # карточки выше проверенных могли быть добавлены или удалены,
+        # тогда проверка продолжается после последней проверенной карточки
+        if last_widget is not None and (layout.itemAt(start - 1) is None
+                                        or layout.itemAt(start - 1).widget()
+                                        is not last_widget):
+            start = 0 if sip.isdeleted(last_widget) else layout.indexOf(last_widget) + 1
+            if not start:
+                height = 0
+        page = self.board_view.height()
+        target = (self.scroll_areas[layout_id].verticalScrollBar().value()
+                  + page * (1 + self.FILTER_PAGES))
+        # проверка продолжается, когда запаса остается меньше одной высоты доски
+        if height >= target - page:
+            return
+        matches = self.task_filter.matches
+        spacing = layout.spacing()
+        count = layout.count()
+        with self.bulk_update(pause_painting=False):
+            while start < count and height < target:
+                widget = layout.itemAt(start).widget()
+                start += 1
+                last_widget = widget
+                visible = matches(widget.task)
+                if widget.isHidden() == visible:
+                    widget.setVisible(visible)
+                    if not visible and widget.get_id() in self.task_selection:
+                        self.task_selection.deselect(widget)
+                if visible:
+                    height += widget.sizeHint().height() + spacing
+            # очередь обновляется до пересчета лэйаута, который изменяет
+            # диапазон прокрутки и снова вызывает этот метод
+            if start < count:
+                self.filter_queue[layout_id] = (start, last_widget, height)
+            else:
+                del self.filter_queue[layout_id]
+
+    def sort_task_widgets(self, layout: QtWidgets.QVBoxLayout):
+        """
+        метод для перестановки карточек колонки в порядке сортировки доски
+        без их пересоздания, переставляются элементы лэйаута, поэтому
+        виджеты не добавляются в колонку заново
+        """
+        get_key = self.task_filter.get_sort_key
+        # элементы извлекаются с конца, чтобы лэйаут не сдвигал остальные
+        items = [layout.takeAt(index) for index in reversed(range(layout.count()))]
+        items.sort(key=lambda item: get_key(item.widget().task))
+        for item in items:
+            layout.addItem(item)
+
+    def update_filter_counts(self):
+        """
+        метод для обновления количества подходящих задач и списка цветов
+        текущей таблицы на панели фильтра
+        """
+        if self.filter_bar.isHidden():
+            return
+        table_id = self.current_table_id
+        task_filter = self.task_filter
+        self.connections.run_read(
+            lambda cursor: (task_filter.count_matches(cursor, table_id),
+                            TaskFilter.read_colors(cursor, table_id)),
+            self.show_filter_counts)
+
+    def show_filter_counts(self, result):
+        """
+        метод для вывода результата update_filter_counts
+        """
+        (total, matched), colors = result
+        self.filter_bar.set_counts(total, matched)
+        self.filter_bar.set_colors(colors)
+
+    def toggle_filter_bar(self, enabled: bool):
+        """
+        метод для показа и скрытия панели фильтра, скрытие панели
+        сбрасывает фильтр
+        """
+        self.filter_bar.setVisible(enabled)
+        if enabled:
+            self.update_filter_counts()
+        elif self.task_filter != TaskFilter():
+            self.filter_bar.reset()
+
+    @contextmanager
+    def bulk_update(self, pause_painting=True):
+        """
+        метод-контекст для массовых изменений списков задач: перерисовка доски
+        и пересчет лэйаутов всех колонок откладываются до выхода из контекста,
+        после чего каждый лэйаут пересчитывается один раз, вложенные
+        контексты объединяются с внешним
+        args(
+            pause_painting: bool - нужно ли отключать перерисовку доски, её
+                                   отключение и включение обходит все виджеты
+                                   доски, поэтому для частых небольших
+                                   изменений отключается только пересчет
+        )
+        """
+        self.bulk_depth += 1
+        painting_paused = self.bulk_depth == 1 and pause_painting
+        if painting_paused:
+            self.centralwidget.setUpdatesEnabled(False)
+        if self.bulk_depth == 1:
+            for layout in self.scroll_layouts.values():
+                layout.setEnabled(False)
+        try:
+            yield
+        finally:
+            self.bulk_depth -= 1
+            if not self.bulk_depth:
+                for layout in self.scroll_layouts.values():
+                    layout.setEnabled(True)
+                    layout.activate()
+            if painting_paused:
+                self.centralwidget.setUpdatesEnabled(True)
+
+    def connect_task_widget(self, task: TaskWidget):
+        """
+        метод для подключения сигналов виджета задачи
+        """
         task.config_button.clicked.connect(
             partial(self.configure_task, task))
-        self.scroll_layouts[target_layout_id].addWidget(task)
+        task.selection_clicked.connect(partial(self.handle_task_click, task))
+        task.widget_closed.connect(partial(self.unpin_task, task))
+
+    def dispose_task_widget(self, task: TaskWidget):
+        """
+        метод для удаления виджета задачи, уже убранного из лэйаута, все
+        виджеты задач удаляются только через этот метод
+        """
+        self.task_selection.discard(task.get_id())
+        if self.active_task is task:
+            self.active_task = None
+        if self.pinned_task is task:
+            self.pinned_task = None
+        # скрытый виджет удаляется без перерисовки родителя
+        task.hide()
+        task.deleteLater()
+
+    def request_task_preview(self, task: TaskWidget):
+        """
+        метод для запроса миниатюры файла задачи, миниатюры, которых нет
+        в памяти, отображаются после создания в фоне
+        """
+        if task.task.file_path is None:
+            task.set_preview(None)
+            return
+        preview = self.attachment_previews.request(task.task.file_path)
+        if preview is not None:
+            image, metadata = preview
+            task.set_preview(image, describe_preview(metadata))
+
+    def show_attachment_preview(self, file_path: str, image, metadata):
+        """
+        метод для отображения готовой миниатюры на задачах с этим файлом
+        """
+        description = describe_preview(metadata)
+        for layout in self.scroll_layouts.values():
+            for index in range(layout.count()):
+                widget = layout.itemAt(index).widget()
+                if widget is not None and widget.task.file_path == file_path:
+                    widget.set_preview(image, description)
+
+    def handle_task_click(self, task: TaskWidget, modifiers: int):
+        """
+        метод для изменения выделения при нажатии на задачу
+        args(
+            task: TaskWidget - задача, на которую нажали,
+            modifiers: int - нажатые клавиши-модификаторы
+        )
+        """
+        if modifiers & QtCore.Qt.ControlModifier:
+            self.task_selection.toggle(task)
+        elif modifiers & QtCore.Qt.ShiftModifier:
+            self.task_selection.select_range(
+                self.scroll_layouts[task.layout_id], task)
+        # нажатие на уже выделенную задачу сохраняет выделение для перетаскивания
+        elif task.get_id() not in self.task_selection:
+            self.task_selection.select_only(task)
+
+    def select_tasks_in_area(self, area: QtCore.QRect, additive: bool):
+        """
+        метод для выделения задач, видимая часть которых попала в рамку
+        """
+        if not additive:
+            self.task_selection.clear()
+        board_viewport = self.board_view.viewport()
+        board_area = QtCore.QRect(board_viewport.mapTo(
+            self.centralwidget, QtCore.QPoint(0, 0)), board_viewport.size())
+        for layout_id, layout in self.scroll_layouts.items():
+            viewport = self.scroll_areas[layout_id].viewport()
+            # колонки за краями окна создаются заранее, но не выделяются
+            visible_area = QtCore.QRect(viewport.mapTo(
+                self.centralwidget, QtCore.QPoint(0, 0)),
+                viewport.size()).intersected(board_area)
+            selected_area = area.intersected(visible_area)
+            if selected_area.isEmpty():
+                continue
+            for item_index in range(layout.count()):
+                widget = layout.itemAt(item_index).widget()
+                if widget.isHidden():
+                    continue
+                geometry = QtCore.QRect(widget.mapTo(
+                    self.centralwidget, QtCore.QPoint(0, 0)), widget.size())
+                if geometry.intersects(selected_area):
+                    self.task_selection.select(widget)
+
+    def move_selected_tasks(self, layout_id: int):
+        """
+        метод для перемещения выделенных задач в заданный список
+        одной транзакцией
+        """
+        widgets = self.task_selection.get_widgets()
+        self.db_cursor.executemany(
+            "UPDATE tasks SET layout_id = ? WHERE id = ?",
+            [(layout_id, widget.get_id()) for widget in widgets])
+        self.db_connection.commit()
+        target_layout = self.scroll_layouts.get(layout_id)
+        with self.bulk_update():
+            for widget in widgets:
+                self.scroll_layouts[widget.layout_id].removeWidget(widget)
+                if target_layout is None:
+                    # колонка за пределами окна загрузит задачи при прокрутке к ней
+                    self.dispose_task_widget(widget)
+                    continue
+                widget.set_new_layout_id(layout_id)
+                self.place_task_widget(target_layout, widget)
+
+    def recolor_selected_tasks(self):
+        """
+        метод для изменения цвета выделенных задач одной транзакцией
+        """
+        widgets = self.task_selection.get_widgets()
+        if not widgets:
+            return
+        new_color = QtWidgets.QColorDialog.getColor()
+        if new_color.isValid():
+            self.db_cursor.executemany(
+                "UPDATE tasks SET color = ? WHERE id = ?",
+                [(new_color.name(), widget.get_id()) for widget in widgets])
+            self.db_connection.commit()
+            with self.bulk_update():
+                for widget in widgets:
+                    widget.set_color(new_color.name())
+                    self.refresh_task_widget(widget)
+
+    def confirm_delete_selected_tasks(self):
+        """
+        метод для показа диалога подтверждения удаления выделенных задач
+        """
+        if not len(self.task_selection):
+            return
+        responce = QtWidgets.QMessageBox.warning(
+            None, "Warning",
+            f"{len(self.task_selection)} selected tasks will be permanently deleted.\nContinue?",
+            QtWidgets.QMessageBox.Ok, QtWidgets.QMessageBox.Cancel)
+        if responce == QtWidgets.QMessageBox.Ok:
+            self.delete_selected_tasks()
+
+    def delete_selected_tasks(self):
+        """
+        метод для удаления выделенных задач одной транзакцией
+        """
+        widgets = self.task_selection.get_widgets()
+        self.db_cursor.executemany("DELETE FROM tasks WHERE id = ?",
+                                   [(widget.get_id(),) for widget in widgets])
+        self.db_connection.commit()
+        for widget in widgets:
+            self.task_store.discard(widget.get_id())
+        self.task_selection.clear()
+        with self.bulk_update():
+            for widget in widgets:
+                self.scroll_layouts[widget.layout_id].removeWidget(widget)
+                self.dispose_task_widget(widget)
 
     def handle_task_button(self):
         """
@@ -279,8 +1195,14 @@ class MainWindow(QtWidgets.QMainWindow):
         if pinned_task is not None:
             self.active_task = pinned_task
         if data["text"]:
-            self.active_task.config_from_data(data)
-            self.update_task_in_database(self.active_task.get_data())
+            task = self.active_task
+            # неизмененная задача не перезаписывается в базе данных
+            if (data["text"], data["color"], data["attachments"]) != (
+                    task.text, task.color, task.attachments):
+                task.config_from_data(data)
+                self.request_task_preview(task)
+                self.update_task_in_database(task.get_data())
+                self.refresh_task_widget(task)
             self.new_task_window.reset_fields()
             self.new_task_window.close()
 
@@ -289,32 +1211,65 @@ class MainWindow(QtWidgets.QMainWindow):
         метод для изменения задачи в диалоговом окне
         """
         self.active_task = task
-        self.new_task_window.reset_fields(reset_flags=False)
-        # подготовка полей диалогового окна
-        self.new_task_window.fill_from_task(
-            task.text, task.color, task.attachments)
-        # подключение кнопок удаления и закрепления задачи
-        self.new_task_window.main_tab.delete_button.clicked.connect(
-            self.delete_task)
-        self.new_task_window.main_tab.pin_button.clicked.connect(
-            partial(self.pin_task, task))
-        self.new_task_window.show()
+        self.new_task_window.begin_session(
+            task.get_id(), task.text, task.color, task.attachments)
+
+    def configure_task_by_id(self, task_id: int):
+        """
+        метод для изменения задачи любой таблицы по её id, таблица задачи
+        открывается, а её колонка прокручивается в окно
+        """
+        if task_id in self.pinned_windows:
+            self.configure_task(self.pinned_windows[task_id])
+            return
+        row = self.db_cursor.execute("SELECT table_id, layout_id FROM tasks WHERE id = ?",
+                                     (task_id,)).fetchone()
+        if row is None:
+            return
+        table_id, layout_id = row
+        if table_id != self.current_table_id:
+            self.load_table(table_id)
+        # колонки за пределами окна создаются при прокрутке доски
+        self.board_view.ensure_column_visible(layout_id)
+        task = self.find_task_widget(task_id)
+        if task is not None:
+            self.configure_task(task)
+
+    def is_active_task(self, task_id: int):
+        """
+        метод для проверки, что диалог привязан к задаче, открытой для изменения
+        """
+        return self.active_task is not None and self.active_task.get_id() == task_id
+
+    def pin_active_task(self, task_id: int):
+        """
+        метод для закрепления задачи, открытой в диалоговом окне
+        """
+        if self.is_active_task(task_id):
+            self.pin_task(self.active_task)
 
-    def delete_task(self):
+    def delete_task(self, task_id: int):
+        """
+        метод для удаления задачи, открытой в диалоговом окне
+        """
+        if not self.is_active_task(task_id):
+            return
         responce = QtWidgets.QMessageBox.warning(
             None, "Warning", "Task will be permanently deleted.\nContinue?",
             QtWidgets.QMessageBox.Ok, QtWidgets.QMessageBox.Cancel)
         if responce == QtWidgets.QMessageBox.Ok:
-            self.delete_task_from_database(self.active_task.get_id())
-            self.delete_copied_widget(self.active_task.get_id())
-            if self.active_task.get_id() in self.pinned_tasks_ids:
-                self.active_task.close()
+            task = self.active_task
+            self.delete_task_from_database(task_id)
+            self.delete_copied_widget(task_id)
+            if task_id in self.pinned_tasks_ids:
+                task.close()
             self.new_task_window.close()
 
     def export_task(self, layout_id: int):
         """
         метод для экспорта задачи из заданного лэйаута
         """
+        self.board_view.ensure_column_visible(layout_id)
         text = self.get_text_for_export_dialog(layout_id)
         if text:
             # получение задачи для экспорта
@@ -371,36 +1326,131 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def import_task(self, layout_id: int):
         """
-        метод для импорта задачи в заданный лэйаут
+        метод для импорта задач из файла JSON, JSONL или CSV в заданный лэйаут
         """
         file_path = QtWidgets.QFileDialog.getOpenFileName(
-            None, "Save task", "", "Json (*.json)")[0]
-        if file_path:
+            None, "Import tasks", "", TaskImporter.FILE_FILTER)[0]
+        if not file_path:
+            return
+        if not self.task_importer.start_import(file_path, layout_id):
+            QtWidgets.QMessageBox.warning(
+                self, "Import is running",
+                "Wait for the current import to finish.",
+                QtWidgets.QMessageBox.Ok)
+            return
+        self.import_progress = QtWidgets.QProgressDialog(
+            "Checking tasks...", "Cancel", 0, 0, self)
+        self.import_progress.setWindowTitle("Import tasks")
+        self.import_progress.setWindowModality(QtCore.Qt.WindowModal)
+        self.import_progress.setMinimumDuration(0)
+        self.import_progress.canceled.connect(self.cancel_import)
+        self.import_progress.show()
+
+    def show_import_progress(self, done: int, total: int):
+        """
+        метод для отображения проверенной части файла в килобайтах
+        """
+        if self.import_progress is not None:
+            self.import_progress.setMaximum(total)
+            self.import_progress.setValue(done)
+
+    def close_import_progress(self):
+        """
+        метод для закрытия диалога хода импорта
+        """
+        if self.import_progress is not None:
+            self.import_progress.canceled.disconnect(self.cancel_import)
+            self.import_progress.close()
+            self.import_progress.deleteLater()
+            self.import_progress = None
+
+    def cancel_import(self):
+        """
+        метод для отмены импорта из диалога хода импорта
+        """
+        self.task_importer.cancel()
+        self.close_import_progress()
+
+    def handle_import_failed(self, error: str):
+        """
+        метод для показа ошибки чтения импортируемого файла
+        """
+        self.close_import_progress()
+        QtWidgets.QMessageBox.warning(
+            self, "Invalid file",
+            f"Unable to read the task file.\n({error})",
+            QtWidgets.QMessageBox.Ok)
+
+    def insert_imported_tasks(self, layout_id: int, rows: list, errors: list):
+        """
+        метод для добавления проверенных задач в базу данных одной транзакцией
+        и показа отчета об ошибочных записях
+        args(
+            layout_id: int - id лэйаута, в который импортируются задачи,
+            rows: list - строки вида (comment, color, attachments, checklist_done,
+                         checklist_total, deadline_date, file_path),
+            errors: list - список вида [(номер записи, текст ошибки), ...]
+        )
+        """
+        self.close_import_progress()
+        if rows:
             try:
-                with open(file_path, "r", encoding="u8") as f:
-                    task_data = json.load(f)
-                self.add_task(target_layout_id=layout_id, from_data=task_data)
-            except Exception:
+                # блокировка записи берется до вычисления id, чтобы другие
+                # экземпляры приложения не заняли те же id
+                self.db_cursor.execute("BEGIN IMMEDIATE")
+                start_id = self.db_cursor.execute(
+                    "SELECT COALESCE(MAX(id), -1) + 1 FROM tasks").fetchone()[0]
+                self.db_cursor.executemany(f"""INSERT INTO tasks
+                    (id, comment, color, attachments, checklist_done, checklist_total,
+                    deadline_date, file_path, table_id, layout_id, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, round({NOW}, 3))""",
+                                           [(start_id + index, *row,
+                                             self.current_table_id, layout_id)
+                                            for index, row in enumerate(rows)])
+                self.db_connection.commit()
+            except sqlite3.Error as err:
+                self.db_connection.rollback()
                 QtWidgets.QMessageBox.warning(
-                    self, "Invalid file",
-                    "You have selected invalid task file.",
-                    QtWidgets.QMessageBox.Ok)
+                    self, "Import failed",
+                    f"Unable to save {len(rows)} imported tasks, "
+                    f"the file can be imported again.\n({err})")
+                return
+            # задачи списка загружаются заново одним запросом
+            with self.bulk_update():
+                self.clear_tasks_list(layout_id)
+                if layout_id in self.scroll_layouts:
+                    self.show_tasks_from_database([layout_id])
+            self.board_view.ensure_column_visible(layout_id)
+        message = f"{len(rows)} tasks imported."
+        if errors:
+            message += f"\n{len(errors)} records skipped:\n" + "\n".join(
+                f"record {number}: {error}" for number, error in errors[:20])
+            if len(errors) > 20:
+                message += f"\n... and {len(errors) - 20} more"
+        QtWidgets.QMessageBox.information(self, "Import tasks", message)
 
     def delete_copied_widget(self, target_id: int):
         """
         метод для удаления виджета задачи после перетаскивания из стартового лэйаута
         """
-        for layout in self.scroll_layouts:
+        for layout in self.scroll_layouts.values():
             for index in range(layout.count()):
                 widget = layout.itemAt(index).widget()
                 if widget.get_id() == target_id:
-                    widget.deleteLater()
+                    layout.removeWidget(widget)
+                    self.dispose_task_widget(widget)
                     return
 
     def create_database(self):
         """
         метод для создания таблиц в базе данных, если их не существует
         """
+        # свободные страницы новой базы данных возвращаются файлу по частям
+        # во время обслуживания, старые базы данных переводятся в этот режим там же
+        self.db_cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        # WAL позволяет нескольким экземплярам приложения читать базу данных
+        # одновременно с записью в неё
+        self.db_cursor.execute("PRAGMA journal_mode=WAL")
         self.db_cursor.executescript("""
             CREATE TABLE IF NOT EXISTS tables(
                 id INTEGER PRIMARY KEY,
@@ -412,7 +1462,81 @@ class MainWindow(QtWidgets.QMainWindow):
                 attachments TEXT,
                 table_id INTEGER,
                 layout_id INTEGER,
-                FOREIGN KEY(table_id) REFERENCES tables(id))""")
+                done_at REAL,
+                checklist_done INTEGER DEFAULT 0,
+                checklist_total INTEGER DEFAULT 0,
+                deadline_date TEXT,
+                file_path TEXT,
+                created_at REAL,
+                FOREIGN KEY(table_id) REFERENCES tables(id));
+            CREATE TABLE IF NOT EXISTS settings(
+                key TEXT PRIMARY KEY,
+                value TEXT);
+            CREATE INDEX IF NOT EXISTS tasks_table_layout
+                ON tasks(table_id, layout_id);""")
+        if self.add_missing_columns("tasks", (("done_at", "REAL"),)):
+            # выполненные задачи из старой базы данных считаются
+            # выполненными в момент обновления
+            self.db_cursor.execute("""UPDATE tasks
+                SET done_at = strftime('%s', 'now') WHERE layout_id = 3""")
+        if self.add_missing_columns("tasks", (("file_path", "TEXT"),)):
+            # путь к файлу достается из json без его разбора в python
+            self.db_cursor.execute("""UPDATE tasks
+                SET file_path = NULLIF(json_extract(attachments, '$.file'), '')""")
+        if self.add_missing_columns("tasks", (
+                ("checklist_done", "INTEGER DEFAULT 0"),
+                ("checklist_total", "INTEGER DEFAULT 0"),
+                ("deadline_date", "TEXT"))):
+            self.fill_tasks_summary()
+        # время создания вместе с id отличает задачу от другой задачи
+        # с тем же id, созданной в другой базе данных до синхронизации
+        self.add_missing_columns("tasks", (("created_at", "REAL"),))
+        self.db_cursor.executescript("""
+            CREATE INDEX IF NOT EXISTS tasks_table_deadline
+                ON tasks(table_id, deadline_date);
+            CREATE INDEX IF NOT EXISTS tasks_table_color
+                ON tasks(table_id, color);
+            CREATE TABLE IF NOT EXISTS pinned_tasks(
+                task_id INTEGER PRIMARY KEY,
+                x INTEGER,
+                y INTEGER,
+                width INTEGER,
+                height INTEGER,
+                stay_on_top INTEGER DEFAULT 1);
+            CREATE TRIGGER IF NOT EXISTS unpin_deleted_task AFTER DELETE ON tasks
+            BEGIN
+                DELETE FROM pinned_tasks WHERE task_id = OLD.id;
+            END;
+            CREATE TRIGGER IF NOT EXISTS pin_renumbered_task AFTER UPDATE OF id ON tasks
+            WHEN OLD.id IS NOT NEW.id
+            BEGIN
+                UPDATE pinned_tasks SET task_id = NEW.id WHERE task_id = OLD.id;
+            END;
+            CREATE INDEX IF NOT EXISTS tasks_id ON tasks(id);""")
+        # запоминание времени попадания задачи в список "Done" для архивации
+        self.db_cursor.executescript("""
+            CREATE TRIGGER IF NOT EXISTS set_done_time_on_insert
+            AFTER INSERT ON tasks WHEN NEW.layout_id = 3 AND NEW.done_at IS NULL
+            BEGIN
+                UPDATE tasks SET done_at = strftime('%s', 'now')
+                WHERE rowid = NEW.rowid;
+            END;
+            CREATE TRIGGER IF NOT EXISTS set_done_time_on_move
+            AFTER UPDATE OF layout_id ON tasks
+            WHEN NEW.layout_id = 3 AND OLD.layout_id != 3
+            BEGIN
+                UPDATE tasks SET done_at = strftime('%s', 'now')
+                WHERE rowid = NEW.rowid;
+            END;""")
+        # время создания задач, добавленных без него, например из архива
+        self.db_cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS set_created_time_on_insert
+            AFTER INSERT ON tasks WHEN NEW.created_at IS NULL
+            BEGIN
+                UPDATE tasks SET created_at = round({NOW}, 3)
+                WHERE rowid = NEW.rowid;
+            END""")
+        self.create_columns_table()
         # создание таблицы по умолчанию, если не существует других
         if not len(self.db_cursor.execute("SELECT * FROM tables").fetchall()):
             self.db_cursor.execute(
@@ -420,20 +1544,115 @@ class MainWindow(QtWidgets.QMainWindow):
                     VALUES (NULL, 'default')""")
         self.db_connection.commit()
 
+    def create_columns_table(self):
+        """
+        метод для создания таблицы колонок досок, каждая новая таблица
+        получает колонки по умолчанию, id лэйаута 3 по-прежнему означает
+        список "Done"
+        """
+        default_columns = ", ".join(
+            f"(NEW.id, {layout_id}, '{title}')"
+            for layout_id, title in enumerate(self.DEFAULT_COLUMNS))
+        self.db_cursor.executescript(f"""
+            CREATE TABLE IF NOT EXISTS columns(
+                table_id INTEGER,
+                layout_id INTEGER,
+                title TEXT,
+                PRIMARY KEY(table_id, layout_id),
+                FOREIGN KEY(table_id) REFERENCES tables(id));
+            CREATE TRIGGER IF NOT EXISTS add_default_columns AFTER INSERT ON tables
+            BEGIN
+                INSERT INTO columns(table_id, layout_id, title)
+                VALUES {default_columns};
+            END;
+            CREATE TRIGGER IF NOT EXISTS delete_table_columns AFTER DELETE ON tables
+            BEGIN
+                DELETE FROM columns WHERE table_id = OLD.id;
+            END;""")
+        # таблицы старой базы данных получают колонки по умолчанию
+        tables_ids = [row[0] for row in self.db_cursor.execute("""SELECT id
+            FROM tables WHERE id NOT IN (SELECT table_id FROM columns)""")]
+        self.db_cursor.executemany(
+            "INSERT INTO columns(table_id, layout_id, title) VALUES (?, ?, ?)",
+            [(table_id, layout_id, title) for table_id in tables_ids
+             for layout_id, title in enumerate(self.DEFAULT_COLUMNS)])
+
+    def add_missing_columns(self, table: str, columns: tuple):
+        """
+        метод для добавления новых столбцов в таблицы старых баз данных,
+        возвращает список добавленных столбцов
+        args(
+            table: str - название таблицы,
+            columns: tuple - кортеж вида ((название, тип), ...)
+        )
+        """
+        existing_columns = {row[1] for row in self.db_cursor.execute(
+            f"PRAGMA table_info({table})")}
+        added_columns = []
+        for name, type_ in columns:
+            if name not in existing_columns:
+                self.db_cursor.execute(
+                    f"ALTER TABLE {table} ADD COLUMN {name} {type_}")
+                added_columns.append(name)
+        return added_columns
+
+    def fill_tasks_summary(self):
+        """
+        метод для заполнения сводки по обвесам задач из старой базы данных
+        """
+        rows = self.db_cursor.execute("""SELECT id, attachments FROM tasks
+            WHERE attachments IS NOT NULL""").fetchall()
+        self.db_cursor.executemany("""UPDATE tasks SET checklist_done = ?,
+            checklist_total = ?, deadline_date = ?, file_path = ? WHERE id = ?""",
+                                   [(*Task.get_summary(json.loads(attachments)), id_)
+                                    for id_, attachments in rows])
+
+    def get_setting(self, key: str, default=None):
+        """
+        метод для получения сохраненной настройки приложения
+        """
+        row = self.db_cursor.execute(
+            "SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+        return default if row is None else row[0]
+
+    def set_setting(self, key: str, value):
+        """
+        метод для сохранения настройки приложения
+        """
+        self.db_cursor.execute("""INSERT OR REPLACE INTO settings(key, value)
+            VALUES (?, ?)""", (key, str(value)))
+        self.db_connection.commit()
+
+    def set_bool_setting(self, key: str, value: bool):
+        """
+        метод для сохранения флага в настройках приложения
+        """
+        self.set_setting(key, int(value))
+
     def add_task_to_database(self, task_data):
         """
-        метод для добавления задачи в базу данных
+        метод для добавления задачи в базу данных, возвращает id новой задачи
         """
         # конвертация словаря словаря с обвесами в формат json
         if task_data["attachments"] is not None:
             task_data["attachments"] = json.dumps(task_data["attachments"])
         # id таблицы, в которой находится задача
         task_data["table_id"] = self.current_table_id
-        task_data["layout_id"] = self.active_layout
-        self.db_cursor.execute("""INSERT INTO tasks VALUES
-            (:id, :text, :color, :attachments, :table_id, :layout_id)""",
+        # id вычисляется внутри запроса, чтобы задачи, созданные
+        # одновременно в разных экземплярах приложения, не получили одинаковый id
+        self.db_cursor.execute(f"""INSERT INTO tasks
+            (id, comment, color, attachments, table_id, layout_id,
+            checklist_done, checklist_total, deadline_date, file_path, created_at)
+            VALUES ((SELECT COALESCE(MAX(id), -1) + 1 FROM tasks),
+            :text, :color, :attachments, :table_id, :layout_id,
+            :checklist_done, :checklist_total, :deadline_date, :file_path,
+            round({NOW}, 3))""",
                                task_data)
+        new_id = self.db_cursor.execute(
+            "SELECT id FROM tasks WHERE rowid = ?",
+            (self.db_cursor.lastrowid,)).fetchone()[0]
         self.db_connection.commit()
+        return new_id
 
     def set_start_task_id(self):
         """
@@ -447,27 +1666,37 @@ class MainWindow(QtWidgets.QMainWindow):
         finally:
             TaskWidget.set_start_id(new_id)
 
-    def show_tasks_from_database(self):
+    def show_tasks_from_database(self, layouts_ids=None):
         """
         метод для загрузки задач из базы данных
+        args(
+            layouts_ids: list - id лэйаутов, задачи которых нужно загрузить,
+                                по умолчанию все созданные колонки
+        )
         """
-        tasks = self.db_cursor.execute("""SELECT * FROM tasks
-            WHERE table_id = ?""", (self.current_table_id,))
+        if layouts_ids is None:
+            layouts_ids = tuple(self.scroll_layouts)
+        placeholders = ", ".join("?" * len(layouts_ids))
+        with self.connections.reader() as cursor:
+            tasks = cursor.execute(f"""SELECT id, comment, color,
+                attachments, layout_id, checklist_done, checklist_total,
+                deadline_date, file_path FROM tasks
+                WHERE table_id = ? AND layout_id IN ({placeholders})
+                AND id NOT IN (SELECT task_id FROM pinned_tasks)
+                {self.task_filter.get_order()}""",
+                                   (self.current_table_id, *layouts_ids)).fetchall()
         self.mark_selected_table()
-        for task in tasks:
-            if task[0] not in self.pinned_tasks_ids:
+        with self.bulk_update():
+            for task in tasks:
                 self.add_task_from_database(task)
 
     def add_task_from_database(self, task_data):
         """
         метод для создания задачи из информации из строки базы данных
         """
-        id_, text, color, attachments, table_id, layout_id = task_data
-        if attachments is not None:
-            attachments = json.loads(attachments)
-        self.add_task(text=text, target_layout_id=layout_id,
-                      attachments=attachments, color=color,
-                      parent=self.centralwidget, id_=id_)
+        task = Task.from_row(task_data)
+        self.add_task(target_layout_id=task.layout_id,
+                      parent=self.centralwidget, id_=task.id, task=task)
 
     def update_task_in_database(self, task_data):
         """
@@ -475,14 +1704,15 @@ class MainWindow(QtWidgets.QMainWindow):
         """
         if task_data["attachments"] is not None:
             task_data["attachments"] = json.dumps(task_data["attachments"])
-        task_data["table_id"] = self.current_table_id
         self.db_cursor.execute("""UPDATE tasks SET
-            id = id,
             comment = :text,
             color = :color,
             attachments = :attachments,
-            table_id = :table_id,
-            layout_id = :layout_id
+            layout_id = :layout_id,
+            checklist_done = :checklist_done,
+            checklist_total = :checklist_total,
+            deadline_date = :deadline_date,
+            file_path = :file_path
             WHERE id = :id""", task_data)
         self.db_connection.commit()
 
@@ -493,6 +1723,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.db_cursor.execute("""DELETE FROM tasks
             WHERE id = ?""", (task_id,))
         self.db_connection.commit()
+        self.task_store.discard(task_id)
 
     def add_draged_widget(self, groupbox_id: int):
         """
@@ -500,14 +1731,23 @@ class MainWindow(QtWidgets.QMainWindow):
         """
         # получение информации о виджете
         task_data = self.groupboxes[groupbox_id].get_drop_data()
+        # перетаскивание одной из выделенных задач перемещает всё выделение
+        if task_data["id"] in self.task_selection and len(self.task_selection) > 1:
+            self.move_selected_tasks(groupbox_id)
+            return
         # удаление виджета в стартовом лэйауте
         self.delete_copied_widget(task_data["id"])
-        task = TaskWidget(task_data["text"], task_data["color"],
-                          id_=task_data["id"], layout_id=groupbox_id)
-        if task_data["attachments"] is not None:
-            task.set_attachments(task_data["attachments"])
-        task.config_button.clicked.connect(partial(self.configure_task, task))
-        self.scroll_layouts[groupbox_id].addWidget(task)
+        # новый виджет отображает те же данные задачи, что и удаленный
+        task_record = self.task_store.get(task_data["id"])
+        if task_record is None:
+            task_record = self.task_store.add(Task(
+                task_data["id"], task_data["text"], task_data["color"],
+                task_data["attachments"]))
+        task_record.layout_id = groupbox_id
+        task = TaskWidget(task=task_record)
+        self.connect_task_widget(task)
+        self.request_task_preview(task)
+        self.place_task_widget(self.scroll_layouts[groupbox_id], task)
         # обновление id лэйаута у задачи в базе данных
         self.db_cursor.execute("""UPDATE tasks SET
             id = id,
@@ -523,21 +1763,43 @@ class MainWindow(QtWidgets.QMainWindow):
         """
         метод для очистки списка задач и удаления их из базы данных
         """
-        for layout_id in args:
-            layout = self.scroll_layouts[layout_id]
-            for index in range(layout.count()):
-                widget = layout.itemAt(index).widget()
-                if delete_from_database:
-                    self.delete_task_from_database(widget.get_id())
-                widget.deleteLater()
+        if delete_from_database:
+            self.delete_tasks_list_from_database(args)
+        with self.bulk_update():
+            for layout_id in args:
+                layout = self.scroll_layouts.get(layout_id)
+                # задачи колонки за пределами окна не имеют виджетов
+                if layout is None:
+                    continue
+                for index in reversed(range(layout.count())):
+                    self.dispose_task_widget(layout.takeAt(index).widget())
+
+    def delete_tasks_list_from_database(self, layouts_ids):
+        """
+        метод для удаления всех задач заданных списков текущей таблицы
+        одной транзакцией, закрепленные задачи не удаляются
+        """
+        for layout_id in layouts_ids:
+            for (task_id,) in self.db_cursor.execute("""SELECT id FROM tasks
+                WHERE table_id = ? AND layout_id = ?
+                AND id NOT IN (SELECT task_id FROM pinned_tasks)""",
+                                                     (self.current_table_id, layout_id)):
+                self.task_store.discard(task_id)
+        self.db_cursor.executemany("""DELETE FROM tasks
+            WHERE table_id = ? AND layout_id = ?
+            AND id NOT IN (SELECT task_id FROM pinned_tasks)""",
+                                   [(self.current_table_id, layout_id)
+                                    for layout_id in layouts_ids])
+        self.db_connection.commit()
 
     def confirm_clear_tasks_list(self, list_id: int):
         """
         метод для показа диалога подтверждения очистики списка задач
         """
+        self.board_view.ensure_column_visible(list_id)
         # проверка на наличие задач с выбранном списке
         enough_tasks_in_list = self.scroll_layouts[list_id].count() > 0
-        warning_message = f"All tasks from {self.fields[list_id]} list wil be deleted.\nContinue?"
+        warning_message = f"All tasks from {self.column_titles[list_id]} list wil be deleted.\nContinue?"
         if not enough_tasks_in_list:
             warning_message = "You can't clear empty list."
         responce = QtWidgets.QMessageBox.warning(None, "Warning",
@@ -547,13 +1809,89 @@ class MainWindow(QtWidgets.QMainWindow):
         if responce == QtWidgets.QMessageBox.Ok and enough_tasks_in_list:
             self.clear_tasks_list(list_id, delete_from_database=True)
 
-    def load_table(self, table_id: int):
+    def load_table(self, table_id: int, cache_current=True):
         """
         метод для отображения выбранной таблицы
+        args(
+            table_id: int - id таблицы, которую нужно отобразить,
+            cache_current: bool - нужно ли сохранить виджеты текущей таблицы в кэш
+        )
         """
-        self.current_table_id = table_id
-        self.clear_tasks_list(0, 1, 2, 3)
-        self.show_tasks_from_database()
+        self.task_selection.clear()
+        with self.bulk_update():
+            if cache_current and table_id != self.current_table_id:
+                self.cache_current_table()
+            else:
+                self.clear_tasks_list(*self.scroll_layouts)
+                self.release_task_records()
+            self.current_table_id = table_id
+            columns_changed = self.load_columns()
+            # колонки, которых нет в новой таблице, удаляются до извлечения кэша
+            self.update_column_views(load_tasks=False)
+            columns = self.tables_cache.take(table_id)
+            if columns is None:
+                self.show_tasks_from_database()
+            else:
+                self.restore_cached_table(columns)
+        if columns_changed:
+            self.update_menubar()
+
+    def cache_current_table(self):
+        """
+        метод для переноса виджетов текущей таблицы из лэйаутов в кэш
+        """
+        columns = {}
+        # кэшированные карточки проверяются фильтром при извлечении из кэша
+        self.filter_queue.clear()
+        with self.bulk_update():
+            for layout_id, layout in self.scroll_layouts.items():
+                # виджеты извлекаются с конца, чтобы лэйаут не сдвигал остальные
+                column = [layout.takeAt(index).widget()
+                          for index in reversed(range(layout.count()))]
+                column.reverse()
+                for widget in column:
+                    widget.hide()
+                columns[layout_id] = column
+        self.tables_cache.put(self.current_table_id, columns)
+
+    def release_task_records(self):
+        """
+        метод для удаления из хранилища записей задач, которые не отображает
+        ни один виджет доски, кэша таблиц или окно закрепленной задачи
+        """
+        used_ids = set(self.pinned_tasks_ids)
+        used_ids.update(self.pinned_windows)
+        for layout in self.scroll_layouts.values():
+            for index in range(layout.count()):
+                used_ids.add(layout.itemAt(index).widget().get_id())
+        for columns in self.tables_cache.entries.values():
+            for column in columns.values():
+                used_ids.update(widget.get_id() for widget in column)
+        self.task_store.retain(used_ids)
+
+    def restore_cached_table(self, columns: dict):
+        """
+        метод для отображения виджетов таблицы из кэша, задачи колонок,
+        созданных после кэширования, загружаются из базы данных
+        """
+        self.mark_selected_table()
+        missing_ids = []
+        with self.bulk_update():
+            for layout_id, layout in self.scroll_layouts.items():
+                column = columns.get(layout_id)
+                if column is None:
+                    missing_ids.append(layout_id)
+                    continue
+                if self.task_filter.sort is not None:
+                    # сортировка могла измениться после кэширования
+                    column.sort(key=lambda widget: self.task_filter.get_sort_key(
+                        widget.task))
+                matches = self.task_filter.matches
+                for widget in column:
+                    layout.addWidget(widget)
+                    widget.setVisible(matches(widget.task))
+            if missing_ids:
+                self.show_tasks_from_database(missing_ids)
 
     def add_new_table(self):
         """
@@ -568,19 +1906,92 @@ class MainWindow(QtWidgets.QMainWindow):
             self.update_menubar()
             self.update_tables_count()
 
+    def add_column(self):
+        """
+        метод для добавления колонки в конец текущей таблицы
+        """
+        text, accepted = QtWidgets.QInputDialog.getText(
+            self, "Add column", "Enter column title:")
+        if accepted and text:
+            self.db_cursor.execute("""INSERT INTO columns(table_id, layout_id, title)
+                VALUES (?, (SELECT COALESCE(MAX(layout_id), -1) + 1 FROM columns
+                WHERE table_id = ?), ?)""",
+                                   (self.current_table_id, self.current_table_id, text))
+            self.db_connection.commit()
+            self.reload_columns()
+
+    def rename_column(self, layout_id: int):
+        """
+        метод для изменения названия колонки текущей таблицы
+        """
+        text, accepted = QtWidgets.QInputDialog.getText(
+            self, "Rename column", "Enter new column title:")
+        if accepted and text:
+            self.db_cursor.execute("""UPDATE columns SET title = ?
+                WHERE table_id = ? AND layout_id = ?""",
+                                   (text, self.current_table_id, layout_id))
+            self.db_connection.commit()
+            self.reload_columns()
+
+    def delete_column(self, layout_id: int):
+        """
+        метод для удаления колонки текущей таблицы вместе с её задачами
+        """
+        if self.confirm_deleting_column(layout_id):
+            for (task_id,) in self.db_cursor.execute(
+                    "SELECT id FROM tasks WHERE table_id = ? AND layout_id = ?",
+                    (self.current_table_id, layout_id)).fetchall():
+                self.task_store.discard(task_id)
+            self.db_cursor.execute(
+                "DELETE FROM tasks WHERE table_id = ? AND layout_id = ?",
+                (self.current_table_id, layout_id))
+            self.db_cursor.execute(
+                "DELETE FROM columns WHERE table_id = ? AND layout_id = ?",
+                (self.current_table_id, layout_id))
+            self.db_connection.commit()
+            self.clear_tasks_list(layout_id)
+            self.reload_columns()
+
+    def confirm_deleting_column(self, layout_id: int):
+        """
+        метод для показа диалога подтверждения удаления колонки
+        """
+        enough_columns_left = len(self.columns) > 1
+        warning_message = "You can't delete the last column."
+        if enough_columns_left:
+            warning_message = (f"Column '{self.column_titles[layout_id]}' and "
+                               "all its tasks will be permanently deleted.\nContinue?")
+        responce = QtWidgets.QMessageBox.warning(
+            None, "Warning",
+            warning_message,
+            QtWidgets.QMessageBox.Ok, QtWidgets.QMessageBox.Cancel)
+        return responce == QtWidgets.QMessageBox.Ok and enough_columns_left
+
+    def reload_columns(self):
+        """
+        метод для обновления колонок текущей таблицы после их изменения
+        """
+        if self.load_columns():
+            self.update_menubar()
+        self.update_column_views()
+
     def delete_table(self, table_id: int):
         """
         метод для удаления таблицы
         """
         if self.confirm_deleting_table(table_id):
-            query = f"""
-            DELETE FROM tables WHERE id = {table_id};
-            DELETE FROM tasks WHERE table_id = {table_id}"""
-            self.db_cursor.executescript(query)
+            for (task_id,) in self.db_cursor.execute(
+                    "SELECT id FROM tasks WHERE table_id = ?", (table_id,)).fetchall():
+                self.task_store.discard(task_id)
+            self.db_cursor.execute(
+                "DELETE FROM tasks WHERE table_id = ?", (table_id,))
+            self.db_cursor.execute(
+                "DELETE FROM tables WHERE id = ?", (table_id,))
+            self.db_connection.commit()
+            self.tables_cache.invalidate(table_id)
             if self.current_table_id == table_id:
-                self.load_table(1)
+                self.load_table(1, cache_current=False)
                 self.current_table_id = 1
-            self.db_connection.commit()
             self.update_menubar()
             self.update_tables_count()
 
@@ -592,8 +2003,9 @@ class MainWindow(QtWidgets.QMainWindow):
         enough_tables_left = self.tables_count > 1
         warning_message = "You can't delete the last table."
         if enough_tables_left:
-            table_name = self.db_cursor.execute("""SELECT title FROM tables
-                WHERE id = ?""", (table_id,)).fetchone()[0]
+            with self.connections.reader() as cursor:
+                table_name = cursor.execute("""SELECT title FROM tables
+                    WHERE id = ?""", (table_id,)).fetchone()[0]
             warning_message = f"Table '{table_name}' will be permanently deleted.\nContinue?"
         responce = QtWidgets.QMessageBox.warning(
             None, "Warning",
@@ -617,8 +2029,9 @@ class MainWindow(QtWidgets.QMainWindow):
         """
         метод для обновления количества таблиц
         """
-        self.tables_count = len(self.db_cursor.execute(
-            "SELECT * FROM tables").fetchall())
+        with self.connections.reader() as cursor:
+            self.tables_count = cursor.execute(
+                "SELECT COUNT(*) FROM tables").fetchone()[0]
 
     def mark_selected_table(self):
         """
@@ -640,6 +2053,45 @@ class MainWindow(QtWidgets.QMainWindow):
         self.setup_menubar()
         self.mark_selected_table()
 
+    def show_archive(self):
+        """
+        метод для показа архива текущей таблицы
+        """
+        self.archive_window.show_table(self.current_table_id)
+
+    def confirm_archive_done_tasks(self):
+        """
+        метод для выбора срока, после которого выполненные задачи архивируются
+        """
+        days, accepted = QtWidgets.QInputDialog.getInt(
+            self, "Archive done tasks",
+            "Archive tasks that have been done for more than (days):",
+            int(self.get_setting("archive_after_days", 30)), 0)
+        if accepted:
+            self.set_setting("archive_after_days", days)
+            self.archive_done_tasks(days)
+
+    def archive_done_tasks(self, days: int):
+        """
+        метод для переноса старых выполненных задач всех таблиц в архив
+        """
+        archived_ids = set(self.task_archive.archive_done_tasks(
+            days, tuple(self.pinned_tasks_ids)))
+        if not archived_ids:
+            return
+        for task_id in archived_ids:
+            self.task_store.discard(task_id)
+        self.tables_cache.clear()
+        layout = self.scroll_layouts.get(TaskArchive.DONE_LAYOUT_ID)
+        if layout is None:
+            return
+        with self.bulk_update():
+            for index in reversed(range(layout.count())):
+                widget = layout.itemAt(index).widget()
+                if widget.get_id() in archived_ids:
+                    layout.takeAt(index)
+                    self.dispose_task_widget(widget)
+
     def plot_tables_statistics(self):
         """
         метод для сохранения графика количества задач
@@ -648,20 +2100,32 @@ class MainWindow(QtWidgets.QMainWindow):
             file_path = QtWidgets.QFileDialog.getSaveFileName(
                 None, "Save plot image", "", "Png (*.png)")[0]
             if file_path:
-                self.create_plot(file_path)
+                # подсчет задач идет в рабочем потоке и не блокирует запись
+                self.connections.run_read(self.count_tables_tasks,
+                                          partial(self.create_plot, file_path),
+                                          self.handle_plot_failed)
         else:
             QtWidgets.QMessageBox.warning(
                 None, "Warning", "Not enough tables to plot.\nAt least 2 required.")
 
-    def create_plot(self, file_path: str):
+    @staticmethod
+    def count_tables_tasks(cursor):
+        """
+        метод для подсчета задач каждой таблицы одним запросом,
+        возвращает словарь вида {id таблицы: количество задач}
+        """
+        return dict(cursor.execute("""SELECT tables.id, COUNT(tasks.id)
+            FROM tables LEFT JOIN tasks ON tasks.table_id = tables.id
+            GROUP BY tables.id ORDER BY tables.id"""))
+
+    def create_plot(self, file_path: str, widgets_count: dict):
         """
         метод для создания и сохранения графика количества задач
+        args(
+            file_path: str - путь к файлу изображения,
+            widgets_count: dict - словарь вида {id таблицы: количество задач}
+        )
         """
-        tables = self.db_cursor.execute("SELECT * FROM tables").fetchall()
-        widgets_count = {el[0]: 0 for el in tables}
-        for id_, name in tables:
-            widgets_count[id_] = len(self.db_cursor.execute(
-                "SELECT * FROM tasks WHERE table_id = ?", (id_,)).fetchall())
         plt = pg.plot(tuple(widgets_count.keys()),
                       tuple(widgets_count.values()))
         plt.setLabel("left", "Amount of widgets")
@@ -669,46 +2133,344 @@ class MainWindow(QtWidgets.QMainWindow):
         exporter = pg.exporters.ImageExporter(plt.plotItem)
         exporter.export(file_path)
 
+    def plot_flow_analytics(self):
+        """
+        метод для сохранения аналитики потока задач текущей таблицы:
+        накопительной диаграммы, количества выполненных задач и
+        распределений времени выполнения
+        """
+        file_path = QtWidgets.QFileDialog.getSaveFileName(
+            None, "Save flow analytics", "", "Png (*.png)")[0]
+        if file_path:
+            table_id = self.current_table_id
+            since = time.time() - int(self.get_setting("flow_days", 90)) * DAY
+            # чтение истории и расчеты идут в рабочем потоке
+            self.connections.run_read(
+                lambda cursor: get_flow_metrics(
+                    TaskHistory.read_flow_data(cursor, table_id, since)),
+                partial(self.create_flow_plot, file_path, dict(self.column_titles)),
+                self.handle_plot_failed)
+
+    def handle_plot_failed(self, error: str):
+        """
+        метод для показа ошибки чтения данных для графика
+        """
+        QtWidgets.QMessageBox.warning(
+            self, "Plot failed", f"Unable to read the plot data.\n({error})")
+
+    @staticmethod
+    def create_flow_plot(file_path: str, column_titles: dict, metrics: dict):
+        """
+        метод для создания и сохранения графиков аналитики потока задач
+        args(
+            file_path: str - путь к файлу изображения,
+            column_titles: dict - словарь вида {id лэйаута: название колонки},
+            metrics: dict - результат get_flow_metrics
+        )
+        """
+        summary = metrics["summary"]
+        days = metrics["days"]
+        layout = pg.GraphicsLayoutWidget()
+        # виджет не показывается, поэтому размер задается самой сетке графиков
+        layout.ci.resize(1200, 900)
+        flow_plot = layout.addPlot(row=0, col=0, colspan=2, title=(
+            f"Cumulative flow: {summary['completed']} done, "
+            f"{summary['throughput_per_week']:.1f} per week"))
+        flow_plot.setLabel("left", "Tasks")
+        flow_plot.setLabel("bottom", "Days")
+        flow_plot.addLegend()
+        # "Done" внизу, остальные списки накладываются сверху в обратном порядке
+        layouts = metrics["layouts"]
+        order = sorted(range(len(layouts)), key=lambda index: (
+            layouts[index] != TaskArchive.DONE_LAYOUT_ID, -layouts[index]))
+        stacked = metrics["flow"][order].cumsum(axis=0)
+        for position, index in reversed(tuple(enumerate(order))):
+            color = pg.intColor(position, hues=max(len(order), 1))
+            flow_plot.plot(days, stacked[position], fillLevel=0, brush=color,
+                           pen=color, name=column_titles.get(
+                               layouts[index], f"Column {layouts[index]}"))
+        throughput_plot = layout.addPlot(row=1, col=0, colspan=2,
+                                         title="Throughput")
+        throughput_plot.setLabel("left", "Done tasks")
+        throughput_plot.setLabel("bottom", "Days")
+        throughput_plot.addItem(pg.BarGraphItem(
+            x=days, height=metrics["throughput"], width=0.8, brush="g"))
+        for column, name in enumerate(("lead", "cycle")):
+            values = metrics[name]
+            title = f"{name.capitalize()} time"
+            if summary[name] is not None:
+                title += (f": median {summary[name][0]:.1f} d, "
+                          f"85% {summary[name][1]:.1f} d")
+            histogram_plot = layout.addPlot(row=2, col=column, title=title)
+            histogram_plot.setLabel("left", "Tasks")
+            histogram_plot.setLabel("bottom", "Days")
+            if len(values):
+                counts, edges = np.histogram(values, bins=min(len(values), 20))
+                histogram_plot.plot(edges, counts, stepMode="center",
+                                    fillLevel=0, brush=(0, 0, 255, 120))
+        exporter = pg.exporters.ImageExporter(layout.ci)
+        exporter.export(file_path)
+
     def pin_task(self, task: TaskWidget):
         """
         метод для закрепления задачи поверх всех окон
         """
         self.pinned_task = task
+        self.task_selection.discard(task.get_id())
+        task.set_selected(False)
         self.update_task(self.pinned_task)
-        self.pinned_task.setParent(None)
-        self.pinned_task.setWindowTitle("Pinned task")
-        self.pinned_task.setWindowFlags(QtCore.Qt.WindowStaysOnTopHint)
-        self.pinned_task.set_drag_enabled(False)
-        self.pinned_task.widget_closed.connect(partial(self.unpin_task, task))
-        self.pinned_tasks_ids.append(task.get_id())
         self.new_task_window.close()
-        self.pinned_task.setWindowIcon(QtGui.QIcon(self.logo_filename))
-        self.pinned_task.show()
-        self.pinned_task.move(200, 200)
+        self.show_pinned_window(task)
+        self.save_pinned_tasks((task,))
+
+    def show_pinned_window(self, task: TaskWidget, geometry=None, stay_on_top=True):
+        """
+        метод для показа задачи в отдельном окне закрепленной задачи
+        args(
+            task: TaskWidget - виджет задачи без лэйаута,
+            geometry: tuple - сохраненные (x, y, ширина, высота) окна или None,
+            stay_on_top: bool - должно ли окно быть поверх всех окон
+        )
+        """
+        task.setParent(None)
+        task.setWindowTitle("Pinned task")
+        task.setWindowFlags(QtCore.Qt.Window)
+        task.setWindowFlag(QtCore.Qt.WindowStaysOnTopHint, stay_on_top)
+        task.set_drag_enabled(False)
+        task.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        task.customContextMenuRequested.connect(
+            partial(self.show_pinned_task_menu, task))
+        self.pinned_tasks_ids.add(task.get_id())
+        self.pinned_windows[task.get_id()] = task
+        task.setWindowIcon(QtGui.QIcon(self.logo_filename))
+        # окно, сохраненное на отключенном мониторе, открывается на основном
+        if geometry is not None and QtWidgets.QApplication.screenAt(
+                QtCore.QPoint(*geometry[:2])) is not None:
+            task.resize(*geometry[2:])
+            task.move(*geometry[:2])
+        else:
+            task.move(200, 200)
+        task.show()
+
+    def show_pinned_task_menu(self, task: TaskWidget, position: QtCore.QPoint):
+        """
+        метод для показа контекстного меню окна закрепленной задачи
+        """
+        menu = QtWidgets.QMenu(task)
+        on_top_action = menu.addAction("Stay on top")
+        on_top_action.setCheckable(True)
+        on_top_action.setChecked(
+            bool(task.windowFlags() & QtCore.Qt.WindowStaysOnTopHint))
+        on_top_action.toggled.connect(partial(self.set_pinned_on_top, task))
+        menu.addAction("Unpin", task.close)
+        menu.exec(task.mapToGlobal(position))
+        menu.deleteLater()
+
+    def set_pinned_on_top(self, task: TaskWidget, stay_on_top: bool):
+        """
+        метод для изменения положения окна закрепленной задачи поверх всех окон
+        """
+        # после изменения флагов окно скрывается и показывается заново
+        task.setWindowFlag(QtCore.Qt.WindowStaysOnTopHint, stay_on_top)
+        task.show()
+        self.save_pinned_tasks((task,))
+
+    def save_pinned_tasks(self, tasks=None, replace=False):
+        """
+        метод для сохранения закрепленных задач, положения и размера их
+        окон одной транзакцией
+        args(
+            tasks: tuple - окна закрепленных задач, по умолчанию все открытые,
+            replace: bool - нужно ли открепить задачи без открытых окон
+        )
+        """
+        if tasks is None:
+            tasks = tuple(self.pinned_windows.values())
+        if replace:
+            self.db_cursor.execute("DELETE FROM pinned_tasks")
+        self.db_cursor.executemany("""INSERT OR REPLACE INTO pinned_tasks
+            (task_id, x, y, width, height, stay_on_top) SELECT ?, ?, ?, ?, ?, ?
+            WHERE EXISTS (SELECT 1 FROM tasks WHERE id = ?)""",
+                                   [(task.get_id(), task.x(), task.y(), task.width(),
+                                     task.height(), bool(task.windowFlags()
+                                                         & QtCore.Qt.WindowStaysOnTopHint),
+                                     task.get_id()) for task in tasks])
+        self.db_connection.commit()
+
+    def restore_pinned_tasks(self):
+        """
+        метод для открытия окон задач, закрепленных в прошлых сеансах,
+        задачи читаются одним запросом в рабочем потоке
+        """
+        self.connections.run_read(self.read_pinned_tasks, self.show_pinned_tasks)
+
+    @staticmethod
+    def read_pinned_tasks(cursor):
+        """
+        метод для чтения закрепленных задач вместе с положением их окон
+        """
+        return cursor.execute("""SELECT tasks.id, comment, color, attachments,
+            layout_id, checklist_done, checklist_total, deadline_date, file_path,
+            x, y, width, height, stay_on_top
+            FROM pinned_tasks JOIN tasks ON tasks.id = pinned_tasks.task_id
+            ORDER BY pinned_tasks.rowid""").fetchall()
+
+    def show_pinned_tasks(self, rows: list):
+        """
+        метод для создания окон прочитанных закрепленных задач
+        """
+        if not self.app_running:
+            return
+        for row in rows:
+            if row[0] in self.pinned_tasks_ids:
+                continue
+            task = TaskWidget(task=self.task_store.add(Task.from_row(row[:9])))
+            self.connect_task_widget(task)
+            self.request_task_preview(task)
+            self.show_pinned_window(task, row[9:13], bool(row[13]))
 
     def unpin_task(self, task: TaskWidget):
         """
         метод для удаления закрепленной задачи
         """
-        if self.app_running:
-            task_data = task.get_data()
-            table_id = self.db_cursor.execute(
-                "SELECT table_id FROM tasks WHERE id = ?",
-                (task_data["id"],)).fetchone()
+        if self.app_running and task.get_id() in self.pinned_tasks_ids:
+            with self.connections.reader() as cursor:
+                table_id = cursor.execute(
+                    "SELECT table_id FROM tasks WHERE id = ?",
+                    (task.get_id(),)).fetchone()
             table_id = table_id[0] if table_id is not None else -1
+            self.db_cursor.execute("DELETE FROM pinned_tasks WHERE task_id = ?",
+                                   (task.get_id(),))
+            self.db_connection.commit()
+            task.customContextMenuRequested.disconnect()
+            task.setContextMenuPolicy(QtCore.Qt.DefaultContextMenu)
             task.setParent(self.centralwidget)
-            if task_data["id"] in self.pinned_tasks_ids:
-                self.pinned_tasks_ids.remove(task_data["id"])
-            if table_id == self.current_table_id:
+            self.pinned_tasks_ids.discard(task.get_id())
+            self.pinned_windows.pop(task.get_id(), None)
+            # закрепленная задача отсутствует в кэше своей таблицы
+            self.tables_cache.invalidate(table_id)
+            if (table_id == self.current_table_id
+                    and task.layout_id in self.scroll_layouts):
                 task.set_drag_enabled(True)
-                self.scroll_layouts[task_data["layout_id"]].addWidget(task)
+                self.place_task_widget(self.scroll_layouts[task.layout_id], task)
+            else:
+                # задача другой таблицы, колонки за пределами окна или
+                # удаленная задача не должна оставаться у centralwidget
+                self.dispose_task_widget(task)
+
+    def find_task_widget(self, task_id: int):
+        """
+        метод для поиска виджета задачи в списках текущей таблицы
+        """
+        for layout in self.scroll_layouts.values():
+            for index in range(layout.count()):
+                widget = layout.itemAt(index).widget()
+                if widget.get_id() == task_id:
+                    return widget
+        return None
+
+    def apply_database_changes(self, tasks_ids: list, tables_changed: bool):
+        """
+        метод для применения изменений, сделанных другими экземплярами приложения
+        args(
+            tasks_ids: list - список id измененных задач,
+            tables_changed: bool - изменился ли список таблиц
+        )
+        """
+        if tables_changed:
+            self.update_tables_count()
+            self.update_menubar()
+            current_table = self.db_cursor.execute(
+                "SELECT id FROM tables WHERE id = ?",
+                (self.current_table_id,)).fetchone()
+            if current_table is None:
+                self.load_table(1, cache_current=False)
+            else:
+                # колонки текущей таблицы могли измениться
+                self.reload_columns()
+        for task_id in tasks_ids:
+            if task_id not in self.pinned_tasks_ids:
+                self.apply_task_change(task_id)
+
+    def apply_task_change(self, task_id: int):
+        """
+        метод для синхронизации виджета задачи с её строкой в базе данных
+        """
+        task_data = self.db_cursor.execute(
+            """SELECT table_id, id, comment, color, attachments, layout_id,
+            checklist_done, checklist_total, deadline_date, file_path
+            FROM tasks WHERE id = ?""", (task_id,)).fetchone()
+        # кэшированные таблицы со старой и новой версией задачи устарели
+        self.tables_cache.invalidate_task(task_id)
+        if task_data is not None and task_data[0] != self.current_table_id:
+            self.tables_cache.invalidate(task_data[0])
+        widget = self.find_task_widget(task_id)
+        if task_data is None:
+            self.task_store.discard(task_id)
+        # задача удалена или перемещена в другую таблицу
+        if task_data is None or task_data[0] != self.current_table_id:
+            if widget is not None:
+                self.scroll_layouts[widget.layout_id].removeWidget(widget)
+                self.dispose_task_widget(widget)
+            return
+        if widget is None:
+            if task_data[5] in self.scroll_layouts:
+                self.add_task_from_database(task_data[1:])
+            return
+        text, color, attachments, layout_id = task_data[2:6]
+        if attachments is not None:
+            attachments = json.loads(attachments)
+        data_changed = (text, color, attachments) != (
+            widget.text, widget.color, widget.attachments)
+        if data_changed:
+            widget.config_from_data(
+                {"text": text, "color": color, "attachments": attachments})
+            self.request_task_preview(widget)
+        if layout_id != widget.layout_id:
+            self.scroll_layouts[widget.layout_id].removeWidget(widget)
+            if layout_id not in self.scroll_layouts:
+                self.dispose_task_widget(widget)
+                return
+            widget.set_new_layout_id(layout_id)
+            self.place_task_widget(self.scroll_layouts[layout_id], widget)
+        elif data_changed:
+            self.refresh_task_widget(widget)
+
+    def event(self, event):
+        """
+        метод для замера времени перерисовки окна, пока показана панель
+        с замерами производительности
+        """
+        if (event.type() == QtCore.QEvent.UpdateRequest
+                and self.performance_overlay is not None
+                and self.performance_overlay.is_running()):
+            started = time.perf_counter()
+            result = super().event(event)
+            self.performance_overlay.record_frame(time.perf_counter() - started)
+            return result
+        return super().event(event)
 
     def closeEvent(self, event):
         """
         метод для обработки события закрытия приложения
         """
         self.app_running = False
-        self.db_connection.close()
+        self.database_watcher.stop()
+        self.progress_timer.stop()
+        self.widget_diagnostics.stop()
+        self.performance_overlay.stop()
+        self.backup_timer.stop()
+        self.database_backup.stop()
+        self.database_maintenance.stop()
+        self.task_sync.stop()
+        self.deadline_window.close()
+        # окна закрепленных задач откроются на тех же местах при следующем запуске
+        self.save_pinned_tasks()
+        for task in tuple(self.pinned_windows.values()):
+            task.close()
+        self.attachment_previews.stop()
+        self.task_importer.stop()
+        self.connections.close()
         event.accept()
 
 
@@ -1,6 +1,7 @@
+from attachment_previews import describe_preview, open_file
+from checklist_model import ChecklistModel
 import datetime
 from functools import partial
-import os
 from PyQt5 import QtWidgets, QtCore, QtGui
 
 
@@ -8,12 +9,16 @@ class NewTaskWindow(QtWidgets.QWidget):
     """
     Основной класс диалогового окна
     """
+    delete_requested = QtCore.pyqtSignal(int)  # сигнал удаления задачи сессии
+    pin_requested = QtCore.pyqtSignal(int)  # сигнал закрепления задачи сессии
 
-    def __init__(self, logo_filename):
+    def __init__(self, logo_filename, attachment_previews=None):
         super().__init__()
-        self.task_exists = False
+        self.task_id = None  # id задачи, к которой привязан диалог
         self.default_indicator_color = "#8cff7a"
         self.logo_filename = logo_filename
+        # объект AttachmentPreviews для миниатюр прикрепленных файлов или None
+        self.attachment_previews = attachment_previews
         self.setup_ui()
 
     def setup_ui(self):
@@ -22,11 +27,14 @@ class NewTaskWindow(QtWidgets.QWidget):
         """
         self.main_layout = QtWidgets.QVBoxLayout(self)
         self.main_tab = MainTab(self)
-        self.config_tab = ConfigureTab(self)
+        self.config_tab = ConfigureTab(self, self.attachment_previews)
         self.tabs = QtWidgets.QTabWidget(self)
         self.tabs.addTab(self.main_tab, "General")
         self.tabs.addTab(self.config_tab, "Configure")
         self.main_layout.addWidget(self.tabs)
+        # кнопки подключаются один раз и передают id текущей задачи
+        self.main_tab.delete_button.clicked.connect(self.request_delete)
+        self.main_tab.pin_button.clicked.connect(self.request_pin)
         self.setWindowTitle("Add new task")
         # установка фокуса на диалоговом окне при его вызове
         self.setWindowModality(QtCore.Qt.ApplicationModal)
@@ -46,13 +54,7 @@ class NewTaskWindow(QtWidgets.QWidget):
             output["attachments"]["deadline"] = self.config_tab.datetime_select.dateTime(
             ).toString(self.config_tab.datetime_select.displayFormat())
         if self.config_tab.checklist_controls_added:
-            checklist = []
-            for index in range(self.config_tab.checklist_layout.count()):
-                widget = self.config_tab.checklist_layout.itemAt(
-                    index).widget()
-                if isinstance(widget, QtWidgets.QCheckBox):
-                    checklist.append(
-                        (widget.text(), widget.isChecked()))
+            checklist = self.config_tab.checklist_model.get_checklist()
             if checklist:
                 output["attachments"]["checklist"] = checklist
         if self.config_tab.file_added:
@@ -72,16 +74,38 @@ class NewTaskWindow(QtWidgets.QWidget):
         self.main_tab.text_input.setText("")
         self.config_tab.hide_attachments(reset_flags)
         self.tabs.setCurrentIndex(0)
-        self.task_exists = False
+        self.task_id = None
         self.main_tab.done_button.setText("Add task")
-        self.main_tab.remove_delete_button()
-        self.main_tab.remove_pin_button()
+        self.main_tab.show_task_buttons(False)
+        self.setWindowTitle("Add new task")
+
+    def begin_session(self, task_id: int, text: str, color: str, attachments):
+        """
+        метод для привязки диалога к существующей задаче и его показа
+        """
+        self.reset_fields(reset_flags=False)
+        self.fill_from_task(text, color, attachments)
+        self.task_id = task_id
+        self.show()
+
+    def request_delete(self):
+        """
+        метод для активации сигнала удаления задачи, к которой привязан диалог
+        """
+        if self.task_id is not None:
+            self.delete_requested.emit(self.task_id)
+
+    def request_pin(self):
+        """
+        метод для активации сигнала закрепления задачи, к которой привязан диалог
+        """
+        if self.task_id is not None:
+            self.pin_requested.emit(self.task_id)
 
     def fill_from_task(self, text: str, color: str, attachments):
         """
         метод для установки состояния полей из строки из базы данных
         """
-        self.task_exists = True
         self.config_tab.attachments_showed = attachments is None
         self.config_tab.select_attachments()
         self.main_tab.text_input.setText(text)
@@ -93,8 +117,7 @@ class NewTaskWindow(QtWidgets.QWidget):
         self.setWindowTitle("Change task")
         if attachments is not None:
             self.add_attachments(attachments)
-        self.main_tab.add_delete_button()
-        self.main_tab.add_pin_button()
+        self.main_tab.show_task_buttons(True)
 
     def add_attachments(self, attachments):
         """
@@ -124,7 +147,7 @@ class NewTaskWindow(QtWidgets.QWidget):
         """
         метод для получения информации о том, существует ли такая задача
         """
-        return self.task_exists
+        return self.task_id is not None
 
     def keyPressEvent(self, event):
         """
@@ -144,7 +167,7 @@ class ConfigureTab(QtWidgets.QWidget):
     Класс для создания вкладки Configure
     """
 
-    def __init__(self, parent):
+    def __init__(self, parent, attachment_previews=None):
         super().__init__(parent=parent)
         self.indicator_color = "#8cff7a"
         self.attachments_fields = ("Deadline", "Check list", "File")
@@ -152,6 +175,9 @@ class ConfigureTab(QtWidgets.QWidget):
         self.datetime_selector_added = False
         self.checklist_controls_added = False
         self.file_added = False
+        self.attachment_previews = attachment_previews
+        if self.attachment_previews is not None:
+            self.attachment_previews.preview_ready.connect(self.show_file_preview)
         self.setup_ui()
 
     def setup_ui(self):
@@ -269,7 +295,6 @@ class ConfigureTab(QtWidgets.QWidget):
         """
         if not self.checklist_controls_added:
             self.checklist_controls_added = True
-            self.checklist_insert_index = 0
             self.add_checklist_controlls()
             if checklist is not None:
                 self.add_checklist_from_task(checklist)
@@ -281,15 +306,27 @@ class ConfigureTab(QtWidgets.QWidget):
         метод для добавления виджетов для изменения чеклиста
         """
         self.checklist_layout = QtWidgets.QVBoxLayout()
+        # список отрисовывает только видимые пункты, поэтому большие
+        # чеклисты открываются быстро
+        self.checklist_view = QtWidgets.QListView(self)
+        # модель удаляется вместе со списком при скрытии чеклиста
+        self.checklist_model = ChecklistModel(parent=self.checklist_view)
+        self.checklist_view.setModel(self.checklist_model)
+        self.checklist_view.setUniformItemSizes(True)
+        self.checklist_view.setSelectionMode(
+            QtWidgets.QAbstractItemView.ExtendedSelection)
         self.checklist_input = QtWidgets.QLineEdit(self)
-        self.checklist_layout.addWidget(self.checklist_input)
         self.checklist_add_button = QtWidgets.QPushButton("Add", self)
+        self.checklist_paste_button = QtWidgets.QPushButton("Paste lines", self)
         self.checklist_delete_button = QtWidgets.QPushButton("Delete", self)
         self.checklist_add_button.clicked.connect(self.add_checklist_item)
+        self.checklist_paste_button.clicked.connect(self.paste_checklist_items)
         self.checklist_delete_button.clicked.connect(
             self.delete_checklist_items)
-        self.checklist_layout.addWidget(self.checklist_add_button)
-        self.checklist_layout.addWidget(self.checklist_delete_button)
+        for widget in (self.checklist_view, self.checklist_input,
+                       self.checklist_add_button, self.checklist_paste_button,
+                       self.checklist_delete_button):
+            self.checklist_layout.addWidget(widget)
 
     def add_checklist_item(self):
         """
@@ -297,31 +334,28 @@ class ConfigureTab(QtWidgets.QWidget):
         """
         text = self.checklist_input.text()
         if text:
-            self.checklist_layout.insertWidget(
-                self.checklist_insert_index, QtWidgets.QCheckBox(text, self))
-            self.checklist_insert_index += 1
+            self.checklist_model.add_items([text])
             self.checklist_input.setText("")
 
+    def paste_checklist_items(self):
+        """
+        метод для добавления пунктов чеклиста из строк буфера обмена
+        """
+        self.checklist_model.add_items(
+            QtWidgets.QApplication.clipboard().text().splitlines())
+
     def add_checklist_from_task(self, checklist):
         """
         метод для добавления существующего чеклиста
         """
-        for text, checked in checklist:
-            widget = QtWidgets.QCheckBox(text, self)
-            widget.setChecked(checked)
-            self.checklist_layout.insertWidget(
-                self.checklist_insert_index, widget)
-            self.checklist_insert_index += 1
+        self.checklist_model.set_checklist(checklist)
 
     def delete_checklist_items(self):
         """
         метод для удаления выбранных элементов чеклиста
         """
-        for index in range(self.checklist_layout.count()):
-            widget = self.checklist_layout.itemAt(index).widget()
-            if isinstance(widget, QtWidgets.QCheckBox) and widget.isChecked():
-                self.checklist_layout.itemAt(index).widget().deleteLater()
-                self.checklist_insert_index -= 1
+        self.checklist_model.remove_rows(
+            index.row() for index in self.checklist_view.selectedIndexes())
 
     def delete_deadline(self):
         """
@@ -365,20 +399,39 @@ class ConfigureTab(QtWidgets.QWidget):
                 self.file_button.clicked.connect(
                     partial(self.run_file, self.file_path))
                 self.attachments_layout.addWidget(self.file_button)
+                # миниатюра создается в фоне и появляется на кнопке позже
+                if self.attachment_previews is not None:
+                    preview = self.attachment_previews.request(self.file_path)
+                    if preview is not None:
+                        self.show_file_preview(self.file_path, *preview)
             else:
                 self.attachments_checkboxes[2].setChecked(False)
                 self.file_added = False
 
-    def run_file(self, file_path: str):
+    def show_file_preview(self, file_path: str, image, metadata):
         """
-        метод для запуска добавленного файла
+        метод для отображения миниатюры и описания файла на его кнопке
         """
+        if not self.file_added or file_path != self.file_path:
+            return
         try:
-            os.startfile(file_path)
-        except Exception as err:
+            if not image.isNull():
+                self.file_button.setIcon(
+                    QtGui.QIcon(QtGui.QPixmap.fromImage(image)))
+                self.file_button.setIconSize(QtCore.QSize(64, 64))
+            self.file_button.setToolTip(describe_preview(metadata))
+        except RuntimeError:
+            # кнопка уже удалена вместе с обвесами
+            pass
+
+    def run_file(self, file_path: str):
+        """
+        метод для открытия добавленного файла в программе по умолчанию
+        """
+        if not open_file(file_path):
             QtWidgets.QMessageBox.warning(
-                self, "Exception occured",
-                f"Exception occured while running the file.\n({err})",
+                self, "Unable to open file",
+                f"Unable to open the file.\n({file_path})",
                 QtWidgets.QMessageBox.Ok)
 
     def delete_file(self):
@@ -400,8 +453,6 @@ class MainTab(QtWidgets.QWidget):
 
     def __init__(self, parent):
         super().__init__(parent=parent)
-        self.delete_button_added = False
-        self.pin_button_added = False
         self.setup_ui()
 
     def setup_ui(self):
@@ -413,39 +464,16 @@ class MainTab(QtWidgets.QWidget):
         self.done_button = QtWidgets.QPushButton("Add task", self)
         self.main_layout.addWidget(self.text_input)
         self.main_layout.addWidget(self.done_button)
+        # кнопки для существующей задачи создаются один раз и только скрываются
+        self.delete_button = QtWidgets.QPushButton("Delete task", self)
+        self.pin_button = QtWidgets.QPushButton("Pin task", self)
+        self.main_layout.addWidget(self.delete_button)
+        self.main_layout.addWidget(self.pin_button)
+        self.show_task_buttons(False)
 
-    def add_delete_button(self):
-        """
-        метод для добавления кнопки удаления задачи
-        """
-        if not self.delete_button_added:
-            self.delete_button_added = True
-            self.delete_button = QtWidgets.QPushButton("Delete task", self)
-            self.main_layout.addWidget(self.delete_button)
-
-    def remove_delete_button(self):
-        """
-        метод для удаления кнопки удаления задачи
-        """
-        if self.delete_button_added:
-            self.delete_button_added = False
-            self.main_layout.itemAt(
-                self.main_layout.count() - 2).widget().deleteLater()
-
-    def add_pin_button(self):
-        """
-        метод для добавления кнопки закрепления задачи
-        """
-        if not self.pin_button_added:
-            self.pin_button_added = True
-            self.pin_button = QtWidgets.QPushButton("Pin task", self)
-            self.main_layout.addWidget(self.pin_button)
-
-    def remove_pin_button(self):
+    def show_task_buttons(self, visible: bool):
         """
-        метод для удаления кнопки закрепления задачи
+        метод для показа/скрытия кнопок удаления и закрепления задачи
         """
-        if self.pin_button_added:
-            self.pin_button_added = False
-            self.main_layout.itemAt(
-                self.main_layout.count() - 1).widget().deleteLater()
+        self.delete_button.setVisible(visible)
+        self.pin_button.setVisible(visible)
@@ -0,0 +1,161 @@
+from collections import deque
+from PyQt5 import QtWidgets, QtCore, QtGui
+import time
+from widget_diagnostics import get_rss
+
+
+class PerformanceOverlay(QtWidgets.QLabel):
+    """
+    Класс полупрозрачной панели поверх доски с живыми замерами: время
+    перерисовки окна, задержка цикла событий, запросы к базе данных после
+    последнего действия пользователя, количество карточек в колонках и
+    объем памяти программы
+    """
+    REFRESH_INTERVAL = 500  # интервал обновления панели в миллисекундах
+    LATENCY_INTERVAL = 50  # интервал замера задержки цикла событий
+    SAMPLES = 100  # количество замеров, по которым считается максимум
+    # события, с которых начинается новое действие пользователя
+    INPUT_EVENTS = (QtCore.QEvent.MouseButtonPress, QtCore.QEvent.KeyPress,
+                    QtCore.QEvent.Drop, QtCore.QEvent.Wheel)
+
+    def __init__(self, main_window, query_stats, parent=None):
+        """
+        args(
+            main_window: MainWindow - главное окно приложения,
+            query_stats: QueryStats - счетчики запросов всех подключений,
+            parent: QtWidgets.QWidget - виджет, поверх которого рисуется панель
+        )
+        """
+        super().__init__(parent)
+        self.main_window = main_window
+        self.query_stats = query_stats
+        self.frame_times = deque(maxlen=self.SAMPLES)  # секунды
+        self.latencies = deque(maxlen=self.SAMPLES)  # секунды
+        self.action_started = None  # время начала последнего действия
+        self.action_time = None  # время обработки последнего действия
+        self.last_tick = None  # время предыдущего срабатывания таймера задержки
+        self.setAttribute(QtCore.Qt.WA_TransparentForMouseEvents)
+        self.setStyleSheet("background-color: rgba(0, 0, 0, 170); color: white; "
+                           "padding: 6px; border-radius: 4px;")
+        self.setFont(QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont))
+        self.hide()
+        self.refresh_timer = QtCore.QTimer(self)
+        self.refresh_timer.setInterval(self.REFRESH_INTERVAL)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.latency_timer = QtCore.QTimer(self)
+        self.latency_timer.setTimerType(QtCore.Qt.PreciseTimer)
+        self.latency_timer.setInterval(self.LATENCY_INTERVAL)
+        self.latency_timer.timeout.connect(self.measure_latency)
+
+    def start(self):
+        """
+        метод для показа панели и запуска замеров
+        """
+        self.frame_times.clear()
+        self.latencies.clear()
+        self.last_tick = None
+        self.start_action()
+        QtWidgets.QApplication.instance().installEventFilter(self)
+        self.refresh_timer.start()
+        self.latency_timer.start()
+        self.refresh()
+        self.show()
+        self.raise_()
+
+    def stop(self):
+        """
+        метод для скрытия панели и остановки замеров
+        """
+        QtWidgets.QApplication.instance().removeEventFilter(self)
+        self.refresh_timer.stop()
+        self.latency_timer.stop()
+        self.hide()
+
+    def is_running(self):
+        """
+        метод для проверки, показана ли панель
+        """
+        return self.refresh_timer.isActive()
+
+    def record_frame(self, seconds: float):
+        """
+        метод для учета времени одной перерисовки окна
+        """
+        self.frame_times.append(seconds)
+
+    def measure_latency(self):
+        """
+        метод для замера задержки цикла событий: насколько позже заданного
+        интервала сработал таймер
+        """
+        now = time.perf_counter()
+        if self.last_tick is not None:
+            self.latencies.append(max(
+                0.0, now - self.last_tick - self.LATENCY_INTERVAL / 1000))
+        self.last_tick = now
+
+    def start_action(self):
+        """
+        метод для начала замера нового действия пользователя, запросы
+        считаются с этого момента, а время обработки - до освобождения
+        цикла событий
+        """
+        self.query_stats.reset()
+        self.action_started = time.perf_counter()
+        self.action_time = None
+        QtCore.QTimer.singleShot(0, self.finish_action)
+
+    def finish_action(self):
+        """
+        метод для сохранения времени обработки действия
+        """
+        if self.action_started is not None and self.action_time is None:
+            self.action_time = time.perf_counter() - self.action_started
+
+    def eventFilter(self, obj, event):
+        """
+        метод для отслеживания действий пользователя во всем приложении
+        """
+        if event.type() in self.INPUT_EVENTS and self.action_time is not None:
+            self.start_action()
+        return False
+
+    @staticmethod
+    def format_times(values):
+        """
+        метод для вывода последнего и максимального значения в миллисекундах
+        """
+        if not values:
+            return "-"
+        return f"{values[-1] * 1000:.1f} ms (max {max(values) * 1000:.1f} ms)"
+
+    def get_report(self):
+        """
+        метод для получения текста с текущими замерами
+        """
+        window = self.main_window
+        action_time = ("running" if self.action_time is None
+                       else f"{self.action_time * 1000:.1f} ms")
+        lines = [
+            f"Frame time:      {self.format_times(self.frame_times)}",
+            f"Event loop lag:  {self.format_times(self.latencies)}",
+            f"Last action:     {action_time}",
+            f"SQL since input: {self.query_stats.queries} queries, "
+            f"{self.query_stats.seconds * 1000:.1f} ms",
+        ]
+        for layout_id, title in window.columns:
+            layout = window.scroll_layouts.get(layout_id)
+            count = "not built" if layout is None else layout.count()
+            lines.append(f"  {title}: {count}")
+        lines.append(f"Cached tables:   {len(window.tables_cache.entries)}")
+        lines.append(f"RSS:             {get_rss() / 2 ** 20:.1f} MB")
+        return "\n".join(lines)
+
+    def refresh(self):
+        """
+        метод для обновления текста и положения панели в правом верхнем углу
+        """
+        self.setText(self.get_report())
+        self.adjustSize()
+        parent = self.parentWidget()
+        self.move(parent.width() - self.width() - 8, 8)
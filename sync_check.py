@@ -0,0 +1,126 @@
+import argparse
+from change_journal import ChangeJournal
+import os
+from PyQt5 import QtWidgets
+import sqlite3
+import sys
+import tempfile
+from task_sync import SyncClient, SyncServer
+from unittest import mock
+
+TASK_ID = 100  # id задачи, которую изменяют клиенты и сервер
+
+
+def create_database(path: str):
+    """
+    функция для создания базы данных программы по заданному пути
+    """
+    from manager import MainWindow
+    window = MainWindow(path, "logo.png")
+    window.close()
+    window.connections.close()
+
+
+def get_task(path: str):
+    """
+    функция для получения id, текста и цвета проверяемой задачи
+    """
+    db_connection = sqlite3.connect(path)
+    try:
+        return db_connection.execute("SELECT id, comment, color FROM tasks WHERE id = ?",
+                                     (TASK_ID,)).fetchone()
+    finally:
+        db_connection.close()
+
+
+def update_task(path: str, column: str, value: str):
+    """
+    функция для изменения одного столбца проверяемой задачи
+    """
+    db_connection = sqlite3.connect(path)
+    try:
+        db_connection.execute(f"UPDATE tasks SET {column} = ? WHERE id = ?",
+                              (value, TASK_ID))
+        db_connection.commit()
+    finally:
+        db_connection.close()
+
+
+def sync(path: str, url: str, policy: str):
+    """
+    функция для синхронизации базы данных с сервером
+    """
+    db_connection = sqlite3.connect(path, timeout=10)
+    try:
+        return SyncClient(db_connection, url, policy).sync()
+    finally:
+        db_connection.close()
+
+
+def compact(path: str, keep_versions: int):
+    """
+    функция для полного сжатия журнала базы данных с заданным количеством
+    несжимаемых последних записей
+    """
+    db_connection = sqlite3.connect(path)
+    try:
+        change_journal = ChangeJournal(db_connection, create=False)
+        with mock.patch.object(ChangeJournal, "KEEP_VERSIONS", keep_versions):
+            while not change_journal.compact_slice():
+                pass
+    finally:
+        db_connection.close()
+
+
+def run_compaction_check(policy="fields"):
+    """
+    функция для проверки, что клиент, отставший от сервера больше, чем на
+    несжимаемую часть журнала, получает все изменения строки, записи которой
+    были удалены сжатием, возвращает список найденных расхождений
+    """
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    problems = []
+    with tempfile.TemporaryDirectory() as directory:
+        server_path, first_path, second_path = (
+            os.path.join(directory, name) for name in ("server.db", "a.db", "b.db"))
+        for path in (server_path, first_path, second_path):
+            create_database(path)
+        db_connection = sqlite3.connect(first_path)
+        db_connection.execute("""INSERT INTO tasks(id, comment, color, table_id,
+            layout_id) VALUES (?, 'orig', '#111', 1, 0)""", (TASK_ID,))
+        db_connection.commit()
+        db_connection.close()
+        server = SyncServer(server_path)
+        server.start()
+        try:
+            sync(first_path, server.url, policy)
+            sync(second_path, server.url, policy)
+            # первый клиент меняет текст, затем сервер меняет цвет, и запись
+            # с текстом сжимается, а запись с цветом остается в несжимаемой части
+            update_task(first_path, "comment", "edited2")
+            sync(first_path, server.url, policy)
+            update_task(server_path, "color", "#222")
+            compact(server_path, keep_versions=1)
+            sync(second_path, server.url, policy)
+            sync(first_path, server.url, policy)
+        finally:
+            server.stop()
+        expected = get_task(server_path)
+        for name, path in (("a.db", first_path), ("b.db", second_path)):
+            task = get_task(path)
+            if task != expected:
+                problems.append(f"{name}: {task} != server {expected}")
+    app.processEvents()
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Check that clients get every change of a compacted journal")
+    parser.add_argument("--policy", choices=("fields", "lww"), default="fields")
+    args = parser.parse_args()
+    problems = run_compaction_check(args.policy)
+    for problem in problems:
+        print(problem)
+    print("ok" if not problems else f"{len(problems)} problems")
+    sys.exit(0 if not problems else 1)
@@ -0,0 +1,94 @@
+from collections import OrderedDict
+
+
+class TableCache:
+    """
+    Класс LRU кэша виджетов недавно просмотренных таблиц
+    """
+
+    def __init__(self, max_tables=4, max_widgets=5000, on_delete=None):
+        """
+        args(
+            max_tables: int - максимальное количество таблиц в кэше,
+            max_widgets: int - максимальное суммарное количество виджетов в кэше,
+            on_delete: func - функция, вызываемая после удаления виджетов из кэша
+        )
+        """
+        self.max_tables = max_tables
+        self.max_widgets = max_widgets
+        self.on_delete = on_delete
+        # id таблицы: словарь вида {id лэйаута: список виджетов колонки}
+        self.entries = OrderedDict()
+        self.widgets_count = 0
+
+    def put(self, table_id: int, columns: dict):
+        """
+        метод для сохранения виджетов таблицы в кэш с вытеснением самых
+        давно просмотренных таблиц
+        """
+        self.invalidate(table_id)
+        size = sum(len(column) for column in columns.values())
+        if size > self.max_widgets or self.max_tables < 1:
+            self.delete_widgets(columns)
+            return
+        self.entries[table_id] = columns
+        self.widgets_count += size
+        while (len(self.entries) > self.max_tables
+               or self.widgets_count > self.max_widgets):
+            self.invalidate(next(iter(self.entries)))
+
+    def take(self, table_id: int):
+        """
+        метод для извлечения виджетов таблицы из кэша, возвращает None,
+        если таблицы нет в кэше
+        """
+        columns = self.entries.pop(table_id, None)
+        if columns is not None:
+            self.widgets_count -= sum(len(column) for column in columns.values())
+        return columns
+
+    def invalidate(self, table_id: int):
+        """
+        метод для удаления таблицы из кэша
+        """
+        columns = self.take(table_id)
+        if columns is not None:
+            self.delete_widgets(columns)
+
+    def invalidate_task(self, task_id: int):
+        """
+        метод для удаления из кэша таблиц, содержащих заданную задачу
+        """
+        for table_id, columns in tuple(self.entries.items()):
+            if any(widget.get_id() == task_id
+                   for column in columns.values() for widget in column):
+                self.invalidate(table_id)
+
+    def drop_column(self, layout_id: int):
+        """
+        метод для удаления из всех таблиц кэша виджетов заданной колонки,
+        вызывается перед удалением колонки с доски
+        """
+        for columns in self.entries.values():
+            column = columns.pop(layout_id, [])
+            self.widgets_count -= len(column)
+            self.delete_widgets({layout_id: column})
+
+    def clear(self):
+        """
+        метод для очистки кэша
+        """
+        for table_id in tuple(self.entries):
+            self.invalidate(table_id)
+
+    def delete_widgets(self, columns: dict):
+        """
+        метод для удаления виджетов, вытесненных из кэша
+        """
+        deleted = False
+        for column in columns.values():
+            for widget in column:
+                widget.deleteLater()
+                deleted = True
+        if deleted and self.on_delete is not None:
+            self.on_delete()
@@ -0,0 +1,264 @@
+import datetime
+from PyQt5 import QtWidgets, QtCore, QtGui
+
+# варианты фильтров в виде (название, значение)
+DEADLINE_OPTIONS = (("Any deadline", None), ("Overdue", "overdue"),
+                    ("Next 7 days", "week"), ("Next 30 days", "month"),
+                    ("With deadline", "set"), ("No deadline", "none"))
+CHECKLIST_OPTIONS = (("Any checklist", None), ("No checklist", "none"),
+                     ("Not started", "not_started"), ("In progress", "in_progress"),
+                     ("Complete", "complete"))
+FILE_OPTIONS = (("Any file", None), ("With file", "with"), ("Without file", "without"))
+SORT_OPTIONS = (("Board order", None), ("Deadline", "deadline"),
+                ("Checklist progress", "progress"), ("Color", "color"))
+
+
+class TaskFilter:
+    """
+    Класс фильтра и сортировки карточек доски: каждое условие задается
+    парой из выражения SQL по сохраненным столбцам задачи и такой же
+    проверки данных задачи в памяти, поэтому карточки уже созданных колонок
+    проверяются без запросов, а количество подходящих задач всей таблицы
+    считается запросом по индексам
+    """
+
+    def __init__(self, color=None, deadline=None, checklist=None, file=None, sort=None):
+        """
+        args(
+            color: str - цвет задачи или None для любого цвета,
+            deadline: str - значение из DEADLINE_OPTIONS,
+            checklist: str - значение из CHECKLIST_OPTIONS,
+            file: str - значение из FILE_OPTIONS,
+            sort: str - значение из SORT_OPTIONS
+        )
+        """
+        self.color = color
+        self.deadline = deadline
+        self.checklist = checklist
+        self.file = file
+        self.sort = sort
+        self.conditions = self.compile()
+
+    def __eq__(self, other):
+        return isinstance(other, TaskFilter) and self.get_values() == other.get_values()
+
+    def get_values(self):
+        """
+        метод для получения значений всех полей фильтра
+        """
+        return self.color, self.deadline, self.checklist, self.file, self.sort
+
+    def is_active(self):
+        """
+        метод для проверки, скрывает ли фильтр какие-либо задачи
+        """
+        return bool(self.conditions)
+
+    def compile(self):
+        """
+        метод для построения списка условий вида (выражение SQL, параметры,
+        проверка задачи), сроки хранятся строками ГГГГ-ММ-ДД ЧЧ:ММ, поэтому
+        сравниваются как строки и в SQL, и в памяти
+        """
+        conditions = []
+        if self.color is not None:
+            color = self.color
+            conditions.append(("color = ?", (color,), lambda task: task.color == color))
+        if self.deadline in ("overdue", "week", "month"):
+            now = datetime.datetime.now()
+            start = now.strftime("%Y-%m-%d %H:%M")
+            if self.deadline == "overdue":
+                conditions.append(("deadline_date < ?", (start,),
+                                   lambda task: task.deadline_date is not None
+                                   and task.deadline_date < start))
+            else:
+                days = 7 if self.deadline == "week" else 30
+                end = (now + datetime.timedelta(days=days)).strftime("%Y-%m-%d %H:%M")
+                conditions.append(("deadline_date >= ? AND deadline_date < ?", (start, end),
+                                   lambda task: task.deadline_date is not None
+                                   and start <= task.deadline_date < end))
+        elif self.deadline == "set":
+            conditions.append(("deadline_date IS NOT NULL", (),
+                               lambda task: task.deadline_date is not None))
+        elif self.deadline == "none":
+            conditions.append(("deadline_date IS NULL", (),
+                               lambda task: task.deadline_date is None))
+        checklist_conditions = {
+            "none": ("checklist_total = 0",
+                     lambda task: task.checklist_total == 0),
+            "not_started": ("checklist_total > 0 AND checklist_done = 0",
+                            lambda task: task.checklist_total > 0
+                            and task.checklist_done == 0),
+            "in_progress": ("checklist_done > 0 AND checklist_done < checklist_total",
+                            lambda task: 0 < task.checklist_done < task.checklist_total),
+            "complete": ("checklist_total > 0 AND checklist_done = checklist_total",
+                         lambda task: 0 < task.checklist_total == task.checklist_done),
+        }
+        if self.checklist in checklist_conditions:
+            expression, check = checklist_conditions[self.checklist]
+            conditions.append((expression, (), check))
+        if self.file == "with":
+            conditions.append(("file_path IS NOT NULL", (),
+                               lambda task: task.file_path is not None))
+        elif self.file == "without":
+            conditions.append(("file_path IS NULL", (),
+                               lambda task: task.file_path is None))
+        return conditions
+
+    def matches(self, task):
+        """
+        метод для проверки, подходит ли задача под фильтр
+        args(
+            task: Task - данные задачи
+        )
+        """
+        return all(check(task) for _, _, check in self.conditions)
+
+    def get_condition(self):
+        """
+        метод для получения выражения SQL и параметров всех условий фильтра
+        """
+        if not self.conditions:
+            return "1", ()
+        expression = " AND ".join(f"({sql})" for sql, _, _ in self.conditions)
+        params = tuple(param for _, params, _ in self.conditions for param in params)
+        return expression, params
+
+    def get_order(self):
+        """
+        метод для получения выражения ORDER BY для загрузки задач колонок,
+        пустая строка оставляет порядок доски
+        """
+        return {
+            "deadline": "ORDER BY deadline_date IS NULL, deadline_date, id",
+            "progress": """ORDER BY checklist_total = 0,
+                CAST(checklist_done AS REAL) / MAX(checklist_total, 1), id""",
+            "color": "ORDER BY color, id",
+        }.get(self.sort, "")
+
+    def get_sort_key(self, task):
+        """
+        метод для получения ключа сортировки задачи в том же порядке, что
+        и get_order, без сортировки задачи упорядочиваются по id
+        """
+        if self.sort == "deadline":
+            return task.deadline_date is None, task.deadline_date or "", task.id
+        if self.sort == "progress":
+            return (task.checklist_total == 0,
+                    task.checklist_done / max(task.checklist_total, 1), task.id)
+        if self.sort == "color":
+            return task.color or "", task.id
+        return (task.id,)
+
+    def count_matches(self, cursor, table_id: int):
+        """
+        метод для подсчета подходящих и всех задач таблицы одним запросом
+        """
+        expression, params = self.get_condition()
+        return cursor.execute(f"""SELECT COUNT(*), COALESCE(SUM({expression}), 0)
+            FROM tasks WHERE table_id = ?""", (*params, table_id)).fetchone()
+
+    @staticmethod
+    def read_colors(cursor, table_id: int):
+        """
+        метод для получения цветов задач таблицы по индексу tasks_table_color
+        """
+        return [row[0] for row in cursor.execute("""SELECT DISTINCT color
+            FROM tasks WHERE table_id = ? AND color IS NOT NULL
+            ORDER BY color""", (table_id,))]
+
+
+class FilterBar(QtWidgets.QWidget):
+    """
+    Класс панели фильтра и сортировки карточек над доской
+    """
+    filter_changed = QtCore.pyqtSignal(object)  # сигнал с новым TaskFilter
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.task_filter = TaskFilter()
+        self.setup_ui()
+
+    def setup_ui(self):
+        """
+        главный метод для создания графического интерфейса панели
+        """
+        self.main_layout = QtWidgets.QHBoxLayout(self)
+        self.main_layout.setContentsMargins(9, 0, 9, 0)
+        self.color_box = QtWidgets.QComboBox(self)
+        self.color_box.addItem("Any color", None)
+        self.deadline_box = QtWidgets.QComboBox(self)
+        self.checklist_box = QtWidgets.QComboBox(self)
+        self.file_box = QtWidgets.QComboBox(self)
+        self.sort_box = QtWidgets.QComboBox(self)
+        for box, options in ((self.deadline_box, DEADLINE_OPTIONS),
+                             (self.checklist_box, CHECKLIST_OPTIONS),
+                             (self.file_box, FILE_OPTIONS),
+                             (self.sort_box, SORT_OPTIONS)):
+            for title, value in options:
+                box.addItem(title, value)
+        self.reset_button = QtWidgets.QPushButton("Reset", self)
+        self.reset_button.clicked.connect(self.reset)
+        self.count_label = QtWidgets.QLabel(self)
+        for box in (self.color_box, self.deadline_box, self.checklist_box,
+                    self.file_box):
+            self.main_layout.addWidget(box)
+            box.currentIndexChanged.connect(self.emit_filter)
+        self.main_layout.addWidget(QtWidgets.QLabel("Sort:", self))
+        self.main_layout.addWidget(self.sort_box)
+        self.sort_box.currentIndexChanged.connect(self.emit_filter)
+        self.main_layout.addWidget(self.reset_button)
+        self.main_layout.addWidget(self.count_label)
+        self.main_layout.addStretch()
+
+    def set_colors(self, colors: list):
+        """
+        метод для обновления списка цветов задач текущей таблицы, выбранный
+        цвет остается в списке
+        """
+        selected = self.color_box.currentData()
+        if selected is not None and selected not in colors:
+            colors = sorted((*colors, selected))
+        current = [self.color_box.itemData(index)
+                   for index in range(1, self.color_box.count())]
+        if current == list(colors):
+            return
+        blocked = self.color_box.blockSignals(True)
+        while self.color_box.count() > 1:
+            self.color_box.removeItem(1)
+        for color in colors:
+            pixmap = QtGui.QPixmap(12, 12)
+            pixmap.fill(QtGui.QColor(color))
+            self.color_box.addItem(QtGui.QIcon(pixmap), color, color)
+        self.color_box.setCurrentIndex(max(0, self.color_box.findData(selected)))
+        self.color_box.blockSignals(blocked)
+
+    def set_counts(self, total: int, matched: int):
+        """
+        метод для вывода количества подходящих задач таблицы
+        """
+        if self.task_filter.is_active():
+            self.count_label.setText(f"{matched} of {total} tasks")
+        else:
+            self.count_label.setText(f"{total} tasks")
+
+    def emit_filter(self):
+        """
+        метод для отправки сигнала с фильтром из выбранных значений
+        """
+        self.task_filter = TaskFilter(
+            self.color_box.currentData(), self.deadline_box.currentData(),
+            self.checklist_box.currentData(), self.file_box.currentData(),
+            self.sort_box.currentData())
+        self.filter_changed.emit(self.task_filter)
+
+    def reset(self):
+        """
+        метод для сброса всех полей панели к значениям по умолчанию
+        """
+        for box in (self.color_box, self.deadline_box, self.checklist_box,
+                    self.file_box, self.sort_box):
+            blocked = box.blockSignals(True)
+            box.setCurrentIndex(0)
+            box.blockSignals(blocked)
+        self.emit_filter()
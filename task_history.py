@@ -0,0 +1,257 @@
+from archive import TaskArchive
+from change_journal import NOW
+import numpy as np
+import time
+
+DONE_LAYOUT_ID = TaskArchive.DONE_LAYOUT_ID
+BACKLOG_LAYOUTS = (0, 1)  # списки "Resources" и "To Do", работа еще не начата
+DAY = 86400  # длина интервала графиков в секундах
+
+
+class TaskHistory:
+    """
+    Класс истории перемещений задач между списками: триггеры записывают
+    каждое добавление, перемещение и удаление задачи, поэтому время
+    выполнения и поток задач считаются по истории, а не по текущему
+    состоянию доски. id удаленных задач используются повторно, поэтому
+    при удалении записи задачи получают отрицательный id, равный минус
+    rowid записи об удалении, и не достаются новой задаче с тем же id
+    """
+
+    def __init__(self, db_connection):
+        self.db_connection = db_connection
+        self.db_cursor = self.db_connection.cursor()
+        self.create_history()
+
+    def create_history(self):
+        """
+        метод для создания таблицы истории и её триггеров, задачи старой
+        базы данных получают одну запись с их текущим списком
+        """
+        new_history = self.db_cursor.execute("""SELECT 1 FROM sqlite_master
+            WHERE type = 'table' AND name = 'task_history'""").fetchone() is None
+        delete_trigger = self.db_cursor.execute("""SELECT sql FROM sqlite_master
+            WHERE type = 'trigger' AND name = 'history_task_delete'""").fetchone()
+        # триггер удаления старой базы данных не переносит записи задачи
+        outdated = delete_trigger is not None and "UPDATE" not in delete_trigger[0]
+        if outdated:
+            self.db_cursor.execute("DROP TRIGGER history_task_delete")
+        # NULL в from_layout - задача появилась в таблице, в to_layout - покинула её
+        self.db_cursor.executescript(f"""
+            CREATE TABLE IF NOT EXISTS task_history(
+                task_id INTEGER,
+                table_id INTEGER,
+                from_layout INTEGER,
+                to_layout INTEGER,
+                moved_at REAL);
+            CREATE INDEX IF NOT EXISTS task_history_table_time
+                ON task_history(table_id, moved_at);
+            CREATE INDEX IF NOT EXISTS task_history_task
+                ON task_history(task_id, moved_at);
+            CREATE TRIGGER IF NOT EXISTS history_task_insert AFTER INSERT ON tasks
+            BEGIN
+                INSERT INTO task_history
+                VALUES (NEW.id, NEW.table_id, NULL, NEW.layout_id, {NOW});
+            END;
+            CREATE TRIGGER IF NOT EXISTS history_task_move
+            AFTER UPDATE OF layout_id, table_id ON tasks
+            WHEN OLD.layout_id IS NOT NEW.layout_id OR OLD.table_id IS NOT NEW.table_id
+            BEGIN
+                INSERT INTO task_history
+                SELECT OLD.id, OLD.table_id, OLD.layout_id, NULL, {NOW}
+                WHERE OLD.table_id IS NOT NEW.table_id;
+                INSERT INTO task_history
+                VALUES (NEW.id, NEW.table_id,
+                    CASE WHEN OLD.table_id IS NEW.table_id THEN OLD.layout_id END,
+                    NEW.layout_id, {NOW});
+            END;
+            CREATE TRIGGER IF NOT EXISTS history_task_delete AFTER DELETE ON tasks
+            BEGIN
+                INSERT INTO task_history
+                VALUES (OLD.id, OLD.table_id, OLD.layout_id, NULL, {NOW});
+                UPDATE task_history SET task_id = -last_insert_rowid()
+                WHERE task_id = OLD.id;
+            END;
+            CREATE TRIGGER IF NOT EXISTS history_task_rekey AFTER UPDATE OF id ON tasks
+            WHEN OLD.id IS NOT NEW.id
+            BEGIN
+                UPDATE task_history SET task_id = NEW.id WHERE task_id = OLD.id;
+            END;""")
+        if new_history:
+            self.db_cursor.execute(f"""INSERT INTO task_history
+                SELECT id, table_id, NULL, layout_id, COALESCE(
+                    CASE WHEN layout_id = {DONE_LAYOUT_ID} THEN done_at END,
+                    created_at, {NOW})
+                FROM tasks""")
+        elif outdated:
+            self.separate_reused_ids()
+        self.db_connection.commit()
+
+    def separate_reused_ids(self):
+        """
+        метод для переноса записей истории, сохраненных до появления триггера
+        удаления с переносом: записи удаленных задач и записи, сделанные до
+        создания задачи с тем же id, получают отрицательный id, общий для
+        всех таких записей одного id
+        """
+        self.db_cursor.executescript("""
+            CREATE TEMP TABLE stale_history(row_id INTEGER PRIMARY KEY, task_id INTEGER);
+            INSERT INTO stale_history
+                SELECT task_history.rowid,
+                    -MAX(task_history.rowid) OVER (PARTITION BY task_history.task_id)
+                FROM task_history LEFT JOIN tasks ON tasks.id = task_history.task_id
+                WHERE task_history.task_id >= 0 AND (tasks.id IS NULL
+                    OR task_history.moved_at < tasks.created_at - 1);
+            UPDATE task_history SET task_id = (
+                SELECT task_id FROM stale_history WHERE row_id = task_history.rowid)
+            WHERE rowid IN (SELECT row_id FROM stale_history);
+            DROP TABLE temp.stale_history;""")
+
+    @staticmethod
+    def read_flow_data(cursor, table_id: int, since: float):
+        """
+        метод для чтения данных для аналитики таблицы за период с заданного
+        времени до текущего момента, читаются только записи периода, история
+        выполненных в нем задач и текущее количество задач в списках, поэтому
+        время чтения не зависит от длины всей истории
+        args(
+            cursor: sqlite3.Cursor - курсор любого подключения к базе данных,
+            table_id: int - id таблицы,
+            since: float - начало периода
+        )
+        """
+        # перемещения периода в виде (from_layout, to_layout, moved_at), NULL -> -1
+        moves = np.array(cursor.execute("""SELECT COALESCE(from_layout, -1),
+            COALESCE(to_layout, -1), moved_at FROM task_history
+            WHERE table_id = ? AND moved_at >= ? ORDER BY moved_at""",
+                                        (table_id, since)).fetchall(),
+                         dtype=np.float64).reshape(-1, 3)
+        # вся история задач, перемещенных в "Done" за период
+        done_history = np.array(cursor.execute(f"""SELECT task_id,
+            COALESCE(from_layout, -1), COALESCE(to_layout, -1), moved_at
+            FROM task_history WHERE task_id IN (
+                SELECT task_id FROM task_history
+                WHERE table_id = ? AND moved_at >= ?
+                AND to_layout = {DONE_LAYOUT_ID} AND from_layout IS NOT NULL)
+            ORDER BY task_id, moved_at""", (table_id, since)).fetchall(),
+                                dtype=np.float64).reshape(-1, 4)
+        counts = dict(cursor.execute("""SELECT layout_id, COUNT(*) FROM tasks
+            WHERE table_id = ? GROUP BY layout_id""", (table_id,)))
+        # архивные задачи остаются выполненными на накопительной диаграмме
+        counts[DONE_LAYOUT_ID] = counts.get(DONE_LAYOUT_ID, 0) + cursor.execute(
+            "SELECT COUNT(*) FROM archived_tasks WHERE table_id = ?",
+            (table_id,)).fetchone()[0]
+        return {"moves": moves, "done_history": done_history, "counts": counts,
+                "since": since, "until": time.time()}
+
+
+def get_completion_times(done_history, since: float):
+    """
+    функция для расчета времени выполнения задач, перемещенных в "Done"
+    за период, возвращает массивы времени завершения, времени от появления
+    задачи до завершения (lead time) и от начала работы до завершения
+    (cycle time) в секундах
+    args(
+        done_history: np.ndarray - строки (task_id, from, to, moved_at),
+                                   отсортированные по задаче и времени,
+        since: float - начало периода
+    )
+    """
+    if not len(done_history):
+        empty = np.empty(0)
+        return empty, empty, empty
+    tasks = done_history[:, 0].astype(np.int64)
+    from_layouts = done_history[:, 1]
+    to_layouts = done_history[:, 2]
+    moved_at = done_history[:, 3]
+    # первая запись задачи - её появление на доске
+    tasks_ids, first_index = np.unique(tasks, return_index=True)
+    created = moved_at[first_index]
+    # последнее перемещение в "Done", записи в обратном порядке дают последнее
+    # вхождение как первое
+    done_mask = (to_layouts == DONE_LAYOUT_ID) & (from_layouts >= 0)
+    done_tasks, last_index = np.unique(tasks[done_mask][::-1], return_index=True)
+    completed = moved_at[done_mask][::-1][last_index]
+    # начало работы - первый выход из списков, где работа еще не начата
+    started_mask = (to_layouts >= 0) & ~np.isin(to_layouts, BACKLOG_LAYOUTS)
+    started_tasks, started_index = np.unique(tasks[started_mask], return_index=True)
+    started = completed.copy()
+    positions = np.searchsorted(done_tasks, started_tasks)
+    found = positions < len(done_tasks)
+    found[found] = done_tasks[positions[found]] == started_tasks[found]
+    started[positions[found]] = moved_at[started_mask][started_index][found]
+    lead = completed - created[np.searchsorted(tasks_ids, done_tasks)]
+    cycle = completed - np.minimum(started, completed)
+    in_period = completed >= since
+    return completed[in_period], lead[in_period], cycle[in_period]
+
+
+def get_cumulative_flow(moves, counts: dict, since: float, until: float,
+                        bucket=DAY):
+    """
+    функция для расчета накопительной диаграммы потока: количество задач
+    каждого списка в конце каждого интервала, восстанавливается в обратном
+    порядке от текущего количества, возвращает список id лэйаутов и массив
+    размера (количество списков, количество интервалов)
+    args(
+        moves: np.ndarray - строки (from, to, moved_at) периода по времени,
+        counts: dict - текущее количество задач в списках,
+        since: float - начало периода,
+        until: float - конец периода,
+        bucket: int - длина интервала в секундах
+    )
+    """
+    buckets_count = max(1, int(np.ceil((until - since) / bucket)))
+    from_layouts = moves[:, 0].astype(np.int64)
+    to_layouts = moves[:, 1].astype(np.int64)
+    # удаление из "Done" (архивация) не уменьшает количество выполненных задач
+    leave_mask = (from_layouts >= 0) & ~(
+        (from_layouts == DONE_LAYOUT_ID) & (to_layouts < 0))
+    enter_mask = to_layouts >= 0
+    layouts = np.union1d(np.fromiter(counts, dtype=np.int64, count=len(counts)),
+                         np.concatenate((from_layouts[leave_mask],
+                                         to_layouts[enter_mask])))
+    buckets = np.minimum(((moves[:, 2] - since) // bucket).astype(np.int64),
+                         buckets_count - 1)
+    # изменение количества задач каждого списка в каждом интервале
+    cells = np.concatenate((
+        np.searchsorted(layouts, to_layouts[enter_mask]) * buckets_count
+        + buckets[enter_mask],
+        np.searchsorted(layouts, from_layouts[leave_mask]) * buckets_count
+        + buckets[leave_mask]))
+    weights = np.concatenate((np.ones(enter_mask.sum()), -np.ones(leave_mask.sum())))
+    deltas = np.bincount(cells, weights, minlength=len(layouts) * buckets_count)
+    deltas = deltas.reshape(len(layouts), buckets_count)
+    current = np.array([counts.get(layout_id, 0) for layout_id in layouts],
+                       dtype=np.float64)
+    # количество в конце интервала - текущее минус изменения после него
+    flow = current[:, None] - (deltas.sum(axis=1)[:, None]
+                               - np.cumsum(deltas, axis=1))
+    return layouts.tolist(), flow
+
+
+def get_flow_metrics(flow_data: dict, bucket=DAY):
+    """
+    функция для расчета аналитики потока задач по данным read_flow_data:
+    накопительной диаграммы, количества выполненных задач за интервал,
+    времени выполнения задач в днях и их сводки
+    """
+    since = flow_data["since"]
+    until = flow_data["until"]
+    layouts, flow = get_cumulative_flow(flow_data["moves"], flow_data["counts"],
+                                        since, until, bucket)
+    completed, lead, cycle = get_completion_times(flow_data["done_history"], since)
+    throughput = np.bincount(
+        np.minimum(((completed - since) // bucket).astype(np.int64),
+                   flow.shape[1] - 1),
+        minlength=flow.shape[1])
+    lead_days = lead / DAY
+    cycle_days = cycle / DAY
+    summary = {"completed": len(completed),
+               "throughput_per_week": len(completed) / max((until - since) / DAY, 1) * 7}
+    for name, values in (("lead", lead_days), ("cycle", cycle_days)):
+        summary[name] = (None if not len(values) else
+                         (float(np.median(values)), float(np.percentile(values, 85))))
+    return {"days": np.arange(flow.shape[1]) * bucket / DAY, "layouts": layouts,
+            "flow": flow, "throughput": throughput, "lead": lead_days,
+            "cycle": cycle_days, "summary": summary}
@@ -0,0 +1,315 @@
+import concurrent.futures
+import csv
+import datetime
+import itertools
+import json
+import multiprocessing
+import os
+from PyQt5 import QtCore
+import re
+import threading
+from task_model import Task
+
+COLOR_PATTERN = re.compile(r"#[0-9a-fA-F]{6}")  # цвет в формате #rrggbb
+DEFAULT_COLOR = "#8cff7a"  # цвет задачи, если он не указан
+ATTACHMENTS_KEYS = {"deadline", "checklist", "file"}  # допустимые обвесы
+CHUNK_SIZE = 2000  # количество записей, проверяемых одним процессом за раз
+
+
+def validate_attachments(attachments):
+    """
+    функция для проверки обвесов задачи, возвращает текст ошибки или None
+    """
+    if not isinstance(attachments, dict):
+        return "'attachments' must be an object"
+    unknown = set(attachments) - ATTACHMENTS_KEYS
+    if unknown:
+        return f"unknown attachments: {', '.join(sorted(unknown))}"
+    deadline = attachments.get("deadline")
+    if deadline is not None:
+        try:
+            datetime.datetime.strptime(deadline, "%d.%m.%Y %H:%M")
+        except (TypeError, ValueError):
+            return f"invalid deadline {deadline!r}, expected dd.mm.yyyy hh:mm"
+    checklist = attachments.get("checklist")
+    if checklist is not None and not (
+            isinstance(checklist, list) and all(
+                isinstance(item, list) and len(item) == 2
+                and isinstance(item[0], str) and isinstance(item[1], bool)
+                for item in checklist)):
+        return "'checklist' must be a list of [text, done] pairs"
+    file_path = attachments.get("file")
+    if file_path is not None and not isinstance(file_path, str):
+        return "'file' must be a string"
+    return None
+
+
+def validate_record(record):
+    """
+    функция для проверки записи задачи и приведения её к строке базы данных,
+    возвращает (строка, None) или (None, текст ошибки), строка имеет вид
+    (comment, color, attachments, checklist_done, checklist_total,
+     deadline_date, file_path)
+    """
+    if not isinstance(record, dict):
+        return None, "record must be an object"
+    text = record.get("text")
+    if not isinstance(text, str) or not text.strip():
+        return None, "'text' must be a non-empty string"
+    color = record.get("color") or DEFAULT_COLOR
+    if not isinstance(color, str) or not COLOR_PATTERN.fullmatch(color):
+        return None, f"invalid color {color!r}"
+    attachments = record.get("attachments")
+    # в csv обвесы хранятся строкой json
+    if isinstance(attachments, str):
+        try:
+            attachments = json.loads(attachments) if attachments.strip() else None
+        except ValueError as err:
+            return None, f"invalid attachments json ({err})"
+    if attachments is not None:
+        error = validate_attachments(attachments)
+        if error is not None:
+            return None, error
+    attachments = attachments or None
+    return (text, color, None if attachments is None else json.dumps(attachments),
+            *Task.get_summary(attachments)), None
+
+
+def validate_chunk(records: list, start: int):
+    """
+    функция для проверки части записей в процессе пула, возвращает список
+    строк и список ошибок вида [(номер записи, текст ошибки), ...]
+    """
+    rows = []
+    errors = []
+    for number, record in enumerate(records, start):
+        row, error = validate_record(record)
+        if error is None:
+            rows.append(row)
+        else:
+            errors.append((number, error))
+    return rows, errors
+
+
+def parse_lines_chunk(lines: list, start: int):
+    """
+    функция для разбора и проверки части строк jsonl в процессе пула,
+    пустые строки пропускаются
+    """
+    rows = []
+    errors = []
+    for number, line in enumerate(lines, start):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as err:
+            errors.append((number, f"invalid json ({err})"))
+            continue
+        row, error = validate_record(record)
+        if error is None:
+            rows.append(row)
+        else:
+            errors.append((number, error))
+    return rows, errors
+
+
+class ImportSignals(QtCore.QObject):
+    """
+    Класс сигналов для передачи хода и результата импорта из рабочего потока
+    """
+    progress = QtCore.pyqtSignal(int, int)  # проверено килобайт файла, всего
+    finished = QtCore.pyqtSignal(object, object)  # строки, ошибки
+    failed = QtCore.pyqtSignal(str)  # текст ошибки чтения файла
+
+
+class ImportJob(QtCore.QRunnable):
+    """
+    Класс задачи рабочего потока для чтения файла с задачами и проверки
+    записей в пуле процессов
+    """
+
+    def __init__(self, file_path: str, signals: ImportSignals):
+        super().__init__()
+        self.file_path = file_path
+        self.signals = signals
+        self.cancelled = threading.Event()
+
+    def read_chunks(self, f, file_size: int):
+        """
+        генератор частей файла вида (функция проверки, записи, номер первой
+        записи, прочитано байт файла), строки jsonl и csv читаются частями,
+        поэтому исходные записи в памяти находятся только для проверяемых
+        частей, а проверенные строки собираются для вставки все сразу
+        args(
+            f: io.TextIOWrapper - открытый файл,
+            file_size: int - размер файла в байтах
+        )
+        """
+        extension = os.path.splitext(self.file_path)[1].lower()
+        if extension in (".jsonl", ".ndjson", ".csv"):
+            if extension == ".csv":
+                function = validate_chunk
+                records_iterator = csv.DictReader(f)
+            else:
+                # строки jsonl разбираются прямо в процессах пула
+                function = parse_lines_chunk
+                records_iterator = iter(f)
+            start = 1
+            while True:
+                records = list(itertools.islice(records_iterator, CHUNK_SIZE))
+                if not records:
+                    return
+                yield function, records, start, f.buffer.tell()
+                start += len(records)
+        # документ json разбирается только целиком
+        records = json.load(f)
+        # файл, сохраненный через экспорт, содержит одну задачу
+        if isinstance(records, dict):
+            records = [records]
+        elif not isinstance(records, list):
+            raise ValueError("JSON file must contain a task or a list of tasks")
+        for start in range(0, len(records), CHUNK_SIZE):
+            end = min(start + CHUNK_SIZE, len(records))
+            yield (validate_chunk, records[start:end], start + 1,
+                   file_size * end // len(records))
+
+    def run(self):
+        """
+        метод для чтения и проверки записей в рабочем потоке, любое
+        исключение передается сигналом, так как исключение, вышедшее
+        из QRunnable, завершает программу, а диалог импорта не закрылся бы
+        """
+        try:
+            with open(self.file_path, "r", encoding="utf-8-sig", newline="") as f:
+                file_size = os.fstat(f.fileno()).st_size
+                chunks = self.read_chunks(f, file_size)
+                first_chunks = list(itertools.islice(chunks, 2))
+                if len(first_chunks) <= 1:
+                    # запуск процессов для небольшого файла дольше самой проверки
+                    results = [function(records, start)
+                               for function, records, start, _ in first_chunks]
+                else:
+                    results = self.run_in_process_pool(
+                        itertools.chain(first_chunks, chunks), file_size)
+        except (OSError, ValueError, csv.Error) as err:
+            self.signals.failed.emit(str(err))
+            return
+        except Exception as err:
+            # например BrokenProcessPool при аварийном завершении процесса пула
+            self.signals.failed.emit(f"{type(err).__name__}: {err}")
+            return
+        if results is None or self.cancelled.is_set():
+            return
+        rows = []
+        errors = []
+        for chunk_rows, chunk_errors in results:
+            rows.extend(chunk_rows)
+            errors.extend(chunk_errors)
+        self.signals.finished.emit(rows, errors)
+
+    def run_in_process_pool(self, chunks, file_size: int):
+        """
+        метод для проверки частей файла в пуле процессов по мере их чтения
+        с сохранением порядка записей, количество частей в очереди пула
+        ограничено, возвращает None при отмене импорта
+        """
+        workers = os.cpu_count() or 1
+        results = []
+        pending = {}  # future: (номер части, прочитано байт файла)
+        done_size = 0
+        # spawn не копирует потоки и состояние Qt основного процесса
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn")) as executor:
+            for index, (function, records, start, position) in enumerate(chunks):
+                pending[executor.submit(function, records, start)] = (index, position)
+                results.append(None)
+                while len(pending) >= 2 * workers:
+                    done, _ = concurrent.futures.wait(
+                        pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        future_index, position = pending.pop(future)
+                        results[future_index] = future.result()
+                        done_size = max(done_size, position)
+                    self.signals.progress.emit(done_size // 1024, file_size // 1024)
+                if self.cancelled.is_set():
+                    executor.shutdown(cancel_futures=True)
+                    return None
+            for future in concurrent.futures.as_completed(pending):
+                if self.cancelled.is_set():
+                    executor.shutdown(cancel_futures=True)
+                    return None
+                future_index, position = pending[future]
+                results[future_index] = future.result()
+                done_size = max(done_size, position)
+                self.signals.progress.emit(done_size // 1024, file_size // 1024)
+        return results
+
+
+class TaskImporter(QtCore.QObject):
+    """
+    Класс для импорта большого количества задач из файлов JSON, JSONL и CSV,
+    записи проверяются в фоне, ошибочные записи пропускаются
+    """
+    # сигнал с id лэйаута, списком строк для базы данных и списком ошибок
+    import_finished = QtCore.pyqtSignal(int, object, object)
+    import_failed = QtCore.pyqtSignal(str)  # текст ошибки
+    progress_changed = QtCore.pyqtSignal(int, int)  # проверено килобайт, всего
+    FILE_FILTER = "Tasks (*.json *.jsonl *.ndjson *.csv)"
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.job = None  # выполняющаяся задача импорта
+        self.layout_id = None  # id лэйаута, в который импортируются задачи
+        self.thread_pool = QtCore.QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(1)
+        self.signals = ImportSignals(self)
+        self.signals.progress.connect(self.progress_changed)
+        self.signals.finished.connect(self.handle_finished)
+        self.signals.failed.connect(self.handle_failed)
+
+    def start_import(self, file_path: str, layout_id: int):
+        """
+        метод для запуска импорта файла, возвращает False, если другой импорт
+        еще не завершен
+        """
+        if self.job is not None:
+            return False
+        self.layout_id = layout_id
+        self.job = ImportJob(file_path, self.signals)
+        self.thread_pool.start(self.job)
+        return True
+
+    def cancel(self):
+        """
+        метод для отмены импорта, задачи из отмененного импорта не добавляются
+        """
+        if self.job is not None:
+            self.job.cancelled.set()
+            self.job = None
+
+    def handle_finished(self, rows: list, errors: list):
+        """
+        метод для передачи проверенных записей
+        """
+        if self.job is None:
+            return
+        self.job = None
+        self.import_finished.emit(self.layout_id, rows, errors)
+
+    def handle_failed(self, error: str):
+        """
+        метод для передачи ошибки чтения файла
+        """
+        if self.job is None:
+            return
+        self.job = None
+        self.import_failed.emit(error)
+
+    def stop(self):
+        """
+        метод для отмены импорта и ожидания рабочего потока
+        """
+        self.cancel()
+        self.thread_pool.waitForDone()
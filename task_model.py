@@ -0,0 +1,151 @@
+import datetime
+import json
+
+
+class Task:
+    """
+    Класс записи с данными задачи, которую отображают виджеты задач
+    """
+    __slots__ = ("id", "text", "color", "layout_id", "checklist_done",
+                 "checklist_total", "deadline_date", "file_path",
+                 "_attachments", "_attachments_json")
+
+    def __init__(self, id_, text, color="#8cff7a", attachments=None, layout_id=0):
+        self.id = id_
+        self.text = text
+        self.color = color
+        self.layout_id = layout_id
+        self.attachments = attachments  # словарь с обвесами задачи или None
+
+    @classmethod
+    def from_row(cls, row):
+        """
+        метод для создания задачи из строки базы данных без разбора json
+        с обвесами, сводка по ним берется из сохраненных столбцов
+        args(
+            row: tuple - (id, comment, color, attachments, layout_id,
+                          checklist_done, checklist_total, deadline_date,
+                          file_path)
+        )
+        """
+        task = cls.__new__(cls)
+        (task.id, task.text, task.color, task._attachments_json, task.layout_id,
+         task.checklist_done, task.checklist_total, task.deadline_date,
+         task.file_path) = row
+        task.checklist_done = task.checklist_done or 0
+        task.checklist_total = task.checklist_total or 0
+        task._attachments = None
+        return task
+
+    def update(self, task):
+        """
+        метод для замены данных задачи данными другой записи той же задачи,
+        виджеты, отображающие задачу, продолжают ссылаться на эту запись
+        """
+        for name in self.__slots__:
+            setattr(self, name, getattr(task, name))
+
+    @property
+    def attachments(self):
+        """
+        обвесы задачи, json из базы данных разбирается при первом обращении
+        """
+        if self._attachments_json is not None:
+            self._attachments = json.loads(self._attachments_json)
+            self._attachments_json = None
+        return self._attachments
+
+    @attachments.setter
+    def attachments(self, attachments):
+        self._attachments = attachments
+        self._attachments_json = None
+        (self.checklist_done, self.checklist_total, self.deadline_date,
+         self.file_path) = self.get_summary(attachments)
+
+    @staticmethod
+    def get_summary(attachments):
+        """
+        метод для вычисления количества выполненных и всех пунктов чеклиста,
+        даты дэдлайна в формате ГГГГ-ММ-ДД ЧЧ:ММ и пути к прикрепленному файлу
+        """
+        if not attachments:
+            return 0, 0, None, None
+        checklist = attachments.get("checklist") or ()
+        done = sum(1 for _, checked in checklist if checked)
+        deadline = attachments.get("deadline")
+        if deadline is not None:
+            try:
+                deadline = datetime.datetime.strptime(
+                    deadline, "%d.%m.%Y %H:%M").strftime("%Y-%m-%d %H:%M")
+            except ValueError:
+                deadline = None
+        return done, len(checklist), deadline, attachments.get("file") or None
+
+    def to_dict(self):
+        """
+        метод для получения словаря с данными задачи для экспорта и запросов
+        к базе данных
+        """
+        return {
+            "text": self.text,
+            "color": self.color,
+            "id": self.id,
+            "attachments": self.attachments,
+            "layout_id": self.layout_id,
+            "checklist_done": self.checklist_done,
+            "checklist_total": self.checklist_total,
+            "deadline_date": self.deadline_date,
+            "file_path": self.file_path,
+        }
+
+
+class TaskStore:
+    """
+    Класс хранилища задач по id, которому принадлежат записи задач: виджеты
+    только отображают записи из хранилища, запись удаляется из хранилища
+    вместе с задачей при её удалении или переносе в архив, а также когда
+    её больше не отображает ни один виджет доски, кэша таблиц или окно
+    закрепленной задачи
+    """
+
+    def __init__(self):
+        self.tasks = {}
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def add(self, task: Task):
+        """
+        метод для добавления задачи в хранилище, возвращает запись из
+        хранилища: если запись задачи уже есть, её данные заменяются данными
+        новой записи, чтобы все виджеты отображали одну запись
+        """
+        stored = self.tasks.get(task.id)
+        if stored is None:
+            self.tasks[task.id] = task
+            return task
+        if stored is not task:
+            stored.update(task)
+        return stored
+
+    def get(self, task_id: int):
+        """
+        метод для получения задачи по id, возвращает None, если её нет
+        """
+        return self.tasks.get(task_id)
+
+    def discard(self, task_id: int):
+        """
+        метод для удаления задачи из хранилища
+        """
+        self.tasks.pop(task_id, None)
+
+    def retain(self, tasks_ids: set):
+        """
+        метод для удаления из хранилища всех задач, кроме заданных
+        args(
+            tasks_ids: set - id задач, записи которых еще используются
+        )
+        """
+        for task_id in self.tasks.keys() - tasks_ids:
+            del self.tasks[task_id]
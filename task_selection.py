@@ -0,0 +1,152 @@
+from PyQt5 import QtWidgets, QtCore
+
+
+class TaskSelection:
+    """
+    Класс для хранения выбранных виджетов задач
+    """
+
+    def __init__(self):
+        self.widgets = {}  # id задачи: виджет задачи в порядке выбора
+        self.anchor = None  # виджет, от которого выбирается диапазон
+
+    def __contains__(self, task_id):
+        return task_id in self.widgets
+
+    def __len__(self):
+        return len(self.widgets)
+
+    def select(self, widget):
+        """
+        метод для добавления виджета в выделение
+        """
+        self.widgets[widget.get_id()] = widget
+        widget.set_selected(True)
+        self.anchor = widget
+
+    def deselect(self, widget):
+        """
+        метод для удаления виджета из выделения
+        """
+        self.discard(widget.get_id())
+        widget.set_selected(False)
+
+    def discard(self, task_id: int):
+        """
+        метод для удаления задачи из выделения без изменения виджета,
+        используется для удаляемых виджетов
+        """
+        widget = self.widgets.pop(task_id, None)
+        if widget is not None and widget is self.anchor:
+            self.anchor = None
+
+    def toggle(self, widget):
+        """
+        метод для изменения состояния выделения виджета
+        """
+        if widget.get_id() in self.widgets:
+            self.deselect(widget)
+        else:
+            self.select(widget)
+
+    def select_only(self, widget):
+        """
+        метод для выделения единственного виджета
+        """
+        self.clear()
+        self.select(widget)
+
+    def select_range(self, layout: QtWidgets.QLayout, widget):
+        """
+        метод для выделения всех виджетов лэйаута между опорным и заданным
+        """
+        widgets = [layout.itemAt(index).widget()
+                   for index in range(layout.count())]
+        if self.anchor not in widgets:
+            self.select(widget)
+            return
+        anchor = self.anchor
+        start, end = sorted((widgets.index(anchor), widgets.index(widget)))
+        for item in widgets[start:end + 1]:
+            # карточки, скрытые фильтром доски, не выделяются
+            if item.isHidden():
+                continue
+            self.widgets[item.get_id()] = item
+            item.set_selected(True)
+        self.anchor = anchor
+
+    def clear(self):
+        """
+        метод для снятия выделения со всех виджетов
+        """
+        for widget in self.widgets.values():
+            widget.set_selected(False)
+        self.widgets.clear()
+        self.anchor = None
+
+    def get_ids(self):
+        """
+        метод для получения списка id выделенных задач
+        """
+        return list(self.widgets)
+
+    def get_widgets(self):
+        """
+        метод для получения списка выделенных виджетов
+        """
+        return list(self.widgets.values())
+
+
+class RubberBandSelector(QtCore.QObject):
+    """
+    Класс для выделения задач рамкой, начатой на пустом месте любого списка
+    или между задачами
+    """
+    # сигнал с областью выделения в координатах целевого виджета и флагом
+    # добавления к текущему выделению
+    area_selected = QtCore.pyqtSignal(QtCore.QRect, bool)
+
+    def __init__(self, target: QtWidgets.QWidget, parent=None):
+        super().__init__(parent)
+        self.target = target  # виджет, на котором рисуется рамка
+        self.rubber_band = QtWidgets.QRubberBand(
+            QtWidgets.QRubberBand.Rectangle, self.target)
+        self.origin = None
+        self.started_on_empty_space = False
+
+    def eventFilter(self, obj, event):
+        """
+        метод для обработки событий мыши списков задач
+        """
+        if event.type() == QtCore.QEvent.MouseButtonPress:
+            # рамка начинается на пустом месте списка или между задачами
+            child = obj.childAt(event.pos())
+            if (event.button() == QtCore.Qt.LeftButton
+                    and (child is None or child.parentWidget() is obj)):
+                self.origin = obj.mapTo(self.target, event.pos())
+                self.started_on_empty_space = child is None
+                self.rubber_band.setGeometry(QtCore.QRect(self.origin,
+                                                          QtCore.QSize()))
+                self.rubber_band.show()
+                return True
+        elif event.type() == QtCore.QEvent.MouseMove and self.origin is not None:
+            self.rubber_band.setGeometry(QtCore.QRect(
+                self.origin, obj.mapTo(self.target, event.pos())).normalized())
+            return True
+        elif (event.type() == QtCore.QEvent.MouseButtonRelease
+              and self.origin is not None):
+            self.rubber_band.hide()
+            self.origin = None
+            additive = bool(event.modifiers() & (QtCore.Qt.ControlModifier
+                                                 | QtCore.Qt.ShiftModifier))
+            area = self.rubber_band.geometry()
+            # короткое нажатие без перемещения не считается выделением рамкой,
+            # но на пустом месте снимает выделение
+            if (area.width() + area.height()
+                    < QtWidgets.QApplication.startDragDistance()):
+                if not self.started_on_empty_space:
+                    return True
+                area = QtCore.QRect()
+            self.area_selected.emit(area, additive)
+            return True
+        return False
@@ -0,0 +1,762 @@
+import argparse
+from change_journal import ChangeJournal, JOURNALED_TABLES, rows_to_dicts
+import http.server
+import json
+from PyQt5 import QtCore
+import sqlite3
+import sys
+import threading
+import urllib.parse
+import urllib.request
+import uuid
+
+# сущность журнала: (таблица, ключевые столбцы)
+SYNCED_ENTITIES = {
+    "task": ("tasks", ("id",)),
+    "table": ("tables", ("id",)),
+    "column": ("columns", ("table_id", "layout_id")),
+}
+# сущность журнала: все синхронизируемые столбцы её строки
+ENTITY_FIELDS = {entity: fields for entity, _, _, fields in JOURNALED_TABLES.values()}
+# слияние по отдельным столбцам или замена строки целиком по времени изменения
+POLICIES = ("fields", "lww")
+BATCH_SIZE = 500  # количество записей журнала в одном запросе к серверу
+SERVER_ORIGIN = "server"  # источник записей, полученных клиентом с сервера
+
+
+def check_database(db_connection):
+    """
+    функция для проверки, что база данных создана текущей версией программы
+    """
+    columns = {row[1] for row in db_connection.execute("PRAGMA table_info(tasks)")}
+    if "created_at" not in columns:
+        raise ValueError("the database must be opened by the application "
+                         "before it can be synchronized")
+
+
+def get_pending(cursor, key: tuple, after_version: int, exclude_origin=None):
+    """
+    функция для получения изменений строки, о которых другая сторона еще
+    не знает, возвращает None или словарь вида {"changed_at": время,
+    "fields": {столбец: время}, "deleted": bool}, запрос идет по индексу
+    журнала, поэтому не зависит от количества других изменений
+    args(
+        cursor: sqlite3.Cursor - курсор базы данных,
+        key: tuple - (сущность, id сущности, id лэйаута),
+        after_version: int - версия журнала, после которой ищутся изменения,
+        exclude_origin: str - источник, изменения которого не учитываются,
+                              по умолчанию учитываются только локальные изменения
+    )
+    """
+    if exclude_origin is None:
+        condition, params = "origin IS NULL", (*key, after_version)
+    else:
+        condition, params = "origin IS NOT ?", (*key, after_version, exclude_origin)
+    entry = None
+    for operation, fields, changed_at in cursor.execute(
+            f"""SELECT operation, fields, changed_at FROM journal
+            WHERE entity = ? AND entity_id = ? AND layout_id IS ?
+            AND version > ? AND {condition} ORDER BY version""", params).fetchall():
+        if entry is None:
+            entry = {"changed_at": changed_at, "fields": {}, "deleted": False}
+        entry["changed_at"] = max(entry["changed_at"], changed_at)
+        entry["deleted"] = operation == "delete"
+        if operation == "delete":
+            continue
+        if operation == "insert" or fields is None:
+            names = ENTITY_FIELDS[key[0]]
+        else:
+            names = [field for field in fields.split(",") if field]
+        for name in names:
+            entry["fields"][name] = max(entry["fields"].get(name, changed_at),
+                                        changed_at)
+    return entry
+
+
+class ChangeMerger:
+    """
+    Класс для применения записей журнала другой базы данных: изменение
+    пропускается, если та же строка или тот же столбец изменены на этой
+    стороне позже, при равном времени побеждает сервер. Задача с тем же id,
+    но другим временем создания, считается другой задачей и получает новый id
+    """
+
+    def __init__(self, cursor, after_version: int, exclude_origin, policy: str,
+                 origin: str, prefer_local: bool, rename_local: bool):
+        """
+        args(
+            cursor: sqlite3.Cursor - курсор с открытой транзакцией записи,
+            after_version: int - версия журнала этой стороны, после которой
+                                 изменения неизвестны другой стороне,
+            exclude_origin: str - источник, изменения которого не считаются
+                                  изменениями этой стороны, см. get_pending,
+            policy: str - "fields" или "lww",
+            origin: str - источник, которым помечаются внесенные записи журнала,
+            prefer_local: bool - побеждает ли эта сторона при равном времени,
+            rename_local: bool - получает ли новый id локальная задача
+                                 (клиент) или пришедшая задача (сервер)
+        )
+        """
+        self.cursor = cursor
+        self.after_version = after_version
+        self.exclude_origin = exclude_origin
+        self.policy = policy
+        self.origin = origin
+        self.prefer_local = prefer_local
+        self.rename_local = rename_local
+        self.remapped = {}  # id пришедших задач, замененные из-за совпадения
+        self.applied = 0  # количество внесенных изменений
+
+    def local_wins(self, local_time: float, remote_time: float):
+        """
+        метод для сравнения времени локального и пришедшего изменения
+        """
+        return local_time > remote_time or (
+            local_time == remote_time and self.prefer_local)
+
+    @staticmethod
+    def is_same_task(row: dict, data: dict):
+        """
+        метод для проверки, что строка и данные описывают одну задачу,
+        у задач старых баз данных время создания неизвестно
+        """
+        return (row["created_at"] is None or data.get("created_at") is None
+                or row["created_at"] == data["created_at"])
+
+    def write(self, changed_at: float, query: str, params: tuple):
+        """
+        метод для выполнения изменения, записи журнала получают время исходного
+        изменения и источник, чтобы не быть отправленными обратно
+        """
+        start = ChangeJournal.get_last_version(self.cursor)
+        self.cursor.execute(query, params)
+        self.cursor.execute("""UPDATE journal SET origin = ?, changed_at = ?
+            WHERE version > ?""", (self.origin, changed_at, start))
+        self.applied += 1
+
+    def apply(self, changes: list):
+        """
+        метод для применения списка записей журнала в порядке версий
+        """
+        for change in changes:
+            self.apply_change(change)
+
+    def get_row(self, table: str, keys: tuple, key_values: tuple):
+        """
+        метод для получения строки по ключу в виде словаря или None
+        """
+        where = " AND ".join(f"{column} = ?" for column in keys)
+        self.cursor.execute(f"SELECT * FROM {table} WHERE {where}", key_values)
+        rows = rows_to_dicts(self.cursor, self.cursor.fetchall())
+        return rows[0] if rows else None
+
+    def apply_change(self, change: dict):
+        """
+        метод для применения одной записи журнала с учетом изменений этой стороны
+        """
+        entity = change["entity"]
+        table, keys = SYNCED_ENTITIES[entity]
+        entity_id = change["entity_id"]
+        if entity == "task":
+            entity_id = self.remapped.get(entity_id, entity_id)
+        key_values = ((entity_id, change["layout_id"]) if entity == "column"
+                      else (entity_id,))
+        data = change["data"]
+        if data is not None:
+            data = dict(data, **dict(zip(keys, key_values)))
+        row = self.get_row(table, keys, key_values)
+        if (entity == "task" and row is not None and data is not None
+                and not self.is_same_task(row, data)):
+            if change["operation"] == "delete":
+                return
+            entity_id = self.resolve_collision(change["entity_id"], entity_id)
+            key_values = (entity_id,)
+            data["id"] = entity_id
+            row = None
+        local = get_pending(self.cursor, (entity, entity_id, change["layout_id"]),
+                            self.after_version, self.exclude_origin)
+        changed_at = change["changed_at"]
+        where = " AND ".join(f"{column} = ?" for column in keys)
+        if change["operation"] == "delete":
+            if row is None or (local is not None and self.local_wins(
+                    local["changed_at"], changed_at)):
+                return
+            self.write(changed_at, f"DELETE FROM {table} WHERE {where}", key_values)
+            return
+        if row is None:
+            # строка удалена на этой стороне позже, чем изменена на другой
+            if local is not None and local["deleted"] and self.local_wins(
+                    local["changed_at"], changed_at):
+                return
+            columns = [column for column in ENTITY_FIELDS[entity] if column in data]
+            self.write(changed_at, f"""INSERT INTO {table}({", ".join(columns)})
+                VALUES ({", ".join("?" * len(columns))})""",
+                       tuple(data[column] for column in columns))
+            return
+        if (self.policy == "lww" or change["operation"] == "insert"
+                or change["fields"] is None):
+            fields = ENTITY_FIELDS[entity]
+        else:
+            fields = change["fields"]
+        if local is not None:
+            if self.policy == "lww":
+                if self.local_wins(local["changed_at"], changed_at):
+                    return
+            else:
+                fields = [field for field in fields
+                          if field not in local["fields"]
+                          or not self.local_wins(local["fields"][field], changed_at)]
+        # совпадающие значения не записываются, чтобы не создавать записей журнала
+        fields = [field for field in fields if field not in keys
+                  and field in data and row.get(field) != data[field]]
+        if not fields:
+            return
+        self.write(changed_at, f"""UPDATE {table}
+            SET {", ".join(f"{field} = ?" for field in fields)} WHERE {where}""",
+                   (*(data[field] for field in fields), *key_values))
+
+    def resolve_collision(self, original_id: int, task_id: int):
+        """
+        метод для разделения двух разных задач с одинаковым id, возвращает id,
+        под которым сохраняется пришедшая задача
+        args(
+            original_id: int - id задачи в пришедшей записи журнала,
+            task_id: int - занятый id
+        )
+        """
+        new_id = self.cursor.execute(
+            "SELECT COALESCE(MAX(id), -1) + 1 FROM tasks").fetchone()[0]
+        if not self.rename_local:
+            self.remapped[original_id] = new_id
+            return new_id
+        # локальная задача еще не отправлена на сервер и уступает ему свой id,
+        # её новая строка отправится при следующей синхронизации
+        self.cursor.execute("UPDATE tasks SET id = ? WHERE id = ?", (new_id, task_id))
+        self.cursor.execute("""UPDATE journal SET origin = ?
+            WHERE entity = 'task' AND entity_id = ? AND origin IS NULL""",
+                            (SERVER_ORIGIN, task_id))
+        return task_id
+
+
+class SyncServer:
+    """
+    Класс небольшого HTTP-сервера синхронизации, который хранит общую копию
+    досок в обычной базе данных программы и отдает изменения из её журнала:
+    GET /changes?since=N - записи журнала после версии N,
+    GET /snapshot - все строки, если нужные записи уже сжаты,
+    POST /changes - применение записей журнала клиента.
+    Сервер работает в отдельном потоке и может запускаться в том же процессе
+    """
+
+    def __init__(self, db_name: str, host="127.0.0.1", port=0):
+        """
+        args(
+            db_name: str - путь к базе данных сервера,
+            host: str - адрес, на котором принимаются подключения,
+            port: int - порт, 0 - любой свободный порт
+        )
+        """
+        self.db_name = db_name
+        self.write_lock = threading.Lock()
+        connection = self.connect()
+        try:
+            check_database(connection)
+            ChangeJournal(connection)
+        finally:
+            connection.close()
+        self.httpd = http.server.ThreadingHTTPServer((host, port), SyncRequestHandler)
+        self.httpd.sync_server = self
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def connect(self):
+        """
+        метод для открытия подключения к базе данных для одного запроса
+        """
+        return sqlite3.connect(self.db_name, timeout=10)
+
+    def start(self):
+        """
+        метод для запуска сервера в отдельном потоке
+        """
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        метод для остановки сервера и ожидания его потока
+        """
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def get_changes(self, since: int, limit: int):
+        """
+        метод для получения записей журнала после версии клиента и версии,
+        с которой клиенту нужно продолжить
+        """
+        connection = self.connect()
+        try:
+            cursor = connection.cursor()
+            # версия и записи читаются из одного снимка базы данных
+            cursor.execute("BEGIN")
+            last_version = ChangeJournal.get_last_version(cursor)
+            changes = ChangeJournal.get_changes_since(cursor, since, limit)
+        finally:
+            connection.close()
+        if changes is None:
+            return {"snapshot": True}
+        version = changes[-1]["version"] if len(changes) == limit else last_version
+        return {"changes": changes, "version": version}
+
+    def get_snapshot(self):
+        """
+        метод для получения всех строк вместе с версией журнала
+        """
+        connection = self.connect()
+        try:
+            return ChangeJournal.get_snapshot(connection.cursor())
+        finally:
+            connection.close()
+
+    def push(self, peer: str, base: int, policy: str, changes: list):
+        """
+        метод для применения записей журнала клиента одной транзакцией,
+        возвращает количество внесенных изменений и замененные id задач
+        args(
+            peer: str - идентификатор клиента,
+            base: int - версия журнала сервера, полученная клиентом последней,
+            policy: str - "fields" или "lww",
+            changes: list - записи журнала клиента
+        )
+        """
+        with self.write_lock:
+            connection = self.connect()
+            try:
+                cursor = connection.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                # изменения сервера, которых клиент еще не видел
+                merger = ChangeMerger(cursor, base, peer, policy, peer,
+                                      prefer_local=True, rename_local=False)
+                merger.apply(changes)
+                connection.commit()
+            finally:
+                connection.close()
+        return {"applied": merger.applied, "remapped": merger.remapped}
+
+
+class SyncRequestHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Класс обработчика запросов сервера синхронизации
+    """
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        query = urllib.parse.parse_qs(url.query)
+        sync_server = self.server.sync_server
+        if url.path == "/changes":
+            self.respond(lambda: sync_server.get_changes(
+                int(query.get("since", ["0"])[0]),
+                min(int(query.get("limit", [BATCH_SIZE])[0]), BATCH_SIZE)))
+        elif url.path == "/snapshot":
+            self.respond(sync_server.get_snapshot)
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        if urllib.parse.urlsplit(self.path).path != "/changes":
+            self.send_error(404)
+            return
+
+        def push():
+            request = json.loads(self.rfile.read(
+                int(self.headers.get("Content-Length", 0))))
+            if request["policy"] not in POLICIES:
+                raise ValueError(f"unknown merge policy {request['policy']!r}")
+            return self.server.sync_server.push(
+                str(request["peer"]), int(request["base"]),
+                request["policy"], request["changes"])
+
+        self.respond(push)
+
+    def respond(self, function):
+        """
+        метод для выполнения запроса и отправки результата в формате json
+        """
+        try:
+            result = function()
+        except (ValueError, KeyError, TypeError) as err:
+            self.send_error(400, str(err))
+            return
+        except sqlite3.Error as err:
+            self.send_error(500, str(err))
+            return
+        body = json.dumps(result).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # запросы не выводятся в консоль
+        pass
+
+
+class SyncClient:
+    """
+    Класс для синхронизации базы данных с сервером: сначала отправляются
+    локальные записи журнала после последней отправленной версии, затем
+    применяются записи сервера после последней полученной версии, поэтому
+    объем работы зависит от количества изменений, а не от размера базы данных
+    """
+
+    def __init__(self, db_connection, url: str, policy="fields", timeout=30):
+        """
+        args(
+            db_connection: sqlite3.Connection - подключение к базе данных клиента,
+            url: str - адрес сервера синхронизации,
+            policy: str - "fields" или "lww",
+            timeout: int - время ожидания ответа сервера в секундах
+        )
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"unknown merge policy {policy!r}")
+        self.db_connection = db_connection
+        self.db_cursor = self.db_connection.cursor()
+        self.url = url.rstrip("/")
+        self.policy = policy
+        self.timeout = timeout
+        check_database(self.db_connection)
+        # журнал и его триггеры создает главное окно, пересоздание триггеров
+        # из второго подключения мешало бы его записи, поэтому только
+        # проверяется, что журнал текущей версии уже создан
+        journal_columns = {row[1] for row in self.db_connection.execute(
+            "PRAGMA table_info(journal)")}
+        if "origin" not in journal_columns:
+            raise ValueError("the database must be opened by the application "
+                             "before it can be synchronized")
+        self.change_journal = ChangeJournal(self.db_connection, create=False)
+        self.db_cursor.execute("""CREATE TABLE IF NOT EXISTS sync_state(
+            url TEXT PRIMARY KEY,
+            peer TEXT,
+            pushed_version INTEGER,
+            pulled_version INTEGER)""")
+        self.db_connection.commit()
+
+    def request(self, path: str, body=None):
+        """
+        метод для отправки запроса серверу и получения ответа в формате json
+        """
+        data = None if body is None else json.dumps(body).encode("utf-8")
+        request = urllib.request.Request(
+            self.url + path, data=data, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+    def get_state(self):
+        """
+        метод для получения идентификатора клиента, последней отправленной
+        и последней полученной версии, при первой синхронизации с сервером
+        все строки записываются в журнал, чтобы отправить и строки, которых
+        в журнале нет
+        """
+        row = self.db_cursor.execute("""SELECT peer, pushed_version, pulled_version
+            FROM sync_state WHERE url = ?""", (self.url,)).fetchone()
+        if row is not None:
+            return row
+        self.db_cursor.execute("BEGIN IMMEDIATE")
+        try:
+            start = ChangeJournal.get_last_version(self.db_cursor)
+            self.change_journal.rejournal_rows()
+            # записи получают время последнего изменения строки, а строки,
+            # не менявшиеся после создания журнала, уступают любому изменению
+            self.db_cursor.execute("""UPDATE journal SET changed_at = COALESCE((
+                SELECT MAX(earlier.changed_at) FROM journal AS earlier
+                WHERE earlier.entity = journal.entity
+                AND earlier.entity_id = journal.entity_id
+                AND earlier.layout_id IS journal.layout_id
+                AND earlier.version <= ?), 0) WHERE version > ?""", (start, start))
+            row = (uuid.uuid4().hex, start, 0)
+            self.db_cursor.execute("""INSERT INTO sync_state(url, peer,
+                pushed_version, pulled_version) VALUES (?, ?, ?, ?)""",
+                                   (self.url, *row))
+            self.db_connection.commit()
+        except BaseException:
+            self.db_connection.rollback()
+            raise
+        return row
+
+    def sync(self):
+        """
+        метод для отправки локальных и получения серверных изменений,
+        возвращает словарь с количеством отправленных и полученных записей
+        и задач, получивших новый id
+        """
+        peer, pushed_version, pulled_version = self.get_state()
+        pushed = 0
+        remapped = 0
+        while True:
+            changes = ChangeJournal.read_changes(
+                self.db_cursor, "version > ? AND origin IS NULL",
+                (pushed_version,), BATCH_SIZE)
+            if not changes:
+                break
+            response = self.request("/changes", {
+                "peer": peer, "base": pulled_version, "policy": self.policy,
+                "changes": changes})
+            pushed_version = changes[-1]["version"]
+            new_ids = {int(old_id): new_id
+                       for old_id, new_id in response["remapped"].items()}
+            self.finish_push(pushed_version, new_ids)
+            pushed += len(changes)
+            remapped += len(new_ids)
+        pulled = 0
+        while True:
+            response = self.request(
+                f"/changes?since={pulled_version}&limit={BATCH_SIZE}")
+            if response.get("snapshot"):
+                pulled += self.apply_snapshot(self.request("/snapshot"))
+                break
+            changes = response["changes"]
+            self.apply_remote_changes(changes, response["version"])
+            pulled += len(changes)
+            pulled_version = response["version"]
+            if len(changes) < BATCH_SIZE:
+                break
+        return {"pushed": pushed, "pulled": pulled, "remapped": remapped}
+
+    def finish_push(self, pushed_version: int, new_ids: dict):
+        """
+        метод для сохранения отправленной версии и смены id задач, которые
+        сервер сохранил под другим id, так как их id были заняты
+        args(
+            pushed_version: int - последняя отправленная версия журнала,
+            new_ids: dict - словарь вида {старый id: новый id}
+        )
+        """
+        self.db_cursor.execute("BEGIN IMMEDIATE")
+        try:
+            if new_ids:
+                # неотправленные задачи, id которых выдал сервер, тоже сдвигаются
+                next_id = max(self.db_cursor.execute(
+                    "SELECT COALESCE(MAX(id), -1) + 1 FROM tasks").fetchone()[0],
+                    max(new_ids.values()) + 1)
+                for new_id in list(new_ids.values()):
+                    if new_id not in new_ids and self.db_cursor.execute(
+                            "SELECT 1 FROM tasks WHERE id = ?", (new_id,)).fetchone():
+                        new_ids[new_id] = next_id
+                        next_id += 1
+                self.rekey_tasks(pushed_version, new_ids)
+            self.db_cursor.execute("""UPDATE sync_state SET pushed_version = ?
+                WHERE url = ?""", (pushed_version, self.url))
+            self.db_connection.commit()
+        except BaseException:
+            self.db_connection.rollback()
+            raise
+
+    def rekey_tasks(self, pushed_version: int, new_ids: dict):
+        """
+        метод для смены id локальных задач: неотправленные записи журнала
+        переходят к новым id, а записи о самой смене id не отправляются
+        """
+        start = ChangeJournal.get_last_version(self.db_cursor)
+        # смена идет через отрицательные id, так как новый id одной задачи
+        # может быть старым id другой
+        for pairs in ([(old_id, -1 - old_id) for old_id in new_ids],
+                      [(-1 - old_id, new_id) for old_id, new_id in new_ids.items()]):
+            for old_id, new_id in pairs:
+                self.db_cursor.execute("""UPDATE journal SET entity_id = ?
+                    WHERE entity = 'task' AND entity_id = ? AND version > ?
+                    AND version <= ? AND origin IS NULL""",
+                                       (new_id, old_id, pushed_version, start))
+                self.db_cursor.execute("UPDATE tasks SET id = ? WHERE id = ?",
+                                       (new_id, old_id))
+        self.db_cursor.execute("UPDATE journal SET origin = ? WHERE version > ?",
+                               (SERVER_ORIGIN, start))
+
+    def apply_remote_changes(self, changes: list, version: int):
+        """
+        метод для применения записей журнала сервера одной транзакцией
+        args(
+            changes: list - записи журнала сервера,
+            version: int - версия сервера, с которой продолжится получение
+        )
+        """
+        self.db_cursor.execute("BEGIN IMMEDIATE")
+        try:
+            pushed_version = self.db_cursor.execute(
+                "SELECT pushed_version FROM sync_state WHERE url = ?",
+                (self.url,)).fetchone()[0]
+            # записи сервера применяются по порядку, поэтому уступать им не должны
+            # только локальные изменения, сделанные после отправки
+            ChangeMerger(self.db_cursor, pushed_version, None, self.policy,
+                         SERVER_ORIGIN, prefer_local=False,
+                         rename_local=True).apply(changes)
+            self.db_cursor.execute("""UPDATE sync_state SET pulled_version = ?
+                WHERE url = ?""", (version, self.url))
+            self.db_connection.commit()
+        except BaseException:
+            self.db_connection.rollback()
+            raise
+
+    def apply_snapshot(self, snapshot: dict):
+        """
+        метод для замены локальных строк строками снимка сервера, если нужные
+        записи журнала сервера уже сжаты, неотправленные изменения сохраняются,
+        возвращает количество строк снимка
+        """
+        changes = []
+        for table, rows in snapshot.items():
+            if table not in JOURNALED_TABLES:
+                continue
+            entity = JOURNALED_TABLES[table][0]
+            keys = SYNCED_ENTITIES[entity][1]
+            remote_keys = set()
+            for row in rows:
+                key = tuple(row[column] for column in keys)
+                remote_keys.add(key)
+                changes.append(self.get_snapshot_change(entity, key, "insert", row))
+            local_keys = self.db_cursor.execute(
+                f"SELECT {', '.join(keys)} FROM {table}").fetchall()
+            changes.extend(self.get_snapshot_change(entity, key, "delete", None)
+                           for key in local_keys if tuple(key) not in remote_keys)
+        # строки снимка не имеют времени изменения и уступают любому изменению
+        self.apply_remote_changes(changes, snapshot["version"])
+        return sum(len(snapshot[table]) for table in JOURNALED_TABLES)
+
+    @staticmethod
+    def get_snapshot_change(entity: str, key: tuple, operation: str, data):
+        """
+        метод для представления строки снимка в виде записи журнала
+        """
+        return {"entity": entity, "entity_id": key[0],
+                "layout_id": key[1] if len(key) > 1 else None,
+                "operation": operation, "data": data, "fields": None,
+                "changed_at": 0}
+
+
+class SyncSignals(QtCore.QObject):
+    """
+    Класс сигналов для передачи результата синхронизации из рабочего потока
+    """
+    finished = QtCore.pyqtSignal(object)  # словарь с количеством записей
+    failed = QtCore.pyqtSignal(str)  # текст ошибки
+
+
+class SyncJob(QtCore.QRunnable):
+    """
+    Класс задачи рабочего потока для синхронизации через отдельное подключение,
+    главное окно увидит изменения через журнал, как изменения другого экземпляра
+    """
+
+    def __init__(self, db_name: str, url: str, policy: str, signals: SyncSignals):
+        super().__init__()
+        self.db_name = db_name
+        self.url = url
+        self.policy = policy
+        self.signals = signals
+
+    def run(self):
+        """
+        метод для синхронизации базы данных в рабочем потоке
+        """
+        try:
+            connection = sqlite3.connect(self.db_name, timeout=10)
+            try:
+                result = SyncClient(connection, self.url, self.policy).sync()
+            finally:
+                connection.close()
+        except Exception as err:
+            # при любой ошибке, в том числе в неверном ответе сервера,
+            # синхронизация должна завершиться, иначе её нельзя запустить снова
+            self.signals.failed.emit(f"{type(err).__name__}: {err}")
+        else:
+            self.signals.finished.emit(result)
+
+
+class TaskSync(QtCore.QObject):
+    """
+    Класс для синхронизации базы данных с сервером в фоне
+    """
+    sync_finished = QtCore.pyqtSignal(object)  # словарь с количеством записей
+    sync_failed = QtCore.pyqtSignal(str)  # текст ошибки
+
+    def __init__(self, db_name: str, parent=None):
+        super().__init__(parent)
+        self.db_name = db_name
+        self.running = False
+        self.thread_pool = QtCore.QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(1)
+        self.signals = SyncSignals(self)
+        self.signals.finished.connect(self.handle_finished)
+        self.signals.failed.connect(self.handle_failed)
+
+    def start_sync(self, url: str, policy: str):
+        """
+        метод для запуска синхронизации в рабочем потоке, возвращает False,
+        если синхронизация уже выполняется
+        """
+        if self.running:
+            return False
+        self.running = True
+        self.thread_pool.start(SyncJob(self.db_name, url, policy, self.signals))
+        return True
+
+    def handle_finished(self, result: dict):
+        """
+        метод для передачи результата синхронизации
+        """
+        self.running = False
+        self.sync_finished.emit(result)
+
+    def handle_failed(self, error: str):
+        """
+        метод для передачи ошибки синхронизации
+        """
+        self.running = False
+        self.sync_failed.emit(error)
+
+    def stop(self):
+        """
+        метод для ожидания завершения синхронизации
+        """
+        self.thread_pool.waitForDone()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Delta sync of task databases through a local sync server")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve_parser = subparsers.add_parser("serve", help="serve a database")
+    serve_parser.add_argument("database")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    sync_parser = subparsers.add_parser("sync", help="sync a database with a server")
+    sync_parser.add_argument("database")
+    sync_parser.add_argument("url")
+    sync_parser.add_argument("--policy", choices=POLICIES, default="fields")
+    args = parser.parse_args()
+    if args.command == "serve":
+        server = SyncServer(args.database, args.host, args.port)
+        print(f"Serving {args.database} at {server.url}")
+        try:
+            server.httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        server.httpd.server_close()
+    else:
+        db_connection = sqlite3.connect(args.database, timeout=10)
+        try:
+            result = SyncClient(db_connection, args.url, args.policy).sync()
+        finally:
+            db_connection.close()
+        print(f"{result['pushed']} changes sent, {result['pulled']} received, "
+              f"{result['remapped']} tasks renumbered")
+        sys.exit(0)
@@ -1,5 +1,6 @@
 import json
 from PyQt5 import QtWidgets, QtGui, QtCore
+from task_model import Task
 
 
 class Label(QtWidgets.QLabel):
@@ -9,7 +10,7 @@ class Label(QtWidgets.QLabel):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.data = None
+        self.task = None
         self.allow_drag = True
 
     def mouseMoveEvent(self, event):
@@ -27,15 +28,15 @@ class Label(QtWidgets.QLabel):
 
     def get_data(self):
         """
-        метод для получения данных о задаче
+        метод для получения данных о задаче в формате json для перетаскивания
         """
-        return json.dumps(self.data)
+        return json.dumps(self.task.to_dict())
 
-    def set_drag_data(self, data):
+    def set_task(self, task: Task):
         """
-        метод для установки данных о задаче
+        метод для установки задачи, которую перетаскивает лэйбл
         """
-        self.data = data
+        self.task = task
 
     def set_drag_enabled(self, new_state: bool):
         """
@@ -50,26 +51,56 @@ class TaskWidget(QtWidgets.QWidget):
     """
     widget_id = 0  # id виджета
     widget_closed = QtCore.pyqtSignal()  # сигнал закрытия окна с виджетом
+    # сигнал нажатия на виджет с модификаторами клавиатуры для выделения
+    selection_clicked = QtCore.pyqtSignal(int)
+    PREVIEW_SIZE = 64  # максимальный размер миниатюры файла на виджете
 
-    def __init__(self, text, color="#8cff7a", parent=None, id_=None, layout_id=0):
+    def __init__(self, text="", color="#8cff7a", parent=None, id_=None,
+                 layout_id=0, task=None):
         super().__init__(parent=parent)
-        self.color = color
-        self.text = text
-        if id_ is None:
-            self.widget_id = TaskWidget.widget_id
-            TaskWidget.widget_id += 1
-        else:
-            self.widget_id = id_
-        self.attachments = None
-        self.layout_id = layout_id
+        # виджет только отображает задачу, все её данные хранятся в task
+        if task is None:
+            if id_ is None:
+                id_ = TaskWidget.widget_id
+                TaskWidget.widget_id += 1
+            task = Task(id_, text, color, layout_id=layout_id)
+        self.task = task
         self.setup_ui()
 
+    @property
+    def text(self):
+        """
+        текст задачи
+        """
+        return self.task.text
+
+    @property
+    def color(self):
+        """
+        цвет индикатора задачи
+        """
+        return self.task.color
+
+    @property
+    def attachments(self):
+        """
+        обвесы задачи
+        """
+        return self.task.attachments
+
+    @property
+    def layout_id(self):
+        """
+        id лэйаута, в котором находится задача
+        """
+        return self.task.layout_id
+
     def setup_ui(self):
         """
         главный метод для создания графического интерфейса приложения
         """
         self.main_text_label = Label(self)
-        self.main_text_label.setText(self.text)
+        self.main_text_label.set_task(self.task)
         self.main_layout = QtWidgets.QVBoxLayout()
         self.outer_layout = QtWidgets.QVBoxLayout(self)
         self.main_layout.addWidget(self.main_text_label)
@@ -84,77 +115,99 @@ class TaskWidget(QtWidgets.QWidget):
         self.main_layout.addWidget(self.config_button)
         self.main_frame = QtWidgets.QFrame(self)
         self.main_frame.setLayout(self.main_layout)
-        self.main_frame.setStyleSheet(""".QFrame{
-            border: 1px solid black;
-            border-radius: 5px;
-            }""")
+        self.set_selected(False)
         self.outer_layout.addWidget(self.main_frame)
-        self.update_drag_data()
+        self.update_label()
 
-    def set_attachments(self, attachments):
+    def set_selected(self, selected: bool):
         """
-        метод для установки обвесов задачи
+        метод для отображения состояния выделения виджета
+        """
+        border = "2px solid #3d8ee6" if selected else "1px solid black"
+        self.main_frame.setStyleSheet(f""".QFrame{{
+            border: {border};
+            border-radius: 5px;
+            }}""")
+
+    def set_color(self, color: str):
+        """
+        метод для изменения цвета индикатора задачи
         """
-        self.attachments = attachments
-        self.update_drag_data()
-        self.add_attachments_to_label()
+        self.task.color = color
+        self.color_indicator.setStyleSheet(
+            f"""background: {self.color};
+               border-radius: 7px;""")
 
-    def update_drag_data(self):
+    def set_attachments(self, attachments):
         """
-        метод для обновления данных о задаче в главном лэйбле
+        метод для установки обвесов задачи
         """
-        self.main_text_label.set_drag_data({
-            "text": self.text,
-            "color": self.color,
-            "id": self.widget_id,
-            "attachments": self.attachments,
-            "layout_id": self.layout_id,
-        })
+        self.task.attachments = attachments
+        self.update_label()
 
     def config_from_data(self, data):
         """
         метод для конфигурации виджета из словаря из дилогового окна
         """
-        self.text = data["text"]
-        self.color = data["color"]
-        self.attachments = data["attachments"]
-        self.main_text_label.setText(self.text)
-        self.color_indicator.setStyleSheet(
-            f"""background: {self.color};
-               border-radius: 7px;""")
-        data["id"] = self.widget_id
-        data["layout_id"] = self.layout_id
-        self.main_text_label.set_drag_data(data)
-        if self.attachments is not None:
-            self.add_attachments_to_label()
+        self.task.text = data["text"]
+        self.task.attachments = data["attachments"]
+        self.set_color(data["color"])
+        self.update_label()
 
-    def add_attachments_to_label(self):
+    def update_label(self):
         """
-        метод для добавления дэдлайна, чеклиста на главный лэйбл
+        метод для отображения текста задачи и сводки по её обвесам на главном
+        лэйбле, сводка берется из сохраненных полей задачи
         """
-        checklist = self.attachments.get("checklist")
-        deadline = self.attachments.get("deadline")
         checklist_text = ""
         deadline_text = ""
-        if checklist is not None:
-            checklist_text = f"✅ {sum(el[1] for el in checklist)}/{len(checklist)}"
-        if deadline is not None:
-            deadline_text = deadline.split()[0]
-        sep = ", " if checklist_text and deadline_text else ""
-        self.main_text_label.setText(
-            f"{self.main_text_label.text()}\n\n{checklist_text}{sep}{deadline_text}")
+        if self.task.checklist_total:
+            checklist_text = f"✅ {self.task.checklist_done}/{self.task.checklist_total}"
+        if self.task.deadline_date is not None:
+            # дата хранится в формате ГГГГ-ММ-ДД, а отображается как ДД.ММ.ГГГГ
+            year, month, day = self.task.deadline_date[:10].split("-")
+            deadline_text = f"{day}.{month}.{year}"
+        if checklist_text or deadline_text:
+            sep = ", " if checklist_text and deadline_text else ""
+            self.main_text_label.setText(
+                f"{self.text}\n\n{checklist_text}{sep}{deadline_text}")
+        else:
+            self.main_text_label.setText(self.text)
 
     def get_data(self):
         """
         метод для получения данных о задаче
         """
-        return json.loads(self.main_text_label.get_data())
+        return self.task.to_dict()
+
+    def set_preview(self, image, description=""):
+        """
+        метод для отображения миниатюры прикрепленного файла, None убирает её
+        args(
+            image: QtGui.QImage - миниатюра файла или None,
+            description: str - описание файла для подсказки
+        )
+        """
+        if image is None or image.isNull():
+            if hasattr(self, "preview_label"):
+                self.preview_label.hide()
+            return
+        # лэйбл создается только у задач с файлами
+        if not hasattr(self, "preview_label"):
+            self.preview_label = QtWidgets.QLabel(self)
+            self.preview_label.setAlignment(QtCore.Qt.AlignCenter)
+            self.main_layout.insertWidget(2, self.preview_label)
+        self.preview_label.setPixmap(QtGui.QPixmap.fromImage(image).scaled(
+            self.PREVIEW_SIZE, self.PREVIEW_SIZE, QtCore.Qt.KeepAspectRatio,
+            QtCore.Qt.SmoothTransformation))
+        self.preview_label.setToolTip(description)
+        self.preview_label.show()
 
     def set_new_layout_id(self, new_id: int):
         """
         метод для установки нового id лэйаута, в котором находится виджет
         """
-        self.layout_id = new_id
+        self.task.layout_id = new_id
 
     def set_drag_enabled(self, new_state: bool):
         """
@@ -166,7 +219,13 @@ class TaskWidget(QtWidgets.QWidget):
         """
         метод для получения id виджета
         """
-        return self.widget_id
+        return self.task.id
+
+    def set_id(self, new_id: int):
+        """
+        метод для установки id виджета, выданного базой данных
+        """
+        self.task.id = new_id
 
     @classmethod
     def set_start_id(cls, new_id):
@@ -175,6 +234,14 @@ class TaskWidget(QtWidgets.QWidget):
         """
         cls.widget_id = new_id
 
+    def mousePressEvent(self, event):
+        """
+        метод для активации сигнала выделения при нажатии на виджет
+        """
+        if event.button() == QtCore.Qt.LeftButton:
+            self.selection_clicked.emit(int(event.modifiers()))
+        super().mousePressEvent(event)
+
     def closeEvent(self, event):
         """
         метод для активации сигнала о закрытии окна с виждетом, когда он закреплен
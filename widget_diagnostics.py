@@ -0,0 +1,232 @@
+import argparse
+import gc
+import os
+from PyQt5 import QtWidgets, QtCore, sip
+import sys
+import tempfile
+import time
+from task_widget import TaskWidget
+
+
+def get_rss():
+    """
+    функция для получения объема памяти процесса в байтах, на системах без
+    /proc возвращается пиковый объем памяти или 0
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # на macOS значение в байтах, на остальных системах в килобайтах
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class WidgetDiagnostics(QtCore.QObject):
+    """
+    Класс для поиска виджетов задач, которые живы, но не отображаются
+    доской, и отслеживания роста памяти со временем
+    """
+
+    def __init__(self, main_window, interval=5000, parent=None):
+        """
+        args(
+            main_window: MainWindow - главное окно приложения,
+            interval: int - интервал между замерами в миллисекундах,
+            parent: QtCore.QObject - родитель объекта
+        )
+        """
+        super().__init__(parent)
+        self.main_window = main_window
+        self.samples = []  # список словарей с результатами замеров
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.sample)
+
+    def start(self):
+        """
+        метод для запуска периодических замеров
+        """
+        self.samples.clear()
+        self.sample()
+        self.timer.start()
+
+    def stop(self):
+        """
+        метод для остановки периодических замеров
+        """
+        self.timer.stop()
+
+    def is_running(self):
+        """
+        метод для проверки, включен ли режим диагностики
+        """
+        return self.timer.isActive()
+
+    def get_expected_widgets(self):
+        """
+        метод для получения множества виджетов задач, которые отображает доска:
+        виджеты списков, закрепленные задачи и виджеты кэшированных таблиц
+        """
+        window = self.main_window
+        expected = set()
+        for layout in window.scroll_layouts.values():
+            for index in range(layout.count()):
+                expected.add(layout.itemAt(index).widget())
+        for columns in window.tables_cache.entries.values():
+            for column in columns.values():
+                expected.update(column)
+        return expected
+
+    def sample(self):
+        """
+        метод для замера количества живых виджетов и объема памяти,
+        возвращает словарь с результатами
+        """
+        window = self.main_window
+        # виджеты, ожидающие удаления, удаляются до подсчета, а циклы ссылок
+        # на удаленные виджеты собираются, чтобы в отчет попали только
+        # действительно удерживаемые объекты
+        QtCore.QCoreApplication.sendPostedEvents(None, QtCore.QEvent.DeferredDelete)
+        gc.collect()
+        live_widgets = [widget for widget in QtWidgets.QApplication.allWidgets()
+                        if isinstance(widget, TaskWidget)]
+        expected = self.get_expected_widgets()
+        orphans = [widget for widget in live_widgets if widget not in expected
+                   and not (widget.isWindow()
+                            and widget.get_id() in window.pinned_tasks_ids)]
+        sample = {
+            "time": time.time(),
+            "rss": get_rss(),
+            "live_widgets": len(live_widgets),
+            "expected_widgets": len(expected),
+            "orphans": [(widget.get_id(), type(widget.parent()).__name__)
+                        for widget in orphans],
+            "deleted_wrappers": self.count_deleted_wrappers(),
+            "task_records": len(window.task_store),
+            "dialog_children": len(
+                window.new_task_window.findChildren(QtCore.QObject)),
+        }
+        self.samples.append(sample)
+        return sample
+
+    @staticmethod
+    def count_deleted_wrappers():
+        """
+        метод для получения количества python-объектов виджетов задач,
+        которые еще используются, хотя сами виджеты уже удалены, обработчики
+        сигналов освобождают их на следующей итерации цикла событий, поэтому
+        утечкой считается только рост этого числа
+        """
+        return sum(1 for obj in gc.get_objects()
+                   if isinstance(obj, TaskWidget) and sip.isdeleted(obj))
+
+    def get_report(self):
+        """
+        метод для получения текстового отчета по последнему замеру и росту
+        показателей с первого замера
+        """
+        if not self.samples:
+            self.sample()
+        first, last = self.samples[0], self.samples[-1]
+        lines = [
+            f"Live task widgets: {last['live_widgets']}",
+            f"Expected task widgets: {last['expected_widgets']}",
+            f"Orphan task widgets: {len(last['orphans'])}",
+            f"Deleted widgets still referenced: {last['deleted_wrappers']}",
+            f"Task records: {last['task_records']}",
+            f"Task dialog children: {last['dialog_children']}",
+            f"RSS: {last['rss'] / 2 ** 20:.1f} MB",
+        ]
+        if last["orphans"]:
+            lines.append("Orphans (task id, parent): " + ", ".join(
+                f"{id_} {parent}" for id_, parent in last["orphans"][:20]))
+        if len(self.samples) > 1:
+            minutes = (last["time"] - first["time"]) / 60
+            lines.append(
+                f"Growth over {minutes:.1f} min: "
+                f"RSS {(last['rss'] - first['rss']) / 2 ** 20:+.1f} MB, "
+                f"widgets {last['live_widgets'] - first['live_widgets']:+d}, "
+                f"deleted widgets {last['deleted_wrappers'] - first['deleted_wrappers']:+d}, "
+                f"dialog children {last['dialog_children'] - first['dialog_children']:+d}")
+        return "\n".join(lines)
+
+
+def run_stress_test(cycles=2000, max_rss_mb=500, tables_count=8,
+                    tasks_per_table=50, sample_every=100):
+    """
+    функция для многократного переключения таблиц с проверкой, что виджеты
+    не теряются, а объем памяти не превышает заданный, возвращает True,
+    если проверка пройдена
+    """
+    from manager import MainWindow
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as directory:
+        window = MainWindow(os.path.join(directory, "stress.db"), "logo.png")
+        # колонки создаются только в видимой части доски
+        window.resize(1000, 600)
+        window.show()
+        window.db_cursor.executemany("INSERT INTO tables(title) VALUES (?)",
+                                     [(f"stress {index}",)
+                                      for index in range(1, tables_count)])
+        tables_ids = [row[0] for row in window.db_cursor.execute(
+            "SELECT id FROM tables ORDER BY id")]
+        window.db_cursor.executemany("""INSERT INTO tasks
+            (id, comment, color, table_id, layout_id) VALUES (?, ?, ?, ?, ?)""",
+                                     [(index, f"task {index}", "#8cff7a",
+                                       tables_ids[index % len(tables_ids)],
+                                       window.columns[index % len(window.columns)][0])
+                                      for index in range(tables_count * tasks_per_table)])
+        window.db_connection.commit()
+        diagnostics = WidgetDiagnostics(window)
+        diagnostics.sample()
+        # таблицы переключаются из цикла событий, как при работе пользователя,
+        # чтобы удаление виджетов и их обработчиков шло обычным путем
+        state = {"cycle": 0, "passed": True}
+
+        def switch_table():
+            state["cycle"] += 1
+            cycle = state["cycle"]
+            window.load_table(tables_ids[cycle % len(tables_ids)])
+            if cycle % sample_every and cycle != cycles:
+                return
+            sample = diagnostics.sample()
+            print(f"cycle {cycle}: {sample['live_widgets']} widgets, "
+                  f"{len(sample['orphans'])} orphans, "
+                  f"{sample['deleted_wrappers']} deleted widgets referenced, "
+                  f"{sample['rss'] / 2 ** 20:.1f} MB")
+            # удаленные виджеты должны освобождаться, а не накапливаться
+            if (sample["orphans"] or sample["rss"] > max_rss_mb * 2 ** 20
+                    or sample["deleted_wrappers"] > 2 * sample["expected_widgets"]):
+                state["passed"] = False
+            if cycle == cycles or not state["passed"]:
+                timer.stop()
+                app.quit()
+
+        timer = QtCore.QTimer()
+        timer.timeout.connect(switch_table)
+        started = time.perf_counter()
+        timer.start(0)
+        app.exec()
+        print(f"{state['cycle']} cycles in {time.perf_counter() - started:.1f} s")
+        print(diagnostics.get_report())
+        window.close()
+        passed = state["passed"]
+    return passed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Stress test of switching tables with leak checks")
+    parser.add_argument("--cycles", type=int, default=2000)
+    parser.add_argument("--max-rss-mb", type=int, default=500)
+    parser.add_argument("--tables", type=int, default=8)
+    parser.add_argument("--tasks", type=int, default=50)
+    args = parser.parse_args()
+    sys.exit(0 if run_stress_test(args.cycles, args.max_rss_mb,
+                                  args.tables, args.tasks) else 1)